@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: end to end benchmark of upload.py and queries against an in-process object store
+#
+#     usage:
+#        cd library
+#        python3 -m benchmark.bench_e2e --files 100 --sizes 100,1000,10000,100000 --queries 200 -o /tmp/e2e.json
+#
+#     Ingest: generated presentations are uploaded by upload.main() (analysis, upload, catalog and manifest),
+#     reporting files/s and MB/s. Query: for each corpus size, a bucket of objects with generated metadata is
+#     indexed (reindex, manifest) and queried from the catalog, the manifest, the bucket (stat of each object,
+#     sizes up to --max-scan) and the in-memory index of the search service, reporting latency percentiles.
+#
+#     The object store is benchmark.fakes3, --latency adds a delay (ms) to each request. The results are JSON
+#     (-o), compare the results of a change with those of the previous commit to detect regressions.
+#
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import tempfile
+import time
+
+from benchmark import decks
+from benchmark import fakes3
+
+BUCKET = 'prezo'
+MODES = ('catalog', 'manifest', 'bucket', 'service')
+
+
+def percentile(ordered, p):
+    """
+        returns: the p-th percentile (nearest rank) of a sorted list
+    """
+    return ordered[max(int(math.ceil(p / 100.0 * len(ordered))) - 1, 0)]
+
+
+def latency(times):
+    """
+        returns: a dictionary of the statistics of the elapsed times (seconds) of the queries, in ms
+    """
+    ordered = sorted(times)
+    return dict(queries=len(ordered),
+                mean_ms=round(1000 * sum(ordered) / len(ordered), 3),
+                p50_ms=round(1000 * percentile(ordered, 50), 3),
+                p90_ms=round(1000 * percentile(ordered, 90), 3),
+                p99_ms=round(1000 * percentile(ordered, 99), 3),
+                max_ms=round(1000 * ordered[-1], 3),
+                qps=round(len(ordered) / sum(ordered), 1) if sum(ordered) else None)
+
+
+def stages(path):
+    """
+        returns: the mean time (ms) of each stage of the files uploaded, from the metrics file of upload.py
+    """
+    (sums, counts) = (dict(), dict())
+    with open(path) as f:
+        for line in f:
+            match = re.match(r'prezo_ingest_seconds_(sum|count)\{stage="(\w+)"\} (\S+)', line)
+            if match:
+                (sums if match.group(1) == 'sum' else counts)[match.group(2)] = float(match.group(3))
+    return {stage: round(1000 * sums[stage] / counts[stage], 3) for stage in sums if counts.get(stage)}
+
+
+def ingest(directory, args):
+    """
+        Generate the presentations and upload them with upload.main(), as from the command line
+    """
+    os.makedirs(os.path.join(directory, 'decks'))
+    files = decks.make_decks(os.path.join(directory, 'decks'), args.files, slides=args.slides,
+                             media_bytes=args.media * 2**20) if args.files else []
+    size = sum(os.path.getsize(filepath) for filepath in files)
+
+    server = fakes3.FakeS3(buckets=[BUCKET], latency=args.latency / 1000.0)
+    fakes3.install(server)
+    os.environ.update(PZ_BUCKET=BUCKET, PZ_PPTX_FILES=os.path.join(directory, 'decks'), PZ_DEBUG='40',
+                      PZ_CATALOG=os.path.join(directory, 'upload.db'), PZ_CACHE='', PZ_FORCE='true',
+                      PZ_JOURNAL=os.path.join(directory, 'journal'), PZ_LSH=os.path.join(directory, 'minhash.db'),
+                      PZ_WORKERS=str(args.workers),
+                      PZ_ENGINE=args.engine, PZ_METRICS_FILE=os.path.join(directory, 'upload.prom'))
+    from catalog import catalog
+    catalog.Catalog(os.environ['PZ_CATALOG']).close()      # upload.py updates the catalog if it exists
+    import upload                                          # reads the environment when imported
+
+    start = time.perf_counter()
+    upload.main()
+    elapsed = time.perf_counter() - start
+
+    return dict(files=len(files),
+                mb=round(size / 2**20, 3),
+                seconds=round(elapsed, 3),
+                files_per_second=round(len(files) / elapsed, 2),
+                mb_per_second=round(size / 2**20 / elapsed, 3),
+                stages_ms=stages(os.environ['PZ_METRICS_FILE']),
+                requests=dict(server.requests))
+
+
+def corpus(directory, objects, args):
+    """
+        Fill a bucket with objects, index it and measure the queries of each mode
+    """
+    import pptxindex
+    import query
+    import service
+    from catalog import catalog
+    from manifest import manifest
+
+    server = fakes3.FakeS3(buckets=[BUCKET])
+    fakes3.install(server)
+    pi = pptxindex.PresentationIndex(bucket=BUCKET)
+    decks.fill_bucket(pi.minioClient, BUCKET, objects, seed=args.seed)
+    server.latency = args.latency / 1000.0
+
+    results = []
+    cat = catalog.Catalog(os.path.join(directory, 'catalog_{}.db'.format(objects)))
+    start = time.perf_counter()
+    cat.sync(pi)
+    elapsed = time.perf_counter() - start
+    results.append(dict(objects=objects, mode='reindex', seconds=round(elapsed, 3),
+                        objects_per_second=round(objects / elapsed, 1)))
+
+    mf = manifest.Manifest(pi)
+    start = time.perf_counter()
+    mf.rebuild(cat.entries())
+    results.append(dict(objects=objects, mode='manifest_rebuild', seconds=round(time.perf_counter() - start, 3)))
+
+    index = None
+    rng = random.Random(args.seed)
+    searches = [decks.sentence(rng, 2) for _ in range(args.queries)]
+    for mode in args.modes:
+        if mode == 'bucket' and objects > args.max_scan:
+            continue
+        if mode == 'service':
+            start = time.perf_counter()
+            index = service.SearchIndex(cat.documents())
+            results.append(dict(objects=objects, mode='service_load', seconds=round(time.perf_counter() - start, 3)))
+
+        count = args.queries if mode in ('catalog', 'service') else max(args.queries // 10, 3)
+        times = []
+        for search_string in searches[:count]:
+            start = time.perf_counter()
+            if mode == 'service':
+                for item in index.search(search_string, args.depth):
+                    item['url'] = pi.get_download_url(item['object_name']) if args.urls else None
+            else:
+                query.search_keywords(pi, search_string, args.depth, download_url=args.urls,
+                                      catalog=cat if mode == 'catalog' else None,
+                                      manifest=mf if mode == 'manifest' else None)
+            times.append(time.perf_counter() - start)
+        result = dict(objects=objects, mode=mode)
+        result.update(latency(times))
+        results.append(result)
+
+    cat.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End to end benchmark of upload and query', add_help=True)
+    parser.add_argument('--files', type=int, default=100, help='number of presentations to generate and upload')
+    parser.add_argument('--slides', type=int, default=20, help='slides per presentation')
+    parser.add_argument('--media', type=int, default=0, help='MB of embedded media per presentation')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='processes analyzing presentations')
+    parser.add_argument('--engine', default='stream', help='text extraction engine, pptx or stream')
+    parser.add_argument('--sizes', default='100,1000,10000', help='comma separated numbers of objects in the bucket')
+    parser.add_argument('--queries', type=int, default=200, help='queries of each corpus size (a tenth for manifest and bucket)')
+    parser.add_argument('--depth', type=int, default=10, help='results of each query')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma separated, any of {}'.format(', '.join(MODES)))
+    parser.add_argument('--max-scan', type=int, default=10000, dest='max_scan', help='largest bucket queried by stat of each object')
+    parser.add_argument('--latency', type=float, default=0.0, help='ms added to each request to the object store')
+    parser.add_argument('--urls', action='store_true', default=False, help='sign download URLs of the results')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated metadata and searches')
+    parser.add_argument('-o', dest='output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+    args.modes = [mode for mode in args.modes.split(',') if mode in MODES]
+
+    report = dict(benchmark='e2e', python=platform.python_version(), machine=platform.machine(),
+                  cpus=os.cpu_count(), parameters=vars(args), queries=[])
+
+    with tempfile.TemporaryDirectory() as directory:
+        report['ingest'] = ingest(directory, args)
+        print('ingest   {files} files {mb} MB in {seconds} s, {files_per_second} files/s {mb_per_second} MB/s'.format(
+              **report['ingest']))
+
+        for objects in [int(size) for size in args.sizes.split(',') if size]:
+            for result in corpus(directory, objects, args):
+                report['queries'].append(result)
+                if 'p50_ms' in result:
+                    print('{objects:>8} {mode:9} p50 {p50_ms:10.3f} p90 {p90_ms:10.3f} p99 {p99_ms:10.3f} ms '
+                          '{qps} queries/s'.format(**result))
+                else:
+                    print('{:>8} {:16} {} s'.format(result['objects'], result['mode'], result['seconds']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: compare the text extraction engines of PresentationIndex on generated decks
+#
+#     usage:
+#        cd library
+#        python3 -m benchmark.bench_extract --decks 10 --slides 40 --media 20 -o /tmp/extract.json
+#
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+import pptxindex
+from benchmark import decks
+
+
+def measure(engine, files, repeat=1):
+    """
+        Extract the text of each file, returning the elapsed time per file and the peak memory allocated.
+        Memory is traced in a separate pass, tracing allocations distorts the timing.
+    """
+    pi = pptxindex.PresentationIndex(engine=engine)
+    runs = 0
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for filepath in files:
+            runs += len(pi.extract_text(filepath))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for filepath in files:
+        pi.extract_text(filepath)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return dict(engine=engine,
+                files=len(files) * repeat,
+                text_runs=runs,
+                ms_per_file=round(1000 * elapsed / (len(files) * repeat), 3),
+                peak_mb=round(peak / 2**20, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark text extraction engines', add_help=True)
+    parser.add_argument('--decks', type=int, default=10, help='number of decks to generate')
+    parser.add_argument('--slides', type=int, default=40, help='slides per deck')
+    parser.add_argument('--media', type=int, default=20, help='MB of embedded media per deck')
+    parser.add_argument('--repeat', type=int, default=3, help='number of passes over the decks')
+    parser.add_argument('-o', dest='output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = decks.make_decks(directory, args.decks, slides=args.slides, media_bytes=args.media * 2**20)
+        results = [measure(engine, files, args.repeat) for engine in pptxindex.PresentationIndex.ENGINES]
+
+    baseline = results[0]['ms_per_file']
+    for result in results:
+        result['speedup'] = round(baseline / result['ms_per_file'], 2) if result['ms_per_file'] else None
+        print('{engine:8} {ms_per_file:10.3f} ms/file {peak_mb:10.2f} MB peak {speedup:6.2f}x'.format(**result))
+
+    report = dict(benchmark='extract', decks=args.decks, slides=args.slides, media_mb=args.media, results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
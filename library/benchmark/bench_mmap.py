@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: compare the mapped index (mmapindex) and the index loaded by service.py, time and memory
+#
+#     usage:
+#        cd library
+#        python3 -m benchmark.bench_mmap --sizes 10000,100000 --queries 100 --workers 4 -o /tmp/mmap.json
+#
+#     For each corpus size, the generated documents (refer to bench_rank.make_documents()) are written to an
+#     index file by mmapindex.build() and loaded by service.SearchIndex, reporting the time to build, open and
+#     load each index, the latency of the searches and whether the results are the same. Then --workers
+#     processes each open the index (mapped) or load it (loaded) and run the searches, the resident (RSS) and
+#     proportional (PSS, shared pages divided among the processes) memory of each worker is read from
+#     /proc/self/smaps_rollup (Linux) while every worker is alive.
+#
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import tempfile
+
+from benchmark import decks
+from benchmark.bench_e2e import latency
+from benchmark.bench_rank import make_documents
+from benchmark.bench_rank import timed
+from credibility import engine
+from mmapindex import mmapindex
+
+
+def memory():
+    """
+        returns: a dictionary of the resident and proportional memory of this process in MB, empty if unknown
+    """
+    values = dict()
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                (name, _, rest) = line.partition(':')
+                if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    values[name.lower()] = round(int(rest.split()[0]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        return dict()
+    return dict(rss_mb=values.get('rss'), pss_mb=values.get('pss'),
+                private_mb=round(values.get('private_clean', 0) + values.get('private_dirty', 0), 1))
+
+
+def worker(mode, path, documents, searches, depth, barrier, results):
+    """
+        Executed in a worker process, open (or load) the index, run the searches and report the memory
+        once every worker has done the same
+    """
+    import service
+
+    before = memory()
+    if mode == 'mapped':
+        (index, elapsed) = timed(mmapindex.MappedIndex, path)
+    else:
+        (index, elapsed) = timed(service.SearchIndex, documents)
+    for search_string in searches:
+        index.search(search_string, depth)
+    barrier.wait()
+    result = dict(mode=mode, pid=os.getpid(), open_seconds=round(elapsed, 4), rss_before_mb=before.get('rss_mb'))
+    result.update(memory())
+    results.put(result)
+    barrier.wait()                                         # remain alive until every worker has read its memory
+
+
+def workers(mode, path, documents, searches, args):
+    """
+        returns: a list of the results of --workers processes of the mode (mapped or loaded)
+    """
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, path, documents, searches, args.depth, barrier, results))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return collected
+
+
+def compare(documents, searches, args):
+    """
+        Build, open and search each index, returning a list of results
+    """
+    import service
+
+    objects = len(documents)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'catalog.db' + mmapindex.SUFFIX)
+        (_, elapsed) = timed(mmapindex.build, path, documents, generation=1)
+        results.append(dict(objects=objects, mode='mapped_build', seconds=round(elapsed, 3),
+                            mb=round(os.path.getsize(path) / 2**20, 3)))
+        (mapped, elapsed) = timed(mmapindex.MappedIndex, path)
+        results.append(dict(objects=objects, mode='mapped_open', seconds=round(elapsed, 4)))
+        (loaded, elapsed) = timed(service.SearchIndex, documents)
+        results.append(dict(objects=objects, mode='loaded_build', seconds=round(elapsed, 3)))
+
+        times = dict(mapped=[], loaded=[])
+        same = 0
+        for search_string in searches:
+            ranked = dict()
+            for (mode, index) in (('mapped', mapped), ('loaded', loaded)):
+                (hits, elapsed) = timed(index.search, search_string, args.depth)
+                ranked[mode] = [(hit['object_name'], hit['credibility']) for hit in hits]
+                times[mode].append(elapsed)
+            same += sorted(ranked['mapped']) == sorted(ranked['loaded'])
+
+        for mode in ('mapped', 'loaded'):
+            result = dict(objects=objects, mode=mode)
+            result.update(latency(times[mode]))
+            results.append(result)
+        results.append(dict(objects=objects, mode='same', depth=args.depth, mean=round(same / len(searches), 3)))
+
+        if args.workers:
+            for mode in ('mapped', 'loaded'):
+                for result in workers(mode, path, documents, searches[:args.worker_queries], args):
+                    result.update(objects=objects, mode='{}_worker'.format(mode))
+                    results.append(result)
+        mapped.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the mapped index and the loaded index', add_help=True)
+    parser.add_argument('--sizes', default='10000,100000', help='comma separated numbers of documents')
+    parser.add_argument('--queries', type=int, default=100, help='searches of each corpus size')
+    parser.add_argument('--words', type=int, default=2, help='words of each search')
+    parser.add_argument('--depth', type=int, default=10, help='results of each search')
+    parser.add_argument('--workers', type=int, default=4, help='worker processes, 0 skips measuring memory')
+    parser.add_argument('--worker-queries', type=int, default=20, dest='worker_queries',
+                        help='searches of each worker, reading the pages of the index')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated metadata and searches')
+    parser.add_argument('-o', dest='output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if not engine.AVAILABLE:
+        parser.error('requires numpy and rapidfuzz')
+
+    report = dict(benchmark='mmap', python=platform.python_version(), machine=platform.machine(),
+                  cpus=os.cpu_count(), parameters=vars(args), results=[])
+
+    rng = random.Random(args.seed)
+    searches = [decks.sentence(rng, args.words) for _ in range(args.queries)]
+    for objects in [int(size) for size in args.sizes.split(',') if size]:
+        for result in compare(make_documents(objects, seed=args.seed), searches, args):
+            report['results'].append(result)
+            if 'p50_ms' in result:
+                print('{objects:>8} {mode:14} p50 {p50_ms:10.3f} p90 {p90_ms:10.3f} p99 {p99_ms:10.3f} ms '
+                      '{qps} queries/s'.format(**result))
+            elif 'pid' in result:
+                print('{objects:>8} {mode:14} pid {pid} open {open_seconds} s rss {rss_mb} MB pss {pss_mb} MB '
+                      'private {private_mb} MB'.format(**result))
+            elif 'seconds' in result:
+                print('{:>8} {:14} {} s{}'.format(result['objects'], result['mode'], result['seconds'],
+                                                  ' {} MB'.format(result['mb']) if 'mb' in result else ''))
+            else:
+                print('{:>8} {:14} top {} {}'.format(result['objects'], result['mode'], result['depth'], result['mean']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: compare keyword extraction, a Rake() for each document and the shared KeyphraseExtractor
+#
+#     usage:
+#        cd library
+#        python3 -m benchmark.bench_rake --documents 2000 --sentences 40 --workers 4 -o /tmp/rake.json
+#
+import argparse
+import json
+import random
+import time
+
+from rake_nltk import Rake
+
+from benchmark import decks
+from keyphrase import keyphrase
+
+CONNECTIVES = ('and', 'the', 'with', 'for', 'of', 'to', 'in', 'on', 'is', 'a', ',', '.', ':', '-')
+
+
+def make_corpus(count, sentences=40, seed=0):
+    """
+        Return a list of documents, each a list of sentences of vocabulary words joined by stopwords and punctuation
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        document = []
+        for _ in range(sentences):
+            words = decks.sentence(rng, rng.randint(6, 14)).split()
+            for n in range(len(words) - 1, 0, -1):
+                if rng.random() < 0.3:
+                    words.insert(n, rng.choice(CONNECTIVES))
+            document.append(' '.join(words).capitalize())
+        corpus.append(document)
+    return corpus
+
+
+def rake_per_call(corpus, depth):
+    """
+        The original implementation, PresentationIndex.rake_it() created a Rake() for each document
+    """
+    results = []
+    for document in corpus:
+        r = Rake()
+        r.extract_keywords_from_sentences(document)
+        results.append(r.get_ranked_phrases_with_scores()[0:depth])
+    return results
+
+
+def measure(name, function, corpus, depth):
+    """
+        Returns the results of the function and its elapsed time per document
+    """
+    start = time.perf_counter()
+    results = function(corpus, depth)
+    elapsed = time.perf_counter() - start
+    return (results, dict(method=name,
+                          documents=len(corpus),
+                          ms_per_document=round(1000 * elapsed / len(corpus), 4)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark keyword extraction', add_help=True)
+    parser.add_argument('--documents', type=int, default=2000, help='number of documents to generate')
+    parser.add_argument('--sentences', type=int, default=40, help='sentences per document')
+    parser.add_argument('--depth', type=int, default=20, help='keyword phrases returned per document')
+    parser.add_argument('--workers', type=int, default=4, help='processes of the batch extraction')
+    parser.add_argument('-o', dest='output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.documents, sentences=args.sentences)
+    extractor = keyphrase.extractor()
+    methods = (('rake', rake_per_call),
+               ('extract', lambda corpus, depth: [extractor.extract(document, depth) for document in corpus]),
+               ('extract_many', lambda corpus, depth: extractor.extract_many(corpus, depth, workers=args.workers)))
+
+    baseline = None
+    results = []
+    for name, function in methods:
+        (output, result) = measure(name, function, corpus, args.depth)
+        if baseline is None:
+            baseline = output
+        result['identical'] = output == baseline
+        results.append(result)
+
+    for result in results:
+        result['speedup'] = round(results[0]['ms_per_document'] / result['ms_per_document'], 2)
+        print('{method:14} {ms_per_document:10.4f} ms/document {speedup:6.2f}x identical={identical}'.format(**result))
+
+    report = dict(benchmark='rake', documents=args.documents, sentences=args.sentences, depth=args.depth,
+                  workers=args.workers, results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: compare ranking by Credibility (fuzzy matching) and BM25, speed and overlap of the results
+#
+#     usage:
+#        cd library
+#        python3 -m benchmark.bench_rank --sizes 1000,10000,100000 --queries 200 --depth 10 -o /tmp/rank.json
+#
+#     For each corpus size, documents with generated metadata (in the order of PresentationIndex.get_metadata())
+#     are indexed by CredibilityEngine and BM25Engine and the same searches ranked by each, reporting the time
+#     to build (and save, load) each index, the latency of the searches and the overlap of the top `depth`
+#     results: the fraction of the results of Credibility which are also results of BM25. The Python path of
+#     query.top_results() is measured for sizes up to --max-python.
+#
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+
+from benchmark import decks
+from benchmark.bench_e2e import latency
+from credibility import bm25
+from credibility import engine
+
+
+def make_documents(count, seed=0):
+    """
+        Return a list of tuples (object_name, last_modified, metadata) of generated presentations, refer to
+        Catalog.documents()
+    """
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        fields = decks.make_metadata(rng, index)
+        object_name = 'deck_{:06d}.pptx'.format(index)
+        metadata = [','.join(fields['rake_keywords']), fields['author'][0], fields['subject'][0],
+                    fields['keywords'][0], fields['title'][0], '', object_name]
+        documents.append((object_name, '2026-10-18T00:00:00+00:00', metadata))
+    return documents
+
+
+def timed(function, *args, **kwargs):
+    """
+        returns: a tuple of the result of the function and the elapsed seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return (result, time.perf_counter() - start)
+
+
+def compare(documents, searches, args):
+    """
+        Index the documents by each engine and rank the searches, returning a list of results
+    """
+    import query
+
+    objects = len(documents)
+    results = []
+
+    (fuzzy, elapsed) = timed(engine.CredibilityEngine, documents)
+    results.append(dict(objects=objects, mode='credibility_build', seconds=round(elapsed, 3)))
+    (index, elapsed) = timed(bm25.BM25Engine, documents)
+    results.append(dict(objects=objects, mode='bm25_build', seconds=round(elapsed, 3), terms=len(index.terms),
+                        nonzero=int(index.matrix.nnz)))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'catalog.db' + bm25.BM25Engine.SUFFIX)
+        (_, elapsed) = timed(index.save, path, generation=1)
+        results.append(dict(objects=objects, mode='bm25_save', seconds=round(elapsed, 3),
+                            mb=round(os.path.getsize(path) / 2**20, 3)))
+        (index, elapsed) = timed(bm25.BM25Engine.load, path, generation=1)
+        results.append(dict(objects=objects, mode='bm25_load', seconds=round(elapsed, 3)))
+
+    ranked = dict(credibility=[], bm25=[], python=[])
+    times = dict(credibility=[], bm25=[], python=[])
+    for search_string in searches:
+        for (mode, search) in (('credibility', fuzzy.search), ('bm25', index.search)):
+            (hits, elapsed) = timed(search, search_string, depth=args.depth)
+            ranked[mode].append([hit['object_name'] for hit in hits])
+            times[mode].append(elapsed)
+        if objects <= args.max_python:
+            (hits, elapsed) = timed(query.top_results, search_string, documents, args.depth)
+            times['python'].append(elapsed)
+
+    for mode in ('python', 'credibility', 'bm25'):
+        if times[mode]:
+            result = dict(objects=objects, mode=mode)
+            result.update(latency(times[mode]))
+            results.append(result)
+
+    overlap = [len(set(a) & set(b)) / len(a) for (a, b) in zip(ranked['credibility'], ranked['bm25']) if a]
+    results.append(dict(objects=objects, mode='overlap', depth=args.depth,
+                        mean=round(sum(overlap) / len(overlap), 3) if overlap else None))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ranking by Credibility and BM25', add_help=True)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated numbers of documents')
+    parser.add_argument('--queries', type=int, default=200, help='searches of each corpus size')
+    parser.add_argument('--words', type=int, default=2, help='words of each search')
+    parser.add_argument('--depth', type=int, default=10, help='results of each search')
+    parser.add_argument('--max-python', type=int, default=10000, dest='max_python',
+                        help='largest corpus ranked by query.top_results()')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generated metadata and searches')
+    parser.add_argument('-o', dest='output', default=None, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if not (engine.AVAILABLE and bm25.AVAILABLE):
+        parser.error('requires numpy, rapidfuzz and scipy')
+
+    report = dict(benchmark='rank', python=platform.python_version(), machine=platform.machine(),
+                  cpus=os.cpu_count(), parameters=vars(args), results=[])
+
+    rng = random.Random(args.seed)
+    searches = [decks.sentence(rng, args.words) for _ in range(args.queries)]
+    for objects in [int(size) for size in args.sizes.split(',') if size]:
+        for result in compare(make_documents(objects, seed=args.seed), searches, args):
+            report['results'].append(result)
+            if 'p50_ms' in result:
+                print('{objects:>8} {mode:17} p50 {p50_ms:10.3f} p90 {p90_ms:10.3f} p99 {p99_ms:10.3f} ms '
+                      '{qps} queries/s'.format(**result))
+            elif 'seconds' in result:
+                print('{:>8} {:17} {} s'.format(result['objects'], result['mode'], result['seconds']))
+            else:
+                print('{:>8} {:17} top {} {}'.format(result['objects'], result['mode'], result['depth'], result['mean']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: generate synthetic PowerPoint presentations for benchmarks
+#
+#     usage:
+#       >>> from benchmark import decks
+#       >>> decks.make_deck('/tmp/deck.pptx', slides=20, media_bytes=50 * 1024 * 1024, seed=1)
+#       >>> decks.fill_bucket(pi.minioClient, pi.bucket, 10000)      # metadata only, no presentations
+#
+import io
+import random
+
+from pptx import Presentation
+from pptx.util import Inches
+
+VOCABULARY = ('network automation ansible terraform kubernetes container cloud security firewall policy '
+              'telemetry streaming fabric switch router routing bgp ospf segment vxlan evpn datacenter '
+              'infrastructure agility observability monitoring pipeline devops netdevops python api rest '
+              'yaml json inventory playbook module collection controller intent validation compliance '
+              'storage object bucket metadata keyword search presentation webinar meetup customer '
+              'architecture design migration operations wireless campus branch sdwan zero trust identity '
+              'microsegmentation analytics dashboard latency throughput capacity resilience').split()
+
+AUTHORS = ('King, Joel', 'Smith, Pat', 'Jones, Alex', 'Garcia, Sam', 'Chen, Lee')
+
+
+def sentence(rng, words=8):
+    """
+        Return a string of words selected at random from the vocabulary
+    """
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def make_deck(path, slides=20, words_per_slide=60, media_bytes=0, seed=None, notes=True):
+    """
+        Create a presentation with a title slide and the specified number of bullet slides.
+
+        input: path: filename of the presentation to create
+               slides: number of slides
+               words_per_slide: approximate number of words of text on each slide
+               media_bytes: size of an (incompressible) media file embedded on the first slide
+               seed: seed for the random number generator, for reproducible decks
+               notes: add speaker notes to each slide
+
+        returns: path
+    """
+    rng = random.Random(seed)
+    prs = Presentation()
+    prs.core_properties.author = rng.choice(AUTHORS)
+    prs.core_properties.title = sentence(rng, 4).title()
+    prs.core_properties.subject = sentence(rng, 6)
+    prs.core_properties.keywords = ', '.join(rng.sample(VOCABULARY, 4))
+
+    for number in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = sentence(rng, 5).title()
+        body = slide.placeholders[1].text_frame
+        body.text = sentence(rng, 8)
+        for _ in range(max(words_per_slide // 8 - 1, 0)):
+            body.add_paragraph().text = sentence(rng, 8)
+        if notes:
+            slide.notes_slide.notes_text_frame.text = sentence(rng, 20)
+        if number == 0 and media_bytes:
+            media = io.BytesIO(rng.getrandbits(8 * media_bytes).to_bytes(media_bytes, 'little'))
+            slide.shapes.add_movie(media, Inches(1), Inches(1), Inches(4), Inches(3), mime_type='video/mp4')
+
+    prs.save(path)
+    return path
+
+
+def make_decks(directory, count, seed=0, **kwargs):
+    """
+        Create count presentations in directory, returning a list of the filenames
+    """
+    return [make_deck('{}/deck_{:06d}.pptx'.format(directory, index), seed=seed + index, **kwargs)
+            for index in range(count)]
+
+
+def make_metadata(rng, index):
+    """
+        Return the metadata of a presentation, as upload.py stores it in the object store, without creating
+        the presentation: the keyword phrases, the filepath and the core properties
+    """
+    return dict(rake_keywords=[sentence(rng, rng.randint(2, 4)) for _ in range(rng.randint(5, 20))],
+                filepath=['data/deck_{:06d}.pptx'.format(index)],
+                author=[rng.choice(AUTHORS)],
+                title=[sentence(rng, 4).title()],
+                subject=[sentence(rng, 6)],
+                keywords=[', '.join(rng.sample(VOCABULARY, 4))],
+                md5=['{:032x}'.format(rng.getrandbits(128))])
+
+
+def fill_bucket(client, bucket, count, seed=0):
+    """
+        Create count (empty) objects in the bucket with the metadata of generated presentations,
+        a bucket of any size without creating or uploading the presentations
+
+        input: client: a Minio client (or benchmark.fakes3.FakeMinio)
+        returns: a list of the object names
+    """
+    rng = random.Random(seed)
+    names = []
+    for index in range(count):
+        names.append('deck_{:06d}.pptx'.format(index))
+        client.put_object(bucket, names[-1], io.BytesIO(b''), 0, metadata=make_metadata(rng, index),
+                          content_type='application/vnd.openxmlformats-officedocument.presentationml.presentation')
+    return names
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: an in-process stand-in for the object store, the Minio calls used by PresentationIndex
+#
+#     usage:
+#       >>> from benchmark import fakes3
+#       >>> server = fakes3.FakeS3(buckets=['prezo'], latency=0.005)
+#       >>> fakes3.install(server)                 # PresentationIndex() now connects to the server
+#       >>> pi = pptxindex.PresentationIndex(bucket='prezo')
+#
+#     The metadata and tags of each object are kept as the object store returns them (the headers of
+#     stat_object), the content of files uploaded with fput_object or in parts is not kept, only its size
+#     and MD5. Each request waits `latency` seconds, outside of any lock, to stand in for the round trip
+#     to the object store, so concurrent requests overlap as they would over the network.
+#
+import datetime
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, quote
+
+from urllib3 import HTTPHeaderDict
+
+from minio.commonconfig import Tags
+from minio.datatypes import Bucket, Object, Part
+from minio.error import S3Error
+from minio.helpers import ObjectWriteResult, genheaders
+
+BLOCK_SIZE = 2**20
+
+
+class FakeS3(object):
+    """
+        The buckets and objects of the stand-in, shared by the clients (FakeMinio) of every thread
+    """
+
+    def __init__(self, buckets=('prezo',), latency=0.0):
+        """
+            input: buckets: the names of the buckets
+                   latency: seconds each request waits
+        """
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.buckets = {name: dict() for name in buckets}  # bucket: {object_name: dict(headers, data)}
+        self.created = datetime.datetime.now(datetime.timezone.utc)
+        self.uploads = dict()                              # upload_id: dict(bucket, object_name, headers, parts)
+        self.requests = Counter()                          # the number of requests of each method
+
+    def request(self, method):
+        self.requests[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def error(self, code, bucket, object_name=None):
+        return S3Error(None, code, code, '/{}/{}'.format(bucket, object_name or ''), uuid.uuid4().hex, 'fakes3')
+
+    def objects(self, bucket):
+        """
+            returns: the dictionary of the objects of the bucket
+        """
+        try:
+            return self.buckets[bucket]
+        except KeyError:
+            raise self.error('NoSuchBucket', bucket)
+
+    def put(self, bucket, object_name, headers, etag, size, data=None, condition=None):
+        """
+            Store an object, its headers are the metadata returned by stat_object
+
+            input: condition: optional, a dictionary of the If-Match or If-None-Match headers of the request
+        """
+        now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        stored = HTTPHeaderDict()
+        for key, value in (headers or {}).items():
+            if key.lower().startswith('x-amz-meta-') or key.lower() == 'content-type':
+                stored[key] = ','.join(value) if isinstance(value, (list, tuple)) else str(value)
+        stored['Content-Length'] = str(size)
+        stored['ETag'] = '"{}"'.format(etag)
+        stored['Last-Modified'] = now.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        tags = dict(parse_qsl((headers or {}).get('x-amz-tagging') or ''))
+
+        with self.lock:
+            objects = self.objects(bucket)
+            if condition:
+                existing = objects.get(object_name)
+                match = condition.get('If-Match')
+                if match and (existing is None or '"{}"'.format(existing['etag']) != match):
+                    raise self.error('PreconditionFailed', bucket, object_name)
+                if condition.get('If-None-Match') == '*' and existing is not None:
+                    raise self.error('PreconditionFailed', bucket, object_name)
+            objects[object_name] = dict(headers=stored, etag=etag, size=size, last_modified=now, data=data, tags=tags)
+
+        return ObjectWriteResult(bucket, object_name, None, etag, stored, last_modified=now)
+
+    def get(self, bucket, object_name):
+        with self.lock:
+            entry = self.objects(bucket).get(object_name)
+        if entry is None:
+            raise self.error('NoSuchKey', bucket, object_name)
+        return entry
+
+    def set_tags(self, bucket, object_name, tags):
+        """
+            Replace the tags of an object, its etag and last modified time are not changed
+        """
+        with self.lock:
+            entry = self.objects(bucket).get(object_name)
+            if entry is None:
+                raise self.error('NoSuchKey', bucket, object_name)
+            entry['tags'] = dict(tags)
+
+
+class FakeMinio(object):
+    """
+        The Minio calls used by PresentationIndex, Manifest and Transfer, with the same arguments and results
+    """
+
+    def __init__(self, endpoint=None, access_key=None, secret_key=None, secure=True, http_client=None, server=None,
+                 **kwargs):
+        self.endpoint = endpoint or 'fakes3'
+        self.server = server or FakeS3()
+
+    def list_buckets(self):
+        self.server.request('list_buckets')
+        return [Bucket(name, self.server.created) for name in sorted(self.server.buckets)]
+
+    def bucket_exists(self, bucket_name):
+        self.server.request('bucket_exists')
+        return bucket_name in self.server.buckets
+
+    def fput_object(self, bucket_name, object_name, file_path, content_type='application/octet-stream', metadata=None,
+                    sse=None, progress=None, part_size=0, num_parallel_uploads=3, tags=None, retention=None,
+                    legal_hold=False):
+        md5 = hashlib.md5()
+        size = 0
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                md5.update(block)
+                size += len(block)
+        self.server.request('fput_object')
+        headers = genheaders(metadata, sse, tags, retention, legal_hold)
+        headers['Content-Type'] = content_type
+        return self.server.put(bucket_name, object_name, headers, md5.hexdigest(), size)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type='application/octet-stream',
+                   metadata=None, sse=None, progress=None, part_size=0, num_parallel_uploads=3, tags=None,
+                   retention=None, legal_hold=False):
+        body = data.read(length) if length >= 0 else data.read()
+        self.server.request('put_object')
+        headers = genheaders(metadata, sse, tags, retention, legal_hold)
+        headers['Content-Type'] = content_type
+        return self.server.put(bucket_name, object_name, headers, hashlib.md5(body).hexdigest(), len(body), data=body)
+
+    def _put_object(self, bucket_name, object_name, data, headers=None, query_params=None):
+        self.server.request('_put_object')
+        headers = dict(headers or {})
+        condition = {key: headers.pop(key) for key in ('If-Match', 'If-None-Match') if key in headers}
+        return self.server.put(bucket_name, object_name, headers, hashlib.md5(data).hexdigest(), len(data), data=data,
+                               condition=condition)
+
+    def stat_object(self, bucket_name, object_name, ssec=None, version_id=None, extra_headers=None,
+                    extra_query_params=None):
+        self.server.request('stat_object')
+        entry = self.server.get(bucket_name, object_name)
+        headers = HTTPHeaderDict(entry['headers'])
+        headers['x-amz-tagging-count'] = str(len(entry['tags']))
+        return Object(bucket_name, object_name, last_modified=entry['last_modified'], etag=entry['etag'],
+                      size=entry['size'], content_type=entry['headers'].get('content-type'), metadata=headers)
+
+    def get_object_tags(self, bucket_name, object_name, version_id=None):
+        self.server.request('get_object_tags')
+        entry = self.server.get(bucket_name, object_name)
+        if not entry['tags']:
+            return None
+        tags = Tags(for_object=True)
+        tags.update(entry['tags'])
+        return tags
+
+    def set_object_tags(self, bucket_name, object_name, tags, version_id=None):
+        self.server.request('set_object_tags')
+        self.server.set_tags(bucket_name, object_name, tags)
+
+    def delete_object_tags(self, bucket_name, object_name, version_id=None):
+        self.server.request('delete_object_tags')
+        self.server.set_tags(bucket_name, object_name, {})
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, request_headers=None, ssec=None,
+                   version_id=None, extra_query_params=None):
+        self.server.request('get_object')
+        entry = self.server.get(bucket_name, object_name)
+        data = entry['data'] or b''
+        data = data[offset:offset + length] if length else data[offset:]
+        return SimpleNamespace(data=data, headers=HTTPHeaderDict(entry['headers']), read=lambda: data,
+                               close=lambda: None, release_conn=lambda: None)
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, start_after=None, **kwargs):
+        """
+            Generator, the objects are listed in order of their names (as a snapshot of the bucket)
+        """
+        self.server.request('list_objects')
+        prefix = prefix or ''
+        with self.server.lock:
+            names = sorted(name for name in self.server.objects(bucket_name) if name.startswith(prefix))
+            entries = [self.server.buckets[bucket_name][name] for name in names]
+
+        directories = set()
+        for name, entry in zip(names, entries):
+            if start_after and name <= start_after:
+                continue
+            if not recursive and '/' in name[len(prefix):]:
+                directory = prefix + name[len(prefix):].split('/')[0] + '/'
+                if directory not in directories:
+                    directories.add(directory)
+                    yield Object(bucket_name, directory)
+                continue
+            yield Object(bucket_name, name, last_modified=entry['last_modified'], etag=entry['etag'],
+                         size=entry['size'])
+
+    def presigned_get_object(self, bucket_name, object_name, expires=datetime.timedelta(days=7), **kwargs):
+        return 'https://{}/{}/{}?X-Amz-Expires={}&X-Amz-Signature={}'.format(
+            self.endpoint, bucket_name, quote(object_name), int(expires.total_seconds()), uuid.uuid4().hex)
+
+    def _create_multipart_upload(self, bucket_name, object_name, headers):
+        self.server.request('_create_multipart_upload')
+        self.server.objects(bucket_name)
+        upload_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.uploads[upload_id] = dict(bucket=bucket_name, object_name=object_name, headers=dict(headers),
+                                                  parts=dict())
+        return upload_id
+
+    def _upload_part(self, bucket_name, object_name, data, headers, upload_id, part_number):
+        self.server.request('_upload_part')
+        etag = hashlib.md5(data).hexdigest()
+        with self.server.lock:
+            upload = self.server.uploads.get(upload_id)
+            if upload is None:
+                raise self.server.error('NoSuchUpload', bucket_name, object_name)
+            upload['parts'][part_number] = (etag, len(data), hashlib.md5(data).digest())
+        return etag
+
+    def _list_parts(self, bucket_name, object_name, upload_id, max_parts=None, part_number_marker=None, **kwargs):
+        self.server.request('_list_parts')
+        with self.server.lock:
+            upload = self.server.uploads.get(upload_id)
+            if upload is None:
+                raise self.server.error('NoSuchUpload', bucket_name, object_name)
+            parts = [Part(number, etag, size=size) for number, (etag, size, _) in sorted(upload['parts'].items())]
+        return SimpleNamespace(parts=parts, is_truncated=False, next_part_number_marker=None)
+
+    def _complete_multipart_upload(self, bucket_name, object_name, upload_id, parts, ssec=None):
+        self.server.request('_complete_multipart_upload')
+        with self.server.lock:
+            upload = self.server.uploads.pop(upload_id, None)
+        if upload is None:
+            raise self.server.error('NoSuchUpload', bucket_name, object_name)
+        digests = b''.join(upload['parts'][part.part_number][2] for part in parts)
+        etag = '{}-{}'.format(hashlib.md5(digests).hexdigest(), len(parts))
+        size = sum(upload['parts'][part.part_number][1] for part in parts)
+        return self.server.put(bucket_name, object_name, upload['headers'], etag, size)
+
+
+def install(server):
+    """
+        Replace the Minio client of PresentationIndex, every instance created connects to the server
+    """
+    import pptxindex
+
+    pptxindex.Minio = lambda *args, **kwargs: FakeMinio(*args, server=server, **kwargs)
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: local, persistent index (SQLite) of the metadata of objects in the bucket
+#
+#     usage:
+#       >>> from catalog import catalog
+#       >>> cat = catalog.Catalog('data/catalog.db')
+#       >>> cat.refresh(pi)                      # pi is an instance of PresentationIndex
+#       >>> cat.sync(pi)                         # only stat new or changed objects
+#       >>> for object_name, last_modified, keywords in cat.documents():
+#       ...     print(object_name)
+#       >>> for object_name, last_modified, keywords in cat.candidates('infrastructure agility', 0.3):
+#       ...     print(object_name)
+#       >>> tags = catalog.Catalog.parse_tags(['audience=external', 'type=demo'])
+#       >>> for object_name, last_modified, keywords in cat.candidates('infrastructure agility', 0.3, tags=tags):
+#       ...     print(object_name)                # only the objects tagged audience=external and type=demo
+#
+import datetime
+import json
+import math
+import re
+import sqlite3
+import threading
+
+
+class Catalog(object):
+    """
+        The metadata of each object is only available by issuing a `stat_object` for every object
+        in the bucket. Rather than doing this for every query, the keywords returned by
+        PresentationIndex.get_metadata() are stored in a local SQLite database, which is
+        updated when a file is uploaded and can be rebuilt from the bucket on demand.
+
+        Objects removed from the bucket are not deleted from the catalog, they are marked
+        as deleted (a tombstone) and are no longer returned by documents().
+
+        The trigrams (three character sequences) of the words of the metadata of each object are
+        indexed, so candidates(), objects sharing trigrams with the search string, can be selected
+        without reading every object. The tags of each object are indexed, so the objects with the
+        tags specified are selected before they are scored.
+    """
+    DEFAULT_PATH = 'data/catalog.db'
+    VERSION = 4                                            # PRAGMA user_version, refer to migrate()
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            object_name TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            size INTEGER,
+            content_type TEXT,
+            keywords TEXT,
+            metadata TEXT,
+            deleted TEXT,
+            tags TEXT
+        );
+        CREATE TABLE IF NOT EXISTS trigrams (
+            gram TEXT,
+            doc INTEGER,
+            PRIMARY KEY (gram, doc)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS slides (
+            doc INTEGER,
+            slide INTEGER,
+            keywords TEXT,
+            PRIMARY KEY (doc, slide)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS tags (
+            key TEXT,
+            value TEXT,
+            doc INTEGER,
+            PRIMARY KEY (key, value, doc)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS generation (
+            value INTEGER
+        );
+        CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents
+            BEGIN UPDATE generation SET value = value + 1; END;
+        CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents
+            BEGIN UPDATE generation SET value = value + 1; END;
+        CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents
+            BEGIN UPDATE generation SET value = value + 1; END;
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+            input: path: filename of the SQLite database, created if it does not exist
+
+            The connection may be shared by threads, writes are serialized by a lock
+        """
+        self.path = path
+        self.error_message = None
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = WAL')   # readers are not blocked by a writer
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.add_columns()
+        self.connection.executescript(Catalog.SCHEMA)
+        self.migrate()
+
+    def add_columns(self):
+        """
+            Add the columns of SCHEMA to the documents table of a catalog created by a previous version
+        """
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(documents)')]
+        if not columns:                                    # a new catalog, created by SCHEMA
+            return
+        with self.connection:
+            for column in ('deleted', 'tags'):
+                if column not in columns:
+                    self.connection.execute('ALTER TABLE documents ADD COLUMN {} TEXT'.format(column))
+
+    def migrate(self):
+        """
+            Update a catalog created by a previous version, the bucket is not accessed
+        """
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version >= Catalog.VERSION:
+            return
+
+        with self.lock, self.connection:
+            if version < 1:                                # tombstones (refer to add_columns()) and trigrams
+                for doc, keywords in self.connection.execute('SELECT rowid, keywords FROM documents WHERE deleted IS NULL').fetchall():
+                    self.add_trigrams(doc, json.loads(keywords))
+            # version 2, the slides table is created by SCHEMA, populated as files are uploaded
+            if version < 3:                                # the generation is counted by the triggers of SCHEMA
+                self.connection.execute('INSERT INTO generation SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM generation)')
+            # version 4, the tags of objects already in the catalog are not known (NULL) until they are read
+            # from the bucket by the next sync(), refer to fill_tags()
+            self.connection.execute('PRAGMA user_version = {}'.format(Catalog.VERSION))
+
+    def close(self):
+        """
+            Close the connection to the database
+        """
+        self.connection.close()
+
+    @staticmethod
+    def timestamp(value):
+        """
+            Listing the bucket returns last modified with milliseconds, `stat_object` does not.
+            Truncate to seconds so the two can be compared.
+        """
+        if not value:
+            return None
+        return value.replace(microsecond=0).isoformat()
+
+    @staticmethod
+    def trigrams(text):
+        """
+            returns: the set of trigrams of the words of the text, lower case, punctuation is ignored.
+                     Each word is padded, two spaces before and one after, so short words are included.
+        """
+        grams = set()
+        for word in re.findall(r'\w+', text.lower()):
+            padded = '  {} '.format(word)
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    @staticmethod
+    def keyword_trigrams(keywords):
+        """
+            returns: the set of trigrams of a list of keywords
+        """
+        grams = set()
+        for text in keywords:
+            if text:
+                grams.update(Catalog.trigrams(text))
+        return grams
+
+    def add_trigrams(self, doc, keywords):
+        """
+            Index the trigrams of the keywords of a document, the caller holds the lock and commits
+        """
+        self.connection.executemany('INSERT OR IGNORE INTO trigrams VALUES (?, ?)',
+                                    ((gram, doc) for gram in Catalog.keyword_trigrams(keywords)))
+
+    def remove_trigrams(self, doc, keywords):
+        """
+            Remove the trigrams of the (previous) keywords of a document, the caller holds the lock and commits
+        """
+        self.connection.executemany('DELETE FROM trigrams WHERE gram = ? AND doc = ?',
+                                    ((gram, doc) for gram in Catalog.keyword_trigrams(keywords)))
+
+    @staticmethod
+    def parse_tags(items):
+        """
+            input: items: a list of strings 'key=value'
+            returns: a dictionary of key: set of values, an object matches if, for each key, it is tagged
+                     with one of the values, for example ['audience=external', 'type=demo', 'type=lab']
+            raises: ValueError if an item is not 'key=value'
+        """
+        tags = dict()
+        for item in items or []:
+            (key, equals, value) = item.partition('=')
+            if not equals or not key.strip():
+                raise ValueError('tag {} is not key=value'.format(item))
+            tags.setdefault(key.strip(), set()).add(value.strip())
+        return tags
+
+    @staticmethod
+    def match_tags(tags, selection):
+        """
+            returns: True if the tags (a dictionary) of an object match the selection, refer to parse_tags()
+        """
+        return all((tags or {}).get(key) in values for key, values in (selection or {}).items())
+
+    @staticmethod
+    def tag_clause(selection):
+        """
+            returns: a tuple of the SQL condition on the documents (d) selecting the objects matching
+                     the selection and its parameters, refer to parse_tags()
+        """
+        (conditions, parameters) = ([], [])
+        for key, values in sorted((selection or {}).items()):
+            values = sorted(values)
+            conditions.append('d.rowid IN (SELECT doc FROM tags WHERE key = ? AND value IN ({}))'.format(
+                              ', '.join('?' * len(values))))
+            parameters.extend([key] + values)
+        return (' AND '.join(conditions) or '1', parameters)
+
+    def index_tags(self, doc, tags):
+        """
+            Replace the indexed tags of a document, the caller holds the lock and commits
+        """
+        self.connection.execute('DELETE FROM tags WHERE doc = ?', (doc,))
+        self.connection.executemany('INSERT OR IGNORE INTO tags VALUES (?, ?, ?)',
+                                    ((key, value, doc) for key, value in (tags or {}).items()))
+
+    def put(self, keywords, stat, slides=None, tags=None):
+        """
+            Insert or replace the entry for an object
+
+            input: keywords: list of strings, as returned by PresentationIndex.get_metadata()
+                   stat: the stat object returned by PresentationIndex.get_metadata()
+                   slides: optional, a list of the keywords (a list of strings) of each slide. The keywords
+                           of the slides are only known when the file is uploaded, if None, the keywords
+                           of the slides are kept if the object is unchanged (the same etag), otherwise removed.
+                   tags: optional, a dictionary of the tags of the object, if None, the tags of a previous
+                         version of the object are kept
+        """
+        metadata = {key.lower(): value for key, value in stat.metadata.items() if key.lower().startswith('x-amz-meta-')}
+
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT rowid, keywords, etag FROM documents WHERE object_name = ?',
+                                          (stat.object_name,)).fetchone()
+            if row:
+                self.remove_trigrams(row[0], json.loads(row[1]))
+            #
+            #  Update rather than replace an existing entry, the rowid identifies the document in trigrams
+            #
+            cursor = self.connection.execute(
+                'INSERT INTO documents (object_name, etag, last_modified, size, content_type, keywords, metadata, '
+                'deleted, tags) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?) ON CONFLICT (object_name) DO UPDATE SET '
+                'etag = excluded.etag, last_modified = excluded.last_modified, size = excluded.size, '
+                'content_type = excluded.content_type, keywords = excluded.keywords, metadata = excluded.metadata, '
+                'deleted = NULL, tags = COALESCE(excluded.tags, documents.tags)',
+                (stat.object_name, stat.etag, Catalog.timestamp(stat.last_modified), stat.size, stat.content_type,
+                 json.dumps(keywords), json.dumps(metadata), None if tags is None else json.dumps(dict(tags))))
+            doc = row[0] if row else cursor.lastrowid
+            self.add_trigrams(doc, keywords)
+            if tags is not None:
+                self.index_tags(doc, tags)
+
+            if slides is not None or not row or row[2] != stat.etag:
+                self.connection.execute('DELETE FROM slides WHERE doc = ?', (doc,))
+                self.connection.executemany('INSERT INTO slides VALUES (?, ?, ?)',
+                                            ((doc, number, json.dumps(words)) for number, words in enumerate(slides or [], 1)))
+
+    def delete(self, object_name):
+        """
+            Mark the entry for an object as deleted (tombstone)
+        """
+        deleted = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat()
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT rowid, keywords FROM documents WHERE object_name = ? AND deleted IS NULL',
+                                          (object_name,)).fetchone()
+            if row:
+                self.remove_trigrams(row[0], json.loads(row[1]))
+                self.connection.execute('DELETE FROM slides WHERE doc = ?', (row[0],))
+                self.connection.execute('DELETE FROM tags WHERE doc = ?', (row[0],))
+            self.connection.execute('UPDATE documents SET deleted = ? WHERE object_name = ?', (deleted, object_name))
+
+    def clear(self):
+        """
+            Remove all entries
+        """
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM documents')
+            self.connection.execute('DELETE FROM trigrams')
+            self.connection.execute('DELETE FROM slides')
+            self.connection.execute('DELETE FROM tags')
+
+    def set_tags(self, object_name, tags):
+        """
+            Replace the tags of an object, for example after the tags of the object were changed in the bucket
+
+            input: tags: a dictionary of the tags of the object
+            returns: True if the object is in the catalog
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT rowid FROM documents WHERE object_name = ? AND deleted IS NULL',
+                                          (object_name,)).fetchone()
+            if row:
+                self.connection.execute('UPDATE documents SET tags = ? WHERE rowid = ?', (json.dumps(dict(tags)), row[0]))
+                self.index_tags(row[0], tags)
+        return row is not None
+
+    def tags(self, object_name):
+        """
+            returns: a dictionary of the tags of an object, or None if the tags (or the object) are not known
+        """
+        row = self.connection.execute('SELECT tags FROM documents WHERE object_name = ? AND deleted IS NULL',
+                                      (object_name,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def untagged(self):
+        """
+            returns: a list of the names of the objects whose tags are not known (NULL), indexed by a previous version
+        """
+        cursor = self.connection.execute('SELECT object_name FROM documents WHERE tags IS NULL AND deleted IS NULL')
+        return [row[0] for row in cursor]
+
+    def fill_tags(self, pi, entries=None):
+        """
+            Store the tags of the objects whose tags are not known, read from the entries of the manifest, or
+            otherwise requested from the bucket. Only the tags are changed, not the keywords of the slides.
+
+            input: pi: the class managing the connection to the object store
+                   entries: optional, an iterable of the entries of the manifest, refer to Manifest.entry()
+
+            returns: the number of objects whose tags were stored
+        """
+        names = set(self.untagged())
+        if not names:
+            return 0
+
+        known = dict()
+        for entry in entries or ():
+            if entry['object_name'] in names and entry.get('tags') is not None:
+                known[entry['object_name']] = entry['tags']
+        for (object_name, tags, error) in pi.get_tags_many(names.difference(known)):
+            if error:
+                self.error_message = error
+                continue
+            known[object_name] = tags
+
+        return sum(self.set_tags(object_name, tags) for object_name, tags in known.items())
+
+    def count(self):
+        """
+            returns: the number of objects in the catalog
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM documents WHERE deleted IS NULL').fetchone()[0]
+
+    def generation(self):
+        """
+            returns: a number which changes whenever an entry is added, updated or deleted, by any
+                     connection, for example to detect that an index built from the catalog is stale
+        """
+        return self.connection.execute('SELECT value FROM generation').fetchone()[0]
+
+    def documents(self, tags=None):
+        """
+            Generator returning a tuple of (object_name, last_modified, keywords) for each object
+
+            input: tags: optional, only the objects with these tags, refer to parse_tags()
+        """
+        (clause, parameters) = Catalog.tag_clause(tags)
+        cursor = self.connection.execute('SELECT object_name, last_modified, keywords FROM documents d '
+                                         'WHERE deleted IS NULL AND {}'.format(clause), parameters)
+        for object_name, last_modified, keywords in cursor:
+            yield (object_name, last_modified, json.loads(keywords))
+
+    def keywords(self, object_name):
+        """
+            returns: the keywords (metadata) of an object, refer to documents(), or None if the object is not known
+        """
+        row = self.connection.execute('SELECT keywords FROM documents WHERE object_name = ? AND deleted IS NULL',
+                                      (object_name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def candidates(self, search_string, threshold, tags=None):
+        """
+            Generator returning a tuple of (object_name, last_modified, keywords) for each object sharing
+            at least the threshold (a fraction) of the trigrams of the search string. A lower threshold
+            returns more objects (recall), a threshold of 0, or a search string without trigrams,
+            returns all objects.
+
+            input: search_string: what we are looking for in the meta data
+                   threshold: fraction, 0.0 to 1.0, of the trigrams of the search string
+                   tags: optional, only the objects with these tags, refer to parse_tags()
+        """
+        grams = Catalog.trigrams(search_string)
+        if not grams or threshold <= 0:
+            yield from self.documents(tags=tags)
+            return
+
+        minimum = max(1, math.ceil(min(threshold, 1.0) * len(grams)))
+        (clause, parameters) = Catalog.tag_clause(tags)
+        cursor = self.connection.execute(
+            'SELECT d.object_name, d.last_modified, d.keywords FROM documents d JOIN '
+            '(SELECT doc FROM trigrams WHERE gram IN ({}) GROUP BY doc HAVING COUNT(*) >= ?) c '
+            'ON d.rowid = c.doc WHERE d.deleted IS NULL AND {}'.format(', '.join('?' * len(grams)), clause),
+            (*grams, minimum, *parameters))
+        for object_name, last_modified, keywords in cursor:
+            yield (object_name, last_modified, json.loads(keywords))
+
+    def slides(self, object_name):
+        """
+            returns: a list of tuples (slide number, keywords) of the slides of an object, the slide
+                     number starts at 1. The list is empty if the keywords of the slides are not known.
+        """
+        cursor = self.connection.execute('SELECT s.slide, s.keywords FROM slides s JOIN documents d ON d.rowid = s.doc '
+                                         'WHERE d.object_name = ? AND d.deleted IS NULL ORDER BY s.slide', (object_name,))
+        return [(slide, json.loads(keywords)) for slide, keywords in cursor]
+
+    def entries(self):
+        """
+            Generator returning a dictionary of the fields of each object, refer to Manifest.entry()
+        """
+        cursor = self.connection.execute('SELECT object_name, etag, last_modified, size, content_type, keywords, metadata, '
+                                         'tags FROM documents WHERE deleted IS NULL')
+        for object_name, etag, last_modified, size, content_type, keywords, metadata, tags in cursor:
+            yield dict(object_name=object_name, etag=etag, last_modified=last_modified, size=size,
+                       content_type=content_type, keywords=json.loads(keywords), metadata=json.loads(metadata),
+                       tags=json.loads(tags) if tags else dict())
+
+    def manifest(self):
+        """
+            returns: a dictionary of object_name: (etag, last_modified, deleted) for every entry in the catalog
+        """
+        cursor = self.connection.execute('SELECT object_name, etag, last_modified, deleted FROM documents')
+        return {object_name: (etag, last_modified, deleted) for object_name, etag, last_modified, deleted in cursor}
+
+    def refresh(self, pi):
+        """
+            Rebuild the catalog by issuing a `stat_object` for every object in the bucket. The entries are
+            replaced rather than removed, the keywords of the slides of unchanged objects are kept, they
+            are only known when the file is uploaded.
+
+            input: pi: the class managing the connection to the object store
+
+            returns: a dictionary of counts, refer to sync()
+        """
+        return self.sync(pi, full=True)
+
+    def sync(self, pi, full=False):
+        """
+            Incremental update of the catalog. The bucket is listed and the etag and last modified
+            time of each object compared with the catalog. Only new or changed objects require a
+            `stat_object` (and a request for their tags), objects no longer in the bucket are marked as deleted.
+            Changing the tags of an object does not change its etag or last modified time, refer to retag.py.
+            If pi has a manifest, the objects added, changed and deleted are recorded in the manifest, the
+            caller writes the manifest with flush().
+
+            input: pi: the class managing the connection to the object store
+                   full: read every object, whether or not it has changed, refer to refresh()
+
+            returns: a dictionary with the count of objects added, changed, deleted, unchanged, the objects
+                     whose tags were not known and have been read (tagged), refer to fill_tags(), and the
+                     objects which could not be read (errors)
+        """
+        counts = dict(added=0, changed=0, deleted=0, unchanged=0, tagged=0, errors=0)
+        manifest = self.manifest()
+        present = set()                                    # objects in both the catalog and the bucket
+
+        def changed_objects():
+            for obj in pi.list_objects():
+                entry = manifest.pop(obj.object_name, None)
+                if not full and entry and entry[0] == obj.etag and entry[1] == Catalog.timestamp(obj.last_modified) and not entry[2]:
+                    counts['unchanged'] += 1
+                    continue
+                if entry:
+                    present.add(obj.object_name)
+                yield obj.object_name
+
+        # the objects are read concurrently, as the bucket is listed
+        for (object_name, keywords, stat, tags, error) in pi.get_metadata_many(changed_objects(), tags=True):
+            if error:
+                pi.error_message = error
+                counts['errors'] += 1
+                continue
+            self.put(keywords, stat, tags=tags)
+            if pi.manifest:
+                pi.manifest.add(keywords, stat, tags)
+            counts['changed' if object_name in present else 'added'] += 1
+
+        for object_name, (etag, last_modified, deleted) in manifest.items():
+            if not deleted:
+                self.delete(object_name)
+                if pi.manifest:
+                    pi.manifest.remove(object_name)
+                counts['deleted'] += 1
+
+        counts['tagged'] = self.fill_tags(pi)
+        return counts
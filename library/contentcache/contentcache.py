@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: content addressed cache (SQLite) of the text and keywords extracted from files
+#
+#     usage:
+#       >>> from contentcache import contentcache
+#       >>> cache = contentcache.ContentCache('data/extract.db')
+#       >>> key = cache.key(sha256, engine='pptx', depth=20)
+#       >>> entry = cache.get(key)               # None if not cached
+#       >>> cache.put(key, dict(text_runs=[...], phrases=[...], core_properties={...}))
+#
+import json
+import sqlite3
+import time
+
+
+class ContentCache(object):
+    """
+        Extracting text and running RAKE is the most expensive part of analyzing a file. The results
+        are cached by the hash of the content of the file, so an unchanged file (even if it is renamed
+        or moved) is only analyzed once. The RAKE depth and the extraction engine are part of the key,
+        the cut line is applied to the cached phrases and their scores, so it is not.
+
+        The cache may be shared by several processes, SQLite serializes the writes.
+    """
+    DEFAULT_PATH = 'data/extract.db'
+    TIMEOUT = 30                                           # seconds to wait for the database lock
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            created REAL
+        );
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+            input: path: filename of the SQLite database, created if it does not exist
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, timeout=ContentCache.TIMEOUT)
+        self.connection.executescript(ContentCache.SCHEMA)
+
+    def close(self):
+        """
+            Close the connection to the database
+        """
+        self.connection.close()
+
+    @staticmethod
+    def key(sha256, engine='pptx', depth=None):
+        """
+            returns: the cache key for the content hash and the parameters used to analyze the file
+        """
+        return '{}:{}:{}'.format(sha256, engine, depth)
+
+    def get(self, key):
+        """
+            returns: the cached dictionary, or None
+        """
+        row = self.connection.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """
+            input: key: refer to key()
+                   value: a dictionary which can be serialized as JSON
+        """
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', (key, json.dumps(value), time.time()))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: discover the files to upload, walking directories as the files are uploaded
+#
+#     usage:
+#       >>> from crawler import crawler
+#       >>> c = crawler.Crawler(extensions=['.pptx', '.pdf'], exclude=['archive/*', '*~*'])
+#       >>> for filepath in c.files('/opt/powerpoint'):    # a directory, a file or a text file listing files
+#       ...     print(filepath)
+#       >>> c.counts
+#       Counter({'files': 120, 'directories': 14, 'skipped': 37, 'duplicates': 2})
+#
+import fnmatch
+import hashlib
+import os
+from collections import Counter
+
+EXTENSIONS = ('.pptx',)
+BLOCK_SIZE = 2**20
+
+
+class Crawler(object):
+    """
+        A generator of the files under one or more directories. Each directory is read with os.scandir
+        as it is walked, so the first files are returned (and uploaded) immediately, however many files
+        there are; only the directories not yet walked are held in memory.
+
+        Files are selected by extension and glob patterns, and returned once: a file linked more than
+        once (the same inode) or, optionally, with the same content as a file already returned is skipped.
+    """
+    DEDUPE = ('inode', 'hash', 'none')
+
+    def __init__(self, extensions=EXTENSIONS, include=None, exclude=None, recursive=True, dedupe='inode',
+                 follow_symlinks=False, log=None):
+        """
+            input: extensions: the extensions of the files returned (case insensitive)
+                   include: optional, glob patterns, only files whose path (relative to the directory walked)
+                            or name matches a pattern are returned
+                   exclude: optional, glob patterns, files and directories whose relative path or name matches
+                            a pattern are skipped
+                   recursive: walk the subdirectories
+                   dedupe: 'inode' skips a file already returned through another path (hard or symbolic link),
+                           'hash' also skips a file with the same content (SHA256) as a file already returned,
+                           'none' returns every file found
+                   follow_symlinks: walk symbolic links to directories
+                   log: optional, a logger, directories which cannot be read are logged (warning)
+        """
+        self.extensions = tuple(extension.lower() if extension.startswith('.') else '.' + extension.lower()
+                                for extension in extensions)
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.recursive = recursive
+        self.dedupe = dedupe if dedupe in Crawler.DEDUPE else Crawler.DEDUPE[0]
+        self.follow_symlinks = follow_symlinks
+        self.log = log
+        self.counts = Counter()
+        self.inodes = set()                                # (st_dev, st_ino) of the files returned
+        self.sizes = dict()                                # size: the path of the first file, or a set of digests
+
+    def files(self, source):
+        """
+            Generator returning the path of each file of the source
+
+            input: source: a directory, a file to upload, or a text file listing the files (or directories)
+                           to upload, one on each line
+        """
+        if source is None:
+            return
+        if os.path.isdir(source):
+            yield from self.walk(source)
+        elif source.lower().endswith(self.extensions):
+            yield from self.unique([source])
+        else:
+            yield from self.listed(source)
+
+    def listed(self, list_file):
+        """
+            Generator returning the files listed in a text file, which is read a line at a time
+        """
+        try:
+            with open(list_file, 'r') as f:
+                for line in f:
+                    path = line.strip()
+                    if not path:
+                        continue
+                    if os.path.isdir(path):
+                        yield from self.walk(path)
+                    else:
+                        yield from self.unique([path])
+        except OSError as err:
+            self.error('LISTED: {}'.format(err))
+
+    def walk(self, root):
+        """
+            Generator returning the files under the directory root, each directory is read as it is walked
+        """
+        root = os.path.normpath(root)
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            self.counts['directories'] += 1
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        path = entry.path
+                        relative = os.path.relpath(path, root).replace(os.sep, '/')
+                        try:
+                            if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                                if self.recursive and not self.excluded(relative, entry.name):
+                                    pending.append(path)
+                                continue
+                            if not entry.is_file():
+                                continue
+                        except OSError as err:
+                            self.error('WALK: {}'.format(err))
+                            continue
+                        if self.selected(relative, entry.name):
+                            yield from self.unique([path], entry)
+                        else:
+                            self.counts['skipped'] += 1
+            except OSError as err:                         # permission denied, removed while walking
+                self.error('WALK: {}'.format(err))
+
+    def excluded(self, relative, name):
+        return any(fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+
+    def selected(self, relative, name):
+        """
+            returns: True if the file is returned, by its extension and the include and exclude patterns.
+                     AppleDouble files ('._' prefix, the resource fork of a file copied from macOS) are skipped.
+        """
+        if name.startswith('._') or not name.lower().endswith(self.extensions):
+            return False
+        if self.include and not any(fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(name, pattern)
+                                    for pattern in self.include):
+            return False
+        return not self.excluded(relative, name)
+
+    def unique(self, paths, entry=None):
+        """
+            Generator returning the paths which are not duplicates of a file already returned
+        """
+        for path in paths:
+            if self.dedupe != 'none':
+                try:
+                    stat = entry.stat() if entry else os.stat(path)
+                except OSError as err:
+                    self.error('STAT: {}'.format(err))
+                    continue
+                if (stat.st_dev, stat.st_ino) in self.inodes or (self.dedupe == 'hash' and self.same_content(path, stat.st_size)):
+                    self.counts['duplicates'] += 1
+                    continue
+                self.inodes.add((stat.st_dev, stat.st_ino))
+            self.counts['files'] += 1
+            yield path
+
+    def same_content(self, path, size):
+        """
+            returns: True if a file already returned has the same content. Only files of the same size are
+                     compared, a file is read (SHA256) only when a second file of its size is found.
+        """
+        seen = self.sizes.get(size)
+        if seen is None:
+            self.sizes[size] = path                        # the first file of the size, not read
+            return False
+        if isinstance(seen, str):
+            seen = self.sizes[size] = {self.digest(seen)}
+        digest = self.digest(path)
+        if digest in seen:
+            return True
+        seen.add(digest)
+        return False
+
+    def digest(self, path):
+        sha256 = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                    sha256.update(block)
+        except OSError as err:
+            self.error('DIGEST: {}'.format(err))
+            return path                                    # unreadable, never equal to the digest of another file
+        return sha256.hexdigest()
+
+    def error(self, message):
+        self.counts['errors'] += 1
+        if self.log:
+            self.log.warning('CRAWLER: {}'.format(message))
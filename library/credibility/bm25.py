@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: rank documents by BM25, weighting the fields of the metadata, an alternative to Credibility
+#
+#     usage:
+#       >>> from credibility import bm25
+#       >>> index = bm25.BM25Engine.from_catalog(cat)   # built when the catalog changes, then loaded from a file
+#       >>> for hit in index.search('infrastructure agility', depth=10):
+#       ...     print(hit['object_name'], hit['credibility'])
+#
+#     Credibility scores the search string against the metadata with fuzzy matching, each word counts the
+#     same however common it is, a search for 'network automation' is dominated by 'network'. BM25 weights
+#     each term by its rarity (inverse document frequency), saturates repeated terms and normalizes by the
+#     length of the metadata. Terms are matched exactly (lower case words), not fuzzy.
+#
+#     The BM25 weight of each term of each document is computed when the index is built, a sparse matrix
+#     (documents x terms); a search is the product of the columns of the terms of the search string and
+#     their counts, only the documents containing a term are read.
+#
+#     The index of a catalog is saved beside the catalog (compressed), the strings as UTF-8 text and the
+#     offset of each string (refer to pack()) rather than fixed width arrays, and without the metadata,
+#     the metadata of the results is read from the catalog.
+#
+import json
+import os
+import re
+import urllib.parse
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+
+#
+#  The metadata of a document is a list of strings, in the order of PresentationIndex.get_metadata()
+#
+FIELDS = ('rake_keywords', 'author', 'subject', 'keywords', 'title', 'last_modified_by', 'object_name')
+WEIGHTS = dict(rake_keywords=1.0, author=1.0, subject=2.0, keywords=2.0, title=3.0, last_modified_by=0.5,
+               object_name=2.0)
+WORDS = re.compile(r'\w+')
+NAME_WORDS = re.compile(r'[^\W_]+')                         # the words of the name of an object, split at underscores
+
+
+def pack(strings):
+    """
+        returns: a tuple of an array of the UTF-8 bytes of the strings joined, and an array of the offset
+                 (in characters) of each string and the end of the last string, refer to unpack()
+    """
+    text = ''.join(strings)
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in strings], out=offsets[1:])
+    return (np.frombuffer(text.encode(), dtype=np.uint8), offsets)
+
+
+def unpack(data, offsets):
+    """
+        returns: the list of strings of pack(), the text is decoded at once
+    """
+    text = data.tobytes().decode()
+    offsets = offsets.tolist()
+    return [text[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+class BM25Engine(object):
+    """
+        BM25F: the frequency of each term in a document is the sum, over the fields, of its frequency in
+        the field multiplied by the weight of the field, the length of a document is the weighted sum of
+        the length of its fields. Results are in the format of CredibilityEngine.search(), the score is
+        the value of credibility.
+    """
+    K1 = 1.2                                               # saturation of the term frequency
+    B = 0.75                                               # normalization by the length of the document
+    SUFFIX = '.bm25.npz'                                   # the file of the index of a catalog
+
+    def __init__(self, documents=(), weights=None, k1=K1, b=B):
+        """
+            input: documents: an iterable of tuples (object_name, last_modified, metadata) where
+                              metadata is a list of strings, refer to Catalog.documents()
+                   weights: optional, a dictionary of field: weight, updating WEIGHTS, a weight of 0
+                            ignores the field
+                   k1, b: the parameters of BM25
+        """
+        if not AVAILABLE:
+            raise ImportError('BM25Engine requires numpy and scipy')
+
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        self.k1 = k1
+        self.b = b
+        self.object_names = []
+        self.last_modified = []
+        self.metadata = []                                 # a list of lists, refer to Metadata when loaded from a file
+
+        terms = dict()                                     # term: column
+        columns = []                                       # the column of each term of each field
+        (docs, weights, counts) = ([], [], [])             # of each field: the document, weight and number of terms
+        field_weights = [self.weights.get(field, 1.0) for field in FIELDS]
+        name = FIELDS.index('object_name')
+
+        for doc, (object_name, last_modified, metadata) in enumerate(documents):
+            self.object_names.append(object_name)
+            self.last_modified.append(last_modified)
+            self.metadata.append([item for item in metadata if item])  # refer to Credibility.remove_empty
+            for position, text in enumerate(metadata):
+                weight = field_weights[position] if position < len(field_weights) else 1.0
+                if not text or not weight:
+                    continue
+                field = [terms.setdefault(term, len(terms)) for term in self.tokenize(text, name=position == name)]
+                columns.extend(field)
+                docs.append(doc)
+                weights.append(weight)
+                counts.append(len(field))
+
+        self.terms = terms
+        self.matrix = self.weigh(np.repeat(np.array(docs, dtype=np.int64), counts), np.array(columns, dtype=np.int64),
+                                 np.repeat(np.array(weights, dtype=np.float64), counts), len(self.object_names))
+
+    def __len__(self):
+        return len(self.object_names)
+
+    @staticmethod
+    def tokenize(text, name=False):
+        """
+            returns: a list of the terms of the text, lower case words. The name of an object is
+                     unquoted and split at underscores, 'network_automation.pptx' is three terms.
+        """
+        if name:
+            return NAME_WORDS.findall(urllib.parse.unquote_plus(text).lower())
+        return WORDS.findall(text.lower())
+
+    def weigh(self, rows, columns, weights, count):
+        """
+            input: rows, columns, weights: the document, term and field weight of each occurrence of a term
+                   count: the number of documents
+
+            returns: a sparse matrix (CSC, the columns of a term are contiguous) of the BM25 weight of
+                     each term of each document, idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        """
+        shape = (count, len(self.terms))
+        if not len(rows):
+            return sparse.csc_matrix(shape, dtype=np.float32)
+
+        frequency = sparse.csc_matrix((weights, (rows, columns)), shape=shape)   # the occurrences are summed
+        frequency.sum_duplicates()
+        lengths = np.bincount(rows, weights=weights, minlength=count)
+        average = lengths.mean() or 1.0
+        containing = np.diff(frequency.indptr)             # documents containing each term
+        idf = np.log(1.0 + (count - containing + 0.5) / (containing + 0.5))
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / average)
+        tf = frequency.data
+        docs = frequency.indices
+        terms = np.repeat(np.arange(shape[1]), containing)
+        frequency.data = (idf[terms] * tf * (self.k1 + 1.0) / (tf + norm[docs])).astype(np.float32)
+        return frequency
+
+    def scores(self, search_string):
+        """
+            returns: a NumPy array of the score of each document
+        """
+        counts = dict()
+        for term in self.tokenize(search_string):
+            if term in self.terms:
+                counts[self.terms[term]] = counts.get(self.terms[term], 0) + 1
+        if not counts:
+            return np.zeros(len(self.object_names), dtype=np.float32)
+        return self.matrix[:, list(counts)] @ np.array(list(counts.values()), dtype=np.float32)
+
+    def positions(self, object_names):
+        """
+            returns: a NumPy array of the indexes of the documents of the objects, in the order of the documents
+        """
+        names = set(object_names)
+        return np.array([doc for doc, object_name in enumerate(self.object_names) if object_name in names],
+                        dtype=np.int64)
+
+    def search(self, search_string, depth=None, docs=None):
+        """
+            input: depth: optional, the number of results to return
+                   docs: optional, an array of the indexes of the documents to return, refer to positions()
+            returns: a list of dictionaries of the documents containing a term of the search string,
+                     in decending order by score (ties in the order of the documents), or the highest `depth`
+        """
+        scores = self.scores(search_string)
+        if docs is not None:
+            docs = docs[scores[docs] > 0]
+        else:
+            docs = np.flatnonzero(scores > 0)
+        if depth is not None and 0 <= depth < len(docs):
+            # select the documents scoring at least the depth'th highest score, without sorting them all
+            kth = np.partition(scores[docs], len(docs) - depth)[len(docs) - depth] if depth else np.inf
+            docs = docs[scores[docs] >= kth]
+        docs = docs[np.lexsort((docs, -scores[docs]))][:depth]
+
+        results = []
+        for doc in docs:
+            results.append(dict(object_name=self.object_names[doc],
+                                last_modified=self.last_modified[doc] or None,
+                                credibility=round(float(scores[doc]), 2),
+                                metadata=self.metadata[doc]))
+        return results
+
+    def parameters(self):
+        """
+            returns: a string of the parameters of the index, an index built with other parameters is not loaded
+        """
+        return json.dumps(dict(weights=self.weights, k1=self.k1, b=self.b), sort_keys=True)
+
+    def save(self, path, generation=None):
+        """
+            Write the index to a file, replacing the file, a reader never sees a partial file
+
+            input: generation: optional, of the catalog indexed, refer to Catalog.generation()
+        """
+        strings = dict()                                   # name: (data, offsets), refer to pack()
+        for name, values in (('terms', list(self.terms)), ('object_names', self.object_names),
+                             ('last_modified', [value or '' for value in self.last_modified])):
+            (strings[name], strings[name + '_offsets']) = pack(values)
+
+        temporary = '{}.{}.tmp.npz'.format(path, os.getpid())
+        np.savez_compressed(temporary, data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                            shape=np.array(self.matrix.shape), parameters=np.array(self.parameters()),
+                            generation=np.array(str(generation)), **strings)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, generation=None, weights=None, k1=K1, b=B, catalog=None):
+        """
+            input: catalog: optional, the metadata of the results is read from the catalog, otherwise the
+                            results have no metadata (an empty list)
+
+            returns: the index written by save(), or None if the file does not exist, or the index is of
+                     another generation of the catalog or was built with other parameters
+        """
+        index = cls(weights=weights, k1=k1, b=b)
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                if str(f['generation']) != str(generation) or str(f['parameters']) != index.parameters():
+                    return None
+                index.matrix = sparse.csc_matrix((f['data'], f['indices'], f['indptr']), shape=tuple(f['shape']))
+                index.terms = {term: column for column, term in enumerate(unpack(f['terms'], f['terms_offsets']))}
+                index.object_names = unpack(f['object_names'], f['object_names_offsets'])
+                index.last_modified = unpack(f['last_modified'], f['last_modified_offsets'])
+        except (OSError, KeyError, ValueError):
+            return None
+        index.metadata = Metadata(catalog, index.object_names)
+        return index
+
+    @classmethod
+    def from_catalog(cls, catalog, weights=None, k1=K1, b=B):
+        """
+            returns: the index of the catalog, loaded from the file beside the catalog, or built (and saved)
+                     if the catalog has changed since the index was built
+        """
+        path = catalog.path + cls.SUFFIX
+        generation = catalog.generation()
+        index = cls.load(path, generation=generation, weights=weights, k1=k1, b=b, catalog=catalog)
+        if index is None:
+            index = cls(catalog.documents(), weights=weights, k1=k1, b=b)
+            try:
+                index.save(path, generation=generation)
+            except OSError:                                # a read only directory, the index is built for each query
+                pass
+        return index
+
+
+class Metadata(object):
+    """
+        The metadata of the documents of an index loaded from a file, read from the catalog as each result is returned
+    """
+
+    def __init__(self, catalog, object_names):
+        self.catalog = catalog
+        self.object_names = object_names
+
+    def __len__(self):
+        return len(self.object_names)
+
+    def __getitem__(self, doc):
+        keywords = self.catalog.keywords(self.object_names[doc]) if self.catalog else None
+        return [item for item in keywords or [] if item]   # refer to Credibility.remove_empty
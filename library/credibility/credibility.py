@@ -9,6 +9,8 @@
 #
 #     description: determine credibility score if a string exists in metadata
 #
+import math
+
 from fuzzywuzzy import fuzz
 # from fuzzywuzzy import process
 
@@ -87,6 +89,36 @@ class Credibility(object):
 
         return refreshed_metadata
 
+    @staticmethod
+    def upper_bound(search_string, metadata, object_name):
+        """
+            Return the highest credibility score the metadata could receive, without calling Fuzzy Wuzzy.
+            The ratio of two strings cannot exceed 200 * (length of the shorter) / (sum of the lengths),
+            the average of the lines cannot exceed the best line, and an exact match requires a word
+            of the metadata equal to a key word (or key words so long a single difference rounds to 100%).
+        """
+        search_string = search_string.strip()
+        key_words = search_string.split()
+
+        best = 0
+        words = set()
+        for text in metadata:
+            if not text:
+                continue
+            words.update(text.split())
+            total = len(search_string) + len(text)
+            best = max(best, min(Credibility._100PCT, math.ceil(200 * min(len(search_string), len(text)) / total)))
+        if best < Credibility.BASELINE:
+            best = 0
+
+        lower_name = object_name.lower()
+        if any(key_word.lower() in lower_name for key_word in key_words):
+            best += Credibility.BASELINE
+        if any(key_word in words or len(key_word) > Credibility._100PCT for key_word in key_words):
+            best += Credibility.BASELINE / 2
+
+        return best
+
     def credible(self):
         """
             Return True or False to determine if we believe the result is credible
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: score a search string against all documents at once, the results of Credibility
+#
+#     usage:
+#       >>> from credibility.engine import CredibilityEngine
+#       >>> engine = CredibilityEngine(catalog.documents())
+#       >>> for hit in engine.search('infrastructure agility'):
+#       ...     print(hit['object_name'], hit['credibility'])
+#
+import re
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz
+    from rapidfuzz.process import cdist
+except ImportError:
+    np = None
+
+from credibility.credibility import Credibility
+
+AVAILABLE = np is not None
+
+
+class CredibilityEngine(object):
+    """
+        Credibility compares every word of the search string with every word of the metadata, one
+        object at a time. Here the metadata of all documents is split into words and lines once, when
+        the engine is created. A search scores the search string against each unique line and word
+        in a single call to rapidfuzz (C++), then sums the scores of each document with NumPy.
+
+        The scores and the test for credible results are the same as Credibility, rapidfuzz
+        fuzz.ratio is the same measure as fuzzywuzzy with python-Levenshtein.
+    """
+
+    def __init__(self, documents):
+        """
+            input: documents: an iterable of tuples (object_name, last_modified, metadata) where
+                              metadata is a list of strings, refer to Catalog.documents()
+        """
+        if not AVAILABLE:
+            raise ImportError('CredibilityEngine requires numpy and rapidfuzz')
+
+        self.object_names = []
+        self.last_modified = []
+        self.metadata = []
+
+        lines = dict()                                     # unique line: index
+        words = dict()                                     # unique word: index
+        line_ids, line_docs, word_ids, word_docs = [], [], [], []
+
+        for doc, (object_name, last_modified, metadata) in enumerate(documents):
+            metadata = [item for item in metadata if item]     # refer to Credibility.remove_empty
+            self.object_names.append(object_name)
+            self.last_modified.append(last_modified)
+            self.metadata.append(metadata)
+            for text in metadata:
+                line_ids.append(lines.setdefault(text, len(lines)))
+                line_docs.append(doc)
+                for word in text.split():
+                    word_ids.append(words.setdefault(word, len(words)))
+                    word_docs.append(doc)
+
+        self.tokenized(np.array(list(lines), dtype=object), line_ids, line_docs,
+                       np.array(list(words), dtype=object), word_ids, word_docs)
+
+    @classmethod
+    def from_arrays(cls, object_names, last_modified, metadata, lines, line_ids, line_docs, words, word_ids, word_docs):
+        """
+            returns: an engine of documents already split into lines and words, for example read from an
+                     index file (refer to mmapindex), rather than tokenizing the documents
+
+            input: object_names, last_modified, metadata: sequences of the fields of each document, the
+                        last modified time and metadata are only read for the results
+                   lines, words: arrays (dtype object) of the unique lines and words
+                   line_ids, line_docs, word_ids, word_docs: arrays of the index of the line (word) and the
+                        document of each occurrence of a line (word) of the metadata
+        """
+        if not AVAILABLE:
+            raise ImportError('CredibilityEngine requires numpy and rapidfuzz')
+
+        engine = cls.__new__(cls)
+        (engine.object_names, engine.last_modified, engine.metadata) = (object_names, last_modified, metadata)
+        engine.tokenized(lines, line_ids, line_docs, words, word_ids, word_docs)
+        return engine
+
+    def tokenized(self, lines, line_ids, line_docs, words, word_ids, word_docs):
+        """
+            Store the lines and words of the documents, refer to from_arrays()
+        """
+        self.lines = lines
+        self.words = words
+        self.lower_names = [name.lower() for name in self.object_names]
+        # the object names, one per line, to search all names for a key word at once
+        self.names = '\n'.join(self.lower_names)
+        self.name_starts = np.cumsum([0] + [len(name) + 1 for name in self.lower_names[:-1]], dtype=np.int64)
+        self.line_ids = np.asarray(line_ids, dtype=np.int64)
+        self.line_docs = np.asarray(line_docs, dtype=np.int64)
+        self.word_ids = np.asarray(word_ids, dtype=np.int64)
+        self.word_docs = np.asarray(word_docs, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.object_names)
+
+    def scores(self, search_string, docs=None):
+        """
+            Score the search string against every document, or only the documents specified
+
+            input: docs: optional, an array of the indexes of the documents to score (candidates)
+            returns: a tuple of NumPy arrays (credibility score, credible), one element for each document
+        """
+        count = len(self.object_names)
+        search_string = search_string.strip()
+        key_words = search_string.split()
+
+        if not count or not search_string:
+            return (np.zeros(count), np.zeros(count, dtype=bool))
+
+        selected = np.ones(count, dtype=bool)
+        if docs is not None:
+            selected = np.zeros(count, dtype=bool)
+            selected[docs] = True
+        #
+        #  The average of the scores of the lines of each document which are not less than the baseline
+        #
+        (lines, line_ids, line_docs) = self.subset(self.lines, self.line_ids, self.line_docs, selected, docs)
+        line_scores = np.round(cdist([search_string], lines, scorer=fuzz.ratio, dtype=np.float64,
+                                     workers=-1)[0]) if len(lines) else np.zeros(0)
+        scores = line_scores[line_ids]
+        keep = scores >= Credibility.BASELINE
+        total = np.bincount(line_docs, weights=np.where(keep, scores, 0.0), minlength=count)
+        calls = np.bincount(line_docs, weights=keep, minlength=count)
+        average = np.divide(total, calls, out=np.zeros(count), where=calls > 0)
+        #
+        #  The number of word by word exact matches of each document
+        #
+        (words, word_ids, word_docs) = self.subset(self.words, self.word_ids, self.word_docs, selected, docs)
+        word_scores = np.round(cdist(key_words, words, scorer=fuzz.ratio, dtype=np.float64,
+                                     workers=-1)) if len(words) else np.zeros((len(key_words), 0))
+        hits = (word_scores == Credibility._100PCT).sum(axis=0)
+        exact_match = np.bincount(word_docs, weights=hits[word_ids], minlength=count)
+        #
+        #  Search string found in the remote name
+        #
+        in_object_name = np.zeros(count, dtype=bool)
+        for key in set(key_word.lower().strip() for key_word in key_words):
+            positions = [match.start() for match in re.finditer(re.escape(key), self.names)]
+            in_object_name[np.searchsorted(self.name_starts, positions, side='right') - 1] = True
+
+        credibility = average + in_object_name * Credibility.BASELINE + (exact_match > 0) * (Credibility.BASELINE / 2)
+        credible = selected & (in_object_name | (exact_match > 0) | (average > 0.0))
+
+        return (credibility, credible)
+
+    @staticmethod
+    def subset(strings, ids, owners, selected, docs):
+        """
+            returns: a tuple (unique strings, index of the string of each occurrence, document of each
+                     occurrence) of the occurrences (of lines or words) in the selected documents
+        """
+        if docs is None:
+            return (strings, ids, owners)
+        mask = selected[owners]
+        ids = ids[mask]
+        unique = np.flatnonzero(np.bincount(ids, minlength=len(strings)))
+        position = np.zeros(len(strings), dtype=np.int64)
+        position[unique] = np.arange(len(unique))
+        return (strings[unique], position[ids], owners[mask])
+
+    def search(self, search_string, depth=None, docs=None):
+        """
+            input: depth: optional, the number of results to return
+                   docs: optional, an array of the indexes of the documents to score, refer to scores()
+            returns: a list of dictionaries of the credible documents, in the order of the documents,
+                     or the highest `depth` in decending order by the credibility score (ties in the
+                     order of the documents)
+        """
+        (credibility, credible) = self.scores(search_string, docs=docs)
+
+        docs = np.flatnonzero(credible)
+        if depth is not None and 0 < depth < len(docs):
+            # select the documents scoring at least the depth'th highest score, without sorting them all,
+            # allowing for the rounding of NumPy differing from round()
+            approximate = np.round(credibility[docs], 1)
+            kth = np.partition(approximate, len(docs) - depth)[len(docs) - depth]
+            docs = docs[approximate >= kth - 0.1]
+
+        scores = np.array([round(float(credibility[doc]), 1) for doc in docs])
+        if depth is not None:
+            order = np.argsort(-scores, kind='stable')[:max(depth, 0)]
+            (docs, scores) = (docs[order], scores[order])
+
+        results = []
+        for (doc, score) in zip(docs, scores):
+            results.append(dict(object_name=self.object_names[doc],
+                                last_modified=self.last_modified[doc],
+                                credibility=float(score),
+                                metadata=self.metadata[doc]))
+        return results
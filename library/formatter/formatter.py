@@ -9,12 +9,12 @@
 #
 #     description: generates text output from dictionary
 #
-import yaml
 
 def format_output(query_results):
     """
         Generate a tabular output of the information returned from a query
     """
+    import yaml                                            # imported when the results are written, refer to query.py
 
     print('RESULTS:\n{}'.format(yaml.dump(query_results, default_flow_style=False)))
     return
\ No newline at end of file
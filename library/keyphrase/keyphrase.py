@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: reusable RAKE keyword phrase extraction, the same results as rake_nltk
+#
+#     usage:
+#       >>> from keyphrase import keyphrase
+#       >>> extractor = keyphrase.extractor()              # shared, thread safe
+#       >>> extractor.extract(['Network automation with Ansible', 'Ansible playbooks'], depth=10)
+#       [(4.0, 'network automation'), (2.5, 'ansible playbooks'), (1.5, 'ansible')]
+#       >>> extractor.extract_many([slide_1_runs, slide_2_runs], depth=5, workers=4)
+#       >>> phrases = extractor.phrases_of()               # a long document, a part (page) at a time
+#       >>> for page in pages:
+#       ...     phrases.add(page.splitlines())
+#       >>> phrases.ranked(depth=10)
+#
+#     rake_nltk.Rake() loads the NLTK stopwords each time it is created, and sorts every candidate
+#     phrase although only the highest `depth` are used. Here the stopwords are loaded once, the
+#     tokenizer regex is compiled once, and only the highest `depth` phrases are selected (heapq).
+#
+import functools
+import heapq
+import re
+import string
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+WORD_PUNCT = re.compile(r'\w+|[^\w\s]+', re.UNICODE | re.MULTILINE | re.DOTALL)  # nltk.tokenize.wordpunct_tokenize
+
+
+class KeyphraseExtractor(object):
+    """
+        Rapid Automatic Keyword Extraction (RAKE), ranking phrases by the sum of the degree to frequency
+        ratio of their words, as rake_nltk with its default options. The extractor holds no state between
+        calls, a single instance may be used by many threads.
+    """
+
+    def __init__(self, stopwords=None, punctuations=None, language='english'):
+        """
+            input: stopwords: optional, a set of words which separate phrases, default the NLTK stopwords of the language
+                   punctuations: optional, a set of punctuation which separates phrases, default string.punctuation
+        """
+        if not stopwords:
+            from nltk.corpus import stopwords as corpus        # nltk takes longer to import than a query takes to run
+            stopwords = set(corpus.words(language))
+        punctuations = punctuations or set(string.punctuation)
+        self.to_ignore = frozenset(stopwords) | frozenset(punctuations)
+
+    def phrases(self, sentences):
+        """
+            returns: a list of the candidate phrases (tuples of lower case words) of the sentences
+        """
+        phrase_list = []
+        to_ignore = self.to_ignore
+        for sentence in sentences:
+            words = [word.lower() for word in WORD_PUNCT.findall(sentence)]
+            for keep, group in groupby(words, lambda word: word not in to_ignore):
+                if keep:
+                    phrase_list.append(tuple(group))
+        return phrase_list
+
+    def extract(self, input_text, depth=10):
+        """
+            input: input_text: a list of sentences (strings), or a string which is split into sentences
+                   depth: maximum number of ranked keyword phrases to return
+
+            returns: a list of tuples (score, phrase), highest score first, refer to PresentationIndex.rake_it()
+        """
+        if isinstance(input_text, str):
+            from nltk.tokenize import sent_tokenize
+            input_text = sent_tokenize(input_text)
+
+        phrases = Phrases(self)
+        phrases.add(input_text)
+        return phrases.ranked(depth)
+
+    def phrases_of(self):
+        """
+            returns: an empty Phrases, the sentences of a document are added a part at a time
+        """
+        return Phrases(self)
+
+    def extract_many(self, texts, depth=10, workers=None):
+        """
+            Extract the keyword phrases of many documents
+
+            input: texts: a list of documents, each a list of sentences or a string
+                   depth: maximum number of ranked keyword phrases of each document
+                   workers: optional, the number of processes, by default the documents are processed in this process
+
+            returns: a list of the results of extract(), one for each document, in the order of texts
+        """
+        if not workers or workers < 2 or len(texts) < 2:
+            return [self.extract(text, depth) for text in texts]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(texts) // (workers * 4))
+            return list(executor.map(extract, texts, [depth] * len(texts), chunksize=chunksize))
+
+
+class Phrases(object):
+    """
+        The candidate phrases of a document, with the frequency and degree of their words. The sentences
+        are added a part (a page, a slide) at a time, the text is not kept, only each distinct phrase and
+        the number of times it occurs. Ranking is the same as extracting the phrases of all the sentences.
+    """
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.counts = Counter()                            # phrase (tuple of words): occurrences
+        self.frequency = Counter()
+        self.degree = Counter()
+
+    def add(self, sentences):
+        """
+            input: sentences: a list (or iterable) of strings
+        """
+        for phrase in self.extractor.phrases(sentences):
+            self.counts[phrase] += 1
+            length = len(phrase)
+            for word in phrase:
+                self.frequency[word] += 1
+                self.degree[word] += length                # co-occurrences of the word, including itself
+
+    def update(self, other):
+        """
+            Add the phrases of another instance, for example of one page to those of the document
+        """
+        self.counts.update(other.counts)
+        self.frequency.update(other.frequency)
+        self.degree.update(other.degree)
+
+    def ranked(self, depth=10):
+        """
+            returns: a list of the highest `depth` tuples (score, phrase), highest score first. As rake_nltk,
+                     a phrase which occurs more than once is listed once for each occurrence.
+        """
+        (frequency, degree) = (self.frequency, self.degree)
+        rank_list = []
+        for phrase, count in self.counts.items():
+            rank = 0.0
+            for word in phrase:
+                rank += 1.0 * degree[word] / frequency[word]
+            rank_list.extend([(rank, ' '.join(phrase))] * min(count, depth))
+        return heapq.nlargest(depth, rank_list)
+
+
+@functools.lru_cache(maxsize=None)
+def extractor(language='english'):
+    """
+        returns: the shared KeyphraseExtractor of the language, created on first use (in each process)
+    """
+    return KeyphraseExtractor(language=language)
+
+
+def extract(input_text, depth=10):
+    """
+        Extract the keyword phrases with the shared extractor, refer to KeyphraseExtractor.extract()
+    """
+    return extractor().extract(input_text, depth)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: manifest of the metadata of all objects, stored in the bucket as sharded, gzip NDJSON objects
+#
+#     usage:
+#       >>> from manifest import manifest
+#       >>> mf = manifest.Manifest(pi)             # pi is an instance of PresentationIndex
+#       >>> mf.add(keywords, stat, tags)           # as each file is uploaded
+#       >>> mf.set_tags(object_name, tags)         # the tags of an object were changed
+#       >>> mf.flush()                             # update the shards of the objects added
+#       >>> for object_name, last_modified, keywords in mf.documents():
+#       ...     print(object_name)
+#
+import gzip
+import io
+import json
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from minio.error import S3Error
+
+from catalog.catalog import Catalog
+
+
+class Manifest(object):
+    """
+        The metadata of an object is stored in the headers of the object, reading it requires a
+        `stat_object` for each object. The manifest is a copy of the metadata of every object, one
+        JSON line per object, stored in a few gzip compressed objects (shards) under a prefix of the
+        bucket. A client loads the metadata of the bucket with one GET per shard.
+
+        An object name is assigned to a shard by its CRC32, an upload only rewrites the shards of the
+        objects uploaded. A shard is written with a conditional PUT (If-Match the etag read), if another
+        client updated the shard in the meantime, the shard is read again and the update repeated.
+    """
+    PREFIX = '_manifest/'                                  # objects under the prefix are not presentations
+    SHARDS = 16
+    RETRIES = 5                                            # attempts to update a shard written concurrently
+    CONFLICT_CODES = ('PreconditionFailed', 'ConditionalRequestConflict')
+
+    def __init__(self, pi, prefix=PREFIX, shards=SHARDS):
+        """
+            input: pi: the class managing the connection to the object store
+                   prefix: the prefix of the names of the shards
+                   shards: the number of shards, all clients of the bucket must use the same value
+        """
+        self.pi = pi
+        self.prefix = prefix
+        self.shards = max(shards, 1)
+        self.pending = dict()                              # object_name: entry, or None to remove the entry
+        self.tags = dict()                                 # object_name: tags, of entries in the manifest
+        self.lock = threading.Lock()
+
+    def shard(self, object_name):
+        """
+            returns: the number of the shard of the object
+        """
+        return zlib.crc32(object_name.encode()) % self.shards
+
+    def shard_name(self, number):
+        """
+            returns: the name of the object of the shard
+        """
+        return '{}{:03d}-of-{:03d}.ndjson.gz'.format(self.prefix, number, self.shards)
+
+    @staticmethod
+    def entry(keywords, stat, tags=None):
+        """
+            input: keywords, stat: refer to PresentationIndex.get_metadata()
+                   tags: optional, a dictionary (or Tags) of the tags of the object
+
+            returns: the entry (a dictionary) of the object in the manifest
+        """
+        metadata = {key.lower(): value for key, value in stat.metadata.items() if key.lower().startswith('x-amz-meta-')}
+        return dict(object_name=stat.object_name,
+                    etag=stat.etag,
+                    last_modified=Catalog.timestamp(stat.last_modified),
+                    size=stat.size,
+                    content_type=stat.content_type,
+                    keywords=keywords,
+                    metadata=metadata,
+                    tags=dict(tags or {}))
+
+    def add(self, keywords, stat, tags=None):
+        """
+            Thread safe, record the metadata of an object, the manifest is updated by flush()
+        """
+        entry = Manifest.entry(keywords, stat, tags)
+        with self.lock:
+            self.pending[entry['object_name']] = entry
+            self.tags.pop(entry['object_name'], None)
+
+    def remove(self, object_name):
+        """
+            Thread safe, record an object removed from the bucket, the manifest is updated by flush()
+        """
+        with self.lock:
+            self.pending[object_name] = None
+
+    def set_tags(self, object_name, tags):
+        """
+            Thread safe, record the tags of an object in the manifest, the manifest is updated by flush()
+        """
+        with self.lock:
+            if self.pending.get(object_name):
+                self.pending[object_name]['tags'] = dict(tags)
+            else:
+                self.tags[object_name] = dict(tags)
+
+    def flush(self):
+        """
+            Update the shards of the objects added, removed or tagged since the last flush
+
+            returns: the number of shards written
+        """
+        with self.lock:
+            (pending, self.pending) = (self.pending, dict())
+            (tags, self.tags) = (self.tags, dict())
+
+        shards = dict()
+        for object_name, entry in pending.items():
+            shards.setdefault(self.shard(object_name), (dict(), dict()))[0][object_name] = entry
+        for object_name, object_tags in tags.items():
+            shards.setdefault(self.shard(object_name), (dict(), dict()))[1][object_name] = object_tags
+
+        for number, (changes, changed_tags) in shards.items():
+            self.update_shard(number, changes, changed_tags)
+        return len(shards)
+
+    def update_shard(self, number, changes, tags=None):
+        """
+            Read, modify and write a shard, repeated if the shard was written by another client
+
+            input: changes: a dictionary of object_name: entry, or None to remove the entry
+                   tags: optional, a dictionary of object_name: tags, of entries in the shard
+        """
+        for attempt in range(Manifest.RETRIES):
+            (entries, etag) = self.read_shard(number)
+            for object_name, entry in changes.items():
+                if entry is None:
+                    entries.pop(object_name, None)
+                else:
+                    entries[object_name] = entry
+            for object_name, object_tags in (tags or {}).items():
+                if object_name in entries:
+                    entries[object_name]['tags'] = object_tags
+            try:
+                return self.write_shard(number, entries.values(), etag)
+            except S3Error as err:
+                if err.code not in Manifest.CONFLICT_CODES or attempt + 1 == Manifest.RETRIES:
+                    raise
+
+    def read_shard(self, number):
+        """
+            returns: a tuple of a dictionary of object_name: entry and the etag of the shard,
+                     an empty dictionary and None if the shard does not exist
+        """
+        try:
+            response = self.pi.minioClient.get_object(self.pi.bucket, self.shard_name(number))
+        except S3Error as err:
+            if err.code == 'NoSuchKey':
+                return (dict(), None)
+            raise
+        try:
+            data = response.read()
+            etag = response.headers.get('etag', '').replace('"', '')
+        finally:
+            response.close()
+            response.release_conn()
+
+        entries = dict()
+        for line in gzip.decompress(data).splitlines():
+            if line:
+                entry = json.loads(line)
+                entries[entry['object_name']] = entry
+        return (entries, etag)
+
+    def write_shard(self, number, entries, etag=None):
+        """
+            Write the entries to the shard, only if the shard has not changed since it was read (etag),
+            or does not exist (etag is None)
+        """
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as f:
+            for entry in sorted(entries, key=lambda e: e['object_name']):
+                f.write(json.dumps(entry, separators=(',', ':')).encode() + b'\n')
+
+        headers = {'Content-Type': 'application/x-ndjson+gzip'}
+        if etag:
+            headers['If-Match'] = '"{}"'.format(etag)
+        else:
+            headers['If-None-Match'] = '*'
+        # put_object() of minio 7.2 has no argument for request headers (metadata is sent as X-Amz-Meta-*),
+        # the conditional PUT uses the private method, minio is pinned in requirements.txt
+        return self.pi.minioClient._put_object(self.pi.bucket, self.shard_name(number), buffer.getvalue(), headers)
+
+    def entries(self):
+        """
+            Generator returning the entry of every object, the shards are read concurrently
+        """
+        with ThreadPoolExecutor(max_workers=min(self.shards, self.pi.max_connections)) as executor:
+            for (entries, _) in executor.map(self.read_shard, range(self.shards)):
+                yield from entries.values()
+
+    def documents(self, tags=None):
+        """
+            Generator returning a tuple of (object_name, last_modified, keywords) for each object,
+            refer to Catalog.documents()
+
+            input: tags: optional, only the objects with these tags, refer to Catalog.parse_tags()
+        """
+        for entry in self.entries():
+            if tags and not Catalog.match_tags(entry.get('tags'), tags):
+                continue
+            yield (entry['object_name'], entry['last_modified'], entry['keywords'])
+
+    def shard_etag(self, number):
+        """
+            returns: the etag of the shard, or None if the shard does not exist
+        """
+        try:
+            return self.pi.minioClient.stat_object(self.pi.bucket, self.shard_name(number)).etag
+        except S3Error as err:
+            if err.code in ('NoSuchKey', 'ResourceNotFound'):
+                return None
+            raise
+
+    def exists(self):
+        """
+            returns: True if any shard of the manifest has been written to the bucket
+        """
+        for _ in self.pi.minioClient.list_objects(self.pi.bucket, prefix=self.prefix):
+            return True
+        return False
+
+    def rebuild(self, entries):
+        """
+            Replace every shard of the manifest
+
+            input: entries: an iterable of entries, refer to entry()
+            returns: the number of entries written
+        """
+        shards = [list() for _ in range(self.shards)]
+        for entry in entries:
+            shards[self.shard(entry['object_name'])].append(entry)
+
+        for number, shard in enumerate(shards):
+            for attempt in range(Manifest.RETRIES):
+                try:
+                    self.write_shard(number, shard, self.shard_etag(number))
+                    break
+                except S3Error as err:
+                    if err.code not in Manifest.CONFLICT_CODES or attempt + 1 == Manifest.RETRIES:
+                        raise
+        return sum(len(shard) for shard in shards)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: time the stages of uploading a file or running a query, and export the totals
+#
+#     usage:
+#       >>> from metrics import metrics
+#       >>> registry = metrics.Metrics(log=log, statsd=metrics.StatsD('127.0.0.1:8125'))
+#       >>> trace = metrics.Trace('query')
+#       >>> with trace.stage('score'):
+#       ...     for document in trace.iterate(documents, 'read'):
+#       ...         score(document)
+#       >>> registry.record(trace)                 # a JSON log record and StatsD timers for the query
+#       >>> registry.write('data/metrics.prom')    # the totals in the Prometheus text format
+#
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+
+PREFIX = 'prezo'
+
+
+class Trace(object):
+    """
+        The time spent in each stage of one operation (a file uploaded, a query), and its counters.
+
+        The time of a stage excludes the stages started within it, for example a query spends time
+        scoring documents, interleaved with reading the documents from a generator; with the
+        iteration of the generator as stage 'read' inside stage 'score', the time of 'score' is only
+        the time scoring. The sum of the stages is the elapsed time of the operation (instrumented).
+
+        A trace is used by one thread at a time, it can be pickled and returned by a worker process.
+    """
+
+    def __init__(self, name, **labels):
+        """
+            input: name: the operation, for example 'ingest' or 'query'
+                   labels: optional, identify the operation in the JSON record, for example the filepath
+        """
+        self.name = name
+        self.labels = labels
+        self.stages = dict()                               # stage: seconds
+        self.counters = dict()                             # counter: value
+        self.stack = []                                    # the stages started, the last is running
+        self.started = None                                # when the running stage was started or resumed
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+            Context manager, time a stage, pausing the stage running
+        """
+        self.pause()
+        self.stack.append(name)
+        try:
+            yield self
+        finally:
+            self.pause()
+            self.stack.pop()
+
+    def pause(self):
+        """
+            Add the time since the running stage was started (or resumed) to the stage
+        """
+        now = time.perf_counter()
+        if self.stack:
+            self.stages[self.stack[-1]] = self.stages.get(self.stack[-1], 0.0) + now - self.started
+        self.started = now
+
+    def iterate(self, iterable, name):
+        """
+            Generator, returns the items of the iterable, the time waiting for each item is added to the stage
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    def count(self, name, value=1):
+        """
+            Add the value to a counter, for example the bytes uploaded
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @property
+    def elapsed(self):
+        return sum(self.stages.values())
+
+    def record(self):
+        """
+            returns: a dictionary of the trace, with the time of each stage in milliseconds
+        """
+        record = dict(trace=self.name)
+        record.update(self.labels)
+        record.update(elapsed_ms=round(1000 * self.elapsed, 3),
+                      stages={stage: round(1000 * seconds, 3) for stage, seconds in self.stages.items()},
+                      counters=self.counters)
+        return record
+
+
+class StatsD(object):
+    """
+        Send the stages (timers, ms) and counters of each trace to a StatsD server (UDP), as
+        <prefix>.<trace>.<stage>:<ms>|ms and <prefix>.<trace>.<counter>:<value>|c
+    """
+    DATAGRAM = 1432                                        # bytes, a datagram which is not fragmented
+
+    def __init__(self, address, prefix=PREFIX):
+        """
+            input: address: 'host:port' of the server, the port defaults to 8125
+        """
+        (host, _, port) = address.partition(':')
+        self.address = (host or '127.0.0.1', int(port or 8125))
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, trace):
+        """
+            Send the trace, errors are ignored, metrics must not cause an upload or query to fail
+        """
+        name = '{}.{}'.format(self.prefix, trace.name)
+        lines = ['{}.{}:{:.3f}|ms'.format(name, stage, 1000 * seconds) for stage, seconds in trace.stages.items()]
+        lines.append('{}.elapsed:{:.3f}|ms'.format(name, 1000 * trace.elapsed))
+        lines.extend('{}.{}:{}|c'.format(name, counter, value) for counter, value in trace.counters.items())
+
+        datagram = []
+        for line in lines:
+            if datagram and sum(len(sent) + 1 for sent in datagram) + len(line) > StatsD.DATAGRAM:
+                self.sendto(datagram)
+                datagram = []
+            datagram.append(line)
+        self.sendto(datagram)
+
+    def sendto(self, lines):
+        try:
+            self.sock.sendto('\n'.join(lines).encode(), self.address)
+        except OSError:
+            pass
+
+
+class Metrics(object):
+    """
+        Thread safe, the totals of the traces recorded: for each operation and stage the number of
+        times, the total and the maximum seconds, and the total of each counter. Each trace recorded is
+        also logged as a JSON record (if log is specified) and sent to StatsD (if statsd is specified).
+    """
+
+    def __init__(self, prefix=PREFIX, log=None, statsd=None):
+        """
+            input: prefix: of the names of the metrics
+                   log: optional, a logger, each trace is logged (level INFO) as a JSON record
+                   statsd: optional, an instance of StatsD
+        """
+        self.prefix = prefix
+        self.log = log
+        self.statsd = statsd
+        self.lock = threading.Lock()
+        self.timings = dict()                              # (operation, stage): [count, seconds, max seconds]
+        self.counters = dict()                             # (operation, counter): value
+
+    def record(self, trace):
+        """
+            Add the trace to the totals, log and send it
+        """
+        with self.lock:
+            for (stage, seconds) in list(trace.stages.items()) + [('elapsed', trace.elapsed)]:
+                timing = self.timings.setdefault((trace.name, stage), [0, 0.0, 0.0])
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+            for (counter, value) in trace.counters.items():
+                self.counters[(trace.name, counter)] = self.counters.get((trace.name, counter), 0) + value
+
+        if self.log:
+            self.log.info(json.dumps(trace.record(), separators=(',', ':'), default=str))
+        if self.statsd:
+            self.statsd.send(trace)
+
+    def prometheus(self):
+        """
+            returns: the totals in the Prometheus text exposition format, for example
+                     prezo_query_seconds_sum{stage="score"} 1.25
+                     prezo_query_seconds_count{stage="score"} 10
+                     prezo_ingest_bytes_total 1048576
+        """
+        with self.lock:
+            timings = sorted(self.timings.items())
+            counters = sorted(self.counters.items())
+
+        lines = []
+        for operation in sorted(set(operation for ((operation, _), _) in timings)):
+            name = '{}_{}_seconds'.format(self.prefix, operation)
+            lines.append('# HELP {} Time spent in each stage of {}, stage="elapsed" is the total'.format(name, operation))
+            lines.append('# TYPE {} summary'.format(name))
+            for ((_, stage), (count, seconds, _)) in (t for t in timings if t[0][0] == operation):
+                lines.append('{}_sum{{stage="{}"}} {:.6f}'.format(name, stage, seconds))
+                lines.append('{}_count{{stage="{}"}} {}'.format(name, stage, count))
+            lines.append('# HELP {}_max The longest time of a stage of {}'.format(name, operation))
+            lines.append('# TYPE {}_max gauge'.format(name))
+            for ((_, stage), (_, _, maximum)) in (t for t in timings if t[0][0] == operation):
+                lines.append('{}_max{{stage="{}"}} {:.6f}'.format(name, stage, maximum))
+
+        for ((operation, counter), value) in counters:
+            name = '{}_{}_{}_total'.format(self.prefix, operation, counter)
+            lines.append('# TYPE {} counter'.format(name))
+            lines.append('{} {}'.format(name, value))
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+            Write the totals in the Prometheus text format, for example for the textfile collector of
+            the node exporter. The file is replaced, a reader never sees a partial file.
+        """
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(temporary, path)
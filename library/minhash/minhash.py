@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: detect near-duplicate presentations, MinHash signatures of their text and an LSH index (SQLite)
+#
+#     usage:
+#       >>> from minhash import minhash
+#       >>> signature = minhash.signature(pi.extract_text('data/Meetup_Overview_final.pptx'))
+#       >>> index = minhash.LSHIndex('data/minhash.db')
+#       >>> index.similar(signature, threshold=0.8)
+#       [(0.92, 'Meetup_Overview_v2.pptx', '3f6c1b0e9a2d4e57')]
+#       >>> index.assign('Meetup_Overview_final.pptx', signature)   # added to the cluster of its near duplicates
+#       {'cluster': '3f6c1b0e9a2d4e57', 'similar': 'Meetup_Overview_v2.pptx', 'similarity': 0.92, ...}
+#
+#     The text is split into shingles, each sequence of SHINGLE words. The Jaccard similarity of two
+#     presentations (shingles in common / shingles of either) is estimated by the fraction of equal values
+#     of their signatures, the minimum hash of their shingles under each of PERMUTATIONS hash functions.
+#
+#     The signature is divided into BANDS bands of ROWS values, and the index stores the hash of each band.
+#     Presentations with an equal band are candidates, only the candidates are compared, so a new
+#     presentation is compared with its likely near duplicates rather than every presentation indexed.
+#     With 16 bands of 8 rows, two presentations 80% similar are candidates with a probability of 0.96,
+#     50% similar 0.06.
+#
+import hashlib
+import re
+import sqlite3
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AVAILABLE = np is not None
+
+PERMUTATIONS = 128
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+SHINGLE = 3                                                # words of each shingle
+MIN_SHINGLES = 10                                          # fewer and the text is too short to compare
+THRESHOLD = 0.8                                            # estimated Jaccard similarity of near duplicates
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORDS = re.compile(r'\w+')
+
+
+class MinHash(object):
+    """
+        The MinHash signature of a text, which may be added a part (a page, a slide) at a time
+    """
+
+    def __init__(self, permutations=PERMUTATIONS, shingle=SHINGLE, seed=1):
+        """
+            input: permutations: the number of hash functions, the values of the signature
+                   shingle: the number of words of each shingle
+                   seed: of the hash functions, signatures are comparable only with the same seed
+        """
+        if not AVAILABLE:
+            raise ImportError('MinHash requires numpy')
+
+        rng = np.random.RandomState(seed)
+        # (a * x + b) mod PRIME, with a, b and x (a 32 bit hash of the shingle) less than 2**32 there is no overflow
+        self.a = rng.randint(1, MAX_HASH, size=permutations, dtype=np.uint64)
+        self.b = rng.randint(0, MAX_HASH, size=permutations, dtype=np.uint64)
+        self.shingle = shingle
+        self.values = np.full(permutations, MAX_HASH, dtype=np.uint64)
+        self.tail = []                                     # the last words added, the start of the next shingle
+        self.shingles = 0
+
+    def update(self, texts):
+        """
+            Add the shingles of a list (or iterable) of strings, shingles span the strings
+        """
+        words = self.tail + [word for text in texts if text for word in WORDS.findall(text.lower())]
+        count = len(words) - self.shingle + 1
+        if count > 0:
+            hashes = np.unique(np.fromiter(
+                (int.from_bytes(hashlib.blake2b(' '.join(words[i:i + self.shingle]).encode(), digest_size=4).digest(),
+                                'little') for i in range(count)), dtype=np.uint64, count=count))
+            permuted = (np.outer(hashes, self.a) + self.b) % PRIME & MAX_HASH
+            self.values = np.minimum(self.values, permuted.min(axis=0))
+            self.shingles += len(hashes)
+        self.tail = words[len(words) - self.shingle + 1:] if self.shingle > 1 else []
+
+    def hexdigest(self):
+        """
+            returns: the signature as a string, or None if the text has fewer than MIN_SHINGLES shingles
+        """
+        if self.shingles < MIN_SHINGLES:
+            return None
+        return self.values.astype('<u4').tobytes().hex()
+
+
+def signature(texts):
+    """
+        returns: the signature (hexdigest) of a list of strings, or None if numpy is not installed
+                 or the text is too short
+    """
+    if not AVAILABLE:
+        return None
+    sketch = MinHash()
+    sketch.update(texts)
+    return sketch.hexdigest()
+
+
+def similarity(first, second):
+    """
+        returns: the estimated Jaccard similarity (0.0 to 1.0) of two signatures, the fraction of equal values
+    """
+    (first, second) = (bytes.fromhex(first), bytes.fromhex(second))
+    if np is not None:
+        return float(np.mean(np.frombuffer(first, dtype='<u4') == np.frombuffer(second, dtype='<u4')))
+    values = len(first) // 4
+    return sum(first[i * 4:i * 4 + 4] == second[i * 4:i * 4 + 4] for i in range(values)) / values
+
+
+class LSHIndex(object):
+    """
+        The signatures of the objects of the bucket, their clusters of near duplicates and the hash of each
+        band of each signature, in a local SQLite database. The connection may be shared by threads, an
+        object is assigned to a cluster and added to the index in a single step (assign()), so near duplicates
+        uploaded concurrently are assigned to the same cluster.
+    """
+    DEFAULT_PATH = 'data/minhash.db'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS signatures (
+            object_name TEXT PRIMARY KEY,
+            cluster TEXT,
+            signature TEXT
+        );
+        CREATE INDEX IF NOT EXISTS signatures_cluster ON signatures (cluster);
+        CREATE TABLE IF NOT EXISTS bands (
+            band INTEGER,
+            bucket INTEGER,
+            object_name TEXT,
+            PRIMARY KEY (band, bucket, object_name)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS bands_object ON bands (object_name);
+    """
+
+    def __init__(self, path=DEFAULT_PATH, bands=BANDS):
+        """
+            input: path: filename of the SQLite database, created if it does not exist
+                   bands: the number of bands of each signature
+        """
+        self.path = path
+        self.bands = bands
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(LSHIndex.SCHEMA)
+
+    def close(self):
+        """
+            Close the connection to the database
+        """
+        self.connection.close()
+
+    @staticmethod
+    def cluster_id(object_name):
+        """
+            returns: the identifier of a new cluster, first the object, a valid value of a tag
+        """
+        return hashlib.sha1(object_name.encode()).hexdigest()[:16]
+
+    def buckets(self, signature):
+        """
+            returns: a list of tuples (band, the hash of the values of the band, a signed 64 bit integer)
+        """
+        values = bytes.fromhex(signature)
+        size = len(values) // self.bands
+        return [(band, int.from_bytes(hashlib.blake2b(values[band * size:(band + 1) * size], digest_size=8).digest(),
+                                      'little', signed=True)) for band in range(self.bands)]
+
+    def similar(self, signature, threshold=THRESHOLD, exclude=None):
+        """
+            returns: a list of tuples (similarity, object_name, cluster) of the objects sharing a band with the
+                     signature whose similarity is at least the threshold, the most similar first
+        """
+        candidates = set()
+        for (band, bucket) in self.buckets(signature):
+            cursor = self.connection.execute('SELECT object_name FROM bands WHERE band = ? AND bucket = ?', (band, bucket))
+            candidates.update(object_name for (object_name,) in cursor)
+        candidates.discard(exclude)
+
+        matches = []
+        for object_name in candidates:
+            row = self.connection.execute('SELECT cluster, signature FROM signatures WHERE object_name = ?',
+                                          (object_name,)).fetchone()
+            if row:
+                score = similarity(signature, row[1])
+                if score >= threshold:
+                    matches.append((round(score, 3), object_name, row[0]))
+        return sorted(matches, key=lambda match: (-match[0], match[1]))
+
+    def assign(self, object_name, signature, threshold=THRESHOLD, add_similar=True):
+        """
+            Assign the object to the cluster of its most similar object, or to a new cluster, and add it to the index
+
+            input: add_similar: if False, an object with a near duplicate is not added (it will not be uploaded)
+            returns: a dictionary of the cluster, the most similar object and its similarity (or None), if the
+                     object was in the index (existed) and if it was added
+        """
+        with self.lock:
+            matches = self.similar(signature, threshold=threshold, exclude=object_name)
+            existed = self.connection.execute('SELECT 1 FROM signatures WHERE object_name = ?', (object_name,)).fetchone()
+            (score, similar, cluster) = matches[0] if matches else (None, None, LSHIndex.cluster_id(object_name))
+            added = add_similar or not matches
+            if added:
+                self.put(object_name, signature, cluster)
+        return dict(cluster=cluster, similar=similar, similarity=score, existed=bool(existed), added=added)
+
+    def put(self, object_name, signature, cluster):
+        """
+            Insert or replace the signature and cluster of an object
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM bands WHERE object_name = ?', (object_name,))
+            self.connection.execute('INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)', (object_name, cluster, signature))
+            self.connection.executemany('INSERT OR IGNORE INTO bands VALUES (?, ?, ?)',
+                                        ((band, bucket, object_name) for (band, bucket) in self.buckets(signature)))
+
+    def remove(self, object_name):
+        """
+            Remove an object from the index, for example when the upload failed
+        """
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM bands WHERE object_name = ?', (object_name,))
+            self.connection.execute('DELETE FROM signatures WHERE object_name = ?', (object_name,))
+
+    def clusters(self, object_names):
+        """
+            returns: a dictionary of object_name: cluster of the objects which are in the index
+        """
+        names = list(object_names)
+        result = dict()
+        for start in range(0, len(names), 500):           # the number of parameters of a statement is limited
+            chunk = names[start:start + 500]
+            cursor = self.connection.execute('SELECT object_name, cluster FROM signatures WHERE object_name IN ({})'.format(
+                                             ', '.join('?' * len(chunk))), chunk)
+            result.update(cursor)
+        return result
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: a compact, read only index of the metadata of all objects, a file opened with mmap
+#
+#     usage:
+#       >>> from mmapindex import mmapindex
+#       >>> mmapindex.build('data/catalog.db.idx', cat.documents(), generation=cat.generation())
+#       >>> index = mmapindex.MappedIndex('data/catalog.db.idx')    # any number of processes
+#       >>> for hit in index.search('infrastructure agility', depth=10, threshold=0.5):
+#       ...     print(hit['object_name'], hit['credibility'])
+#
+#     The catalog (SQLite) and SearchIndex of service.py hold the metadata of every object as Python
+#     strings and lists, each process searching them has its own copy. This index is a single file of
+#     arrays, opened with mmap and read in place (NumPy arrays backed by the mapping), so opening it does
+#     not read the file and the pages read are in the page cache, shared by every process mapping the file.
+#
+#     The file is written once, by build(), and replaced (rather than modified) when the catalog changes:
+#
+#       header      MAGIC, then the generation of the catalog and the number of documents, fields of
+#                   each document, strings, trigrams, postings and words, refer to HEADER
+#       documents   a record of each document, fixed width, uint32: the number of the string of the
+#                   object name, last modified and each field of the metadata (0 is the empty string)
+#       strings     uint64, the offset of each string in the text, and the end of the text
+#       trigrams    the trigrams of the metadata, UTF-8, fixed width (GRAM bytes), sorted
+#       postings    uint64, the offset of the postings of each trigram, and the end of the postings
+#       docs        uint32, the documents containing each trigram, in order
+#       word starts uint64, the offset of the words of each document, and the end of the words
+#       words       uint32, the number of the string of each word of the metadata of each document
+#       text        the strings, UTF-8, each string once and followed by a NUL, so many strings are read
+#                   (gathered and decoded) at once, a string containing a NUL is rejected by build()
+#
+#     Each section starts at a multiple of 8 bytes. The metadata is split into lines (fields) and words
+#     when the index is built, as CredibilityEngine does, a search reads and scores only the unique lines
+#     and words of its candidates, refer to CredibilityEngine.from_arrays().
+#
+import math
+import mmap
+import os
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from catalog.catalog import Catalog
+from credibility import engine
+
+AVAILABLE = np is not None
+
+MAGIC = b'PZINDEX1'
+# magic, generation (-1 if none), documents, fields, strings, trigrams, postings, words, bytes of text
+HEADER = struct.Struct('<8sqQQQQQQQ')
+GRAM = 12                                # bytes of a trigram, three characters of up to four bytes (UTF-8)
+SUFFIX = '.idx'                          # the file of the index of a catalog
+THRESHOLD = 0.5                          # refer to query.THRESHOLD
+
+
+def aligned(offset):
+    """
+        returns: the offset rounded up to a multiple of 8
+    """
+    return (offset + 7) & ~7
+
+
+def layout(documents, fields, strings, grams, postings, words):
+    """
+        returns: a list of tuples (offset, dtype, count) of each section of the file, after the header
+    """
+    sections = []
+    offset = aligned(HEADER.size)
+    for (dtype, count) in (('<u4', documents * (fields + 2)), ('<u8', strings + 1), ('S{}'.format(GRAM), grams),
+                           ('<u8', grams + 1), ('<u4', postings), ('<u8', documents + 1), ('<u4', words), ('u1', None)):
+        sections.append((offset, dtype, count))
+        if count is not None:
+            offset = aligned(offset + np.dtype(dtype).itemsize * count)
+    return sections
+
+
+def build(path, documents, generation=None):
+    """
+        Write the index of the documents to a file, replacing the file, a reader (which has the previous file
+        mapped) never sees a partial file
+
+        input: documents: an iterable of tuples (object_name, last_modified, metadata) where metadata is a
+                          list of strings in the order of PresentationIndex.get_metadata(), refer to Catalog.documents()
+               generation: optional, of the catalog indexed, refer to Catalog.generation()
+        returns: the number of documents
+        raises: ValueError if a string contains a NUL, the file is not written
+    """
+    if not AVAILABLE:
+        raise ImportError('the index requires numpy')
+
+    strings = {'': 0}                                      # string: number
+    records = []
+    postings = dict()                                      # trigram: list of documents
+    (words, counts) = ([], [])                             # the words of all documents, the number of each document
+    for doc, (object_name, last_modified, metadata) in enumerate(documents):
+        records.append([strings.setdefault(value or '', len(strings)) for value in [object_name, last_modified] + metadata])
+        count = len(words)
+        for text in metadata:
+            if text:
+                words.extend(strings.setdefault(word, len(strings)) for word in text.split())
+        counts.append(len(words) - count)
+        for gram in Catalog.keyword_trigrams(metadata):
+            postings.setdefault(gram.encode(), []).append(doc)
+
+    fields = max((len(record) for record in records), default=2) - 2
+    table = np.zeros((len(records), fields + 2), dtype='<u4')
+    for doc, record in enumerate(records):
+        table[doc, :len(record)] = record
+
+    # the strings are delimited by NUL, object names and metadata (HTTP headers) are not expected to contain NUL
+    invalid = next((value for value in strings if '\0' in value), None)
+    if invalid is not None:
+        raise ValueError('{!r} contains NUL, the strings of the index are delimited by NUL'.format(invalid))
+    encoded = [value.encode() + b'\0' for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    grams = sorted(postings)
+    starts = np.zeros(len(grams) + 1, dtype='<u8')
+    np.cumsum([len(postings[gram]) for gram in grams], out=starts[1:])
+    word_starts = np.zeros(len(records) + 1, dtype='<u8')
+    np.cumsum(counts, out=word_starts[1:])
+
+    arrays = (table, offsets, np.array(grams, dtype='S{}'.format(GRAM)), starts,
+              np.fromiter((doc for gram in grams for doc in postings[gram]), dtype='<u4', count=int(starts[-1])),
+              word_starts, np.array(words, dtype='<u4'), b''.join(encoded))
+    sizes = (len(records), fields, len(encoded), len(grams), int(starts[-1]), len(words))
+    header = HEADER.pack(MAGIC, -1 if generation is None else generation, *sizes, int(offsets[-1]))
+
+    temporary = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        for (offset, _, _), array in zip(layout(*sizes), arrays):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(array if isinstance(array, bytes) else array.tobytes())
+    os.replace(temporary, path)
+    return len(records)
+
+
+def generation_of(path):
+    """
+        returns: the generation of the catalog of the index, or None if the file is not an index or
+                 the index has no generation
+    """
+    try:
+        with open(path, 'rb') as f:
+            values = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return values[1] if values[0] == MAGIC and values[1] >= 0 else None
+
+
+class MappedIndex(object):
+    """
+        Search the index written by build(), the file is mapped read only and never modified. The interface
+        is that of service.SearchIndex, the candidates of a search are selected by their trigrams and only
+        the candidates are read and scored.
+    """
+
+    def __init__(self, path):
+        """
+            input: path: filename of the index
+            raises: ValueError if the file is not an index, OSError if it cannot be read
+        """
+        if not AVAILABLE:
+            raise ImportError('the index requires numpy')
+
+        self.path = path
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)   # the mapping remains after the file is closed
+        try:
+            (magic, generation, *sizes, text) = HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            raise ValueError('{} is not an index'.format(path))
+        if magic != MAGIC:
+            raise ValueError('{} is not an index'.format(path))
+
+        sections = layout(*sizes)
+        if sections[-1][0] + text > len(self.map):
+            raise ValueError('{} is truncated'.format(path))
+        (self.records, self.offsets, self.grams, self.starts, self.docs, self.word_starts, self.words) = [
+            np.frombuffer(self.map, dtype=dtype, count=count, offset=offset) for (offset, dtype, count) in sections[:-1]]
+        self.records = self.records.reshape(sizes[0], sizes[1] + 2)
+        self.text = sections[-1][0]
+        self.bytes = np.frombuffer(self.map, dtype=np.uint8, count=text, offset=self.text)
+
+        self.version = None if generation < 0 else generation
+        self.engine = None                                 # the documents are not tokenized, refer to search()
+        self.loaded = time.time()
+
+    def __len__(self):
+        return len(self.records)
+
+    def close(self):
+        """
+            Release the mapping, the arrays of the index are no longer valid
+        """
+        self.records = self.offsets = self.grams = self.starts = self.docs = self.word_starts = self.words = None
+        self.bytes = None
+        self.map.close()
+
+    def changed(self):
+        """
+            returns: True if the file has been replaced (by build()) since it was opened
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != (self.stat.st_ino, self.stat.st_mtime_ns, self.stat.st_size)
+
+    def string(self, number):
+        """
+            returns: the string of the number
+        """
+        return self.map[self.text + int(self.offsets[number]):self.text + int(self.offsets[number + 1]) - 1].decode()
+
+    def document(self, doc):
+        """
+            returns: a tuple of (object_name, last_modified, metadata) of the document, the empty fields of
+                     the metadata are removed, refer to Credibility.remove_empty
+        """
+        record = self.records[doc]
+        return (self.string(record[0]), self.string(record[1]) or None,
+                [self.string(number) for number in record[2:] if number])
+
+    def documents(self, docs=None):
+        """
+            Generator returning the tuple of each document, refer to document(), or of the indexes in docs
+        """
+        for doc in range(len(self)) if docs is None else docs:
+            yield self.document(int(doc))
+
+    def postings(self, gram):
+        """
+            returns: an array of the documents containing the trigram, or None
+        """
+        key = gram.encode()
+        position = int(np.searchsorted(self.grams, key))
+        if position == len(self.grams) or self.grams[position] != key:
+            return None
+        return self.docs[int(self.starts[position]):int(self.starts[position + 1])]
+
+    def candidates(self, search_string, threshold):
+        """
+            returns: an array of the indexes of the documents sharing at least the threshold (a fraction)
+                     of the trigrams of the search string, or None for all documents, refer to Catalog.candidates()
+        """
+        grams = Catalog.trigrams(search_string)
+        if not grams or threshold <= 0:
+            return None
+
+        minimum = max(1, math.ceil(min(threshold, 1.0) * len(grams)))
+        postings = [docs for docs in (self.postings(gram) for gram in grams) if docs is not None]
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+        counts = np.bincount(np.concatenate(postings), minlength=len(self))
+        return np.flatnonzero(counts >= minimum)
+
+    def strings(self, numbers):
+        """
+            returns: a tuple of an array (dtype object) of the unique strings of the numbers, and the
+                     index of the string of each number
+        """
+        numbers = numbers.astype(np.int64)
+        unique = np.flatnonzero(np.bincount(numbers, minlength=len(self.offsets) - 1))
+        index = np.zeros(len(self.offsets) - 1, dtype=np.int64)
+        index[unique] = np.arange(len(unique))
+        return (np.array(self.decode(unique), dtype=object), index[numbers])
+
+    def decode(self, numbers):
+        """
+            returns: a list of the strings of the numbers, the bytes of the strings (and their NULs) are
+                     gathered and decoded at once, or the range of strings is decoded if the numbers are dense
+        """
+        if not len(numbers):
+            return []
+        starts = self.offsets[numbers].astype(np.int64)
+        lengths = self.offsets[numbers + 1].astype(np.int64) - starts
+        (first, last) = (int(numbers.min()), int(numbers.max()))
+        span = int(self.offsets[last + 1]) - int(self.offsets[first])
+        if span < 4 * int(lengths.sum()):                  # most of the strings between, decode them all
+            table = self.bytes[int(self.offsets[first]):int(self.offsets[last + 1])].tobytes().decode().split('\0')
+            return [table[number - first] for number in numbers.tolist()]
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        return self.bytes[positions].tobytes().decode().split('\0')[:-1]
+
+    def engine_of(self, docs):
+        """
+            returns: a CredibilityEngine of the documents (an array of their indexes), only the unique lines
+                     and words of the documents are read
+        """
+        records = self.records[docs]
+        count = len(docs)
+        fields = records[:, 2:]
+        (line_docs, columns) = np.nonzero(fields)          # the occurrences of the lines, in order of the documents
+        (lines, line_ids) = self.strings(fields[line_docs, columns])
+
+        starts = self.word_starts[docs].astype(np.int64)
+        lengths = self.word_starts[docs + 1].astype(np.int64) - starts
+        word_docs = np.repeat(np.arange(count), lengths)
+        # the positions of the words of each document: its start, plus 0 to the number of its words
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        (words, word_ids) = self.strings(self.words[positions])
+
+        return engine.CredibilityEngine.from_arrays(
+            self.decode(records[:, 0]),
+            Column(lambda doc: self.string(records[doc, 1]) or None, count),
+            Column(lambda doc: [self.string(number) for number in fields[doc] if number], count),
+            lines, line_ids, line_docs, words, word_ids, word_docs)
+
+    def search(self, search_string, depth, threshold=THRESHOLD, trace=None):
+        """
+            returns: a list of dictionaries of the highest `depth` results, refer to query.search_keywords().
+                     The candidates are scored by CredibilityEngine if it is available, a threshold of 0
+                     reads and scores every document.
+        """
+        docs = self.candidates(search_string, threshold)
+        if engine.AVAILABLE:
+            return self.engine_of(np.arange(len(self)) if docs is None else docs).search(search_string, depth=depth)
+
+        import query
+
+        return query.top_results(search_string, self.documents(docs), depth, sort_by_bound=True, trace=trace)
+
+
+class Column(object):
+    """
+        A sequence of the values of a field of the documents, read as each value is used
+    """
+
+    def __init__(self, read, count):
+        self.read = read
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, doc):
+        return self.read(doc)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: streaming text extraction from the XML parts of a PowerPoint (OOXML) file
+#
+#     usage:
+#       >>> from ooxml import ooxml
+#       >>> with ooxml.StreamingPresentation('data/Meetup_Overview.pptx') as prs:
+#       ...     for text in prs.text_runs():
+#       ...         print(text)
+#
+#     A .pptx file is a zip archive. python-pptx builds an object model of the entire presentation,
+#     including images, media and charts. Here, only the XML parts of the slides (and notes) are read,
+#     each with an incremental parser, media parts are never read.
+#
+import datetime
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+
+NS = dict(a='http://schemas.openxmlformats.org/drawingml/2006/main',
+          p='http://schemas.openxmlformats.org/presentationml/2006/main',
+          r='http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+          rel='http://schemas.openxmlformats.org/package/2006/relationships',
+          cp='http://schemas.openxmlformats.org/package/2006/metadata/core-properties',
+          dc='http://purl.org/dc/elements/1.1/',
+          dcterms='http://purl.org/dc/terms/')
+
+RT_OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+RT_CORE_PROPERTIES = 'http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties'
+RT_NOTES_SLIDE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+
+A_R = '{%s}r' % NS['a']
+A_T = '{%s}t' % NS['a']
+A_P = '{%s}p' % NS['a']
+P_SP = '{%s}sp' % NS['p']
+P_PH = '{%s}ph' % NS['p']
+
+#
+#  Core properties, the same names and types as python-pptx CoreProperties
+#
+CORE_PROPERTIES = dict(author='dc:creator',
+                       comments='dc:description',
+                       category='cp:category',
+                       subject='dc:subject',
+                       title='dc:title',
+                       keywords='cp:keywords',
+                       revision='cp:revision',
+                       last_modified_by='cp:lastModifiedBy',
+                       created='dcterms:created',
+                       identifier='dc:identifier',
+                       language='dc:language',
+                       last_printed='cp:lastPrinted',
+                       version='cp:version',
+                       modified='dcterms:modified',
+                       content_status='cp:contentStatus')
+DATETIME_PROPERTIES = ('created', 'last_printed', 'modified')
+
+
+class StreamingPresentation(object):
+    """
+        Read the text of a presentation directly from the XML parts of the zip archive.
+
+        Exceptions raised for files which are not valid presentations are zipfile.BadZipFile,
+        KeyError (a part is missing) and xml.etree.ElementTree.ParseError.
+    """
+
+    def __init__(self, path_to_presentation):
+        self.path_to_presentation = path_to_presentation
+        self.zip = zipfile.ZipFile(path_to_presentation)
+        self.presentation_part = self.get_main_part()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def relationships(self, part_name):
+        """
+            input: part_name: name of the part in the archive, for example 'ppt/presentation.xml'
+
+            returns: dictionary of relationship id: (type, part name of the target)
+        """
+        directory, filename = posixpath.split(part_name)
+        rels_name = posixpath.join(directory, '_rels', filename + '.rels')
+        try:
+            root = ET.fromstring(self.zip.read(rels_name))
+        except KeyError:
+            return dict()
+
+        rels = dict()
+        for rel in root.iter('{%s}Relationship' % NS['rel']):
+            if rel.get('TargetMode') == 'External':
+                continue
+            target = posixpath.normpath(posixpath.join(directory, rel.get('Target'))).lstrip('/')
+            rels[rel.get('Id')] = (rel.get('Type'), target)
+        return rels
+
+    def get_main_part(self):
+        """
+            returns: the part name of the presentation, normally 'ppt/presentation.xml'
+        """
+        for rel_type, target in self.relationships('').values():
+            if rel_type == RT_OFFICE_DOCUMENT:
+                return target
+        raise KeyError('officeDocument relationship not found')
+
+    def slide_parts(self):
+        """
+            returns: a list of the part names of the slides, in presentation order
+        """
+        rels = self.relationships(self.presentation_part)
+        root = ET.fromstring(self.zip.read(self.presentation_part))
+        slides = []
+        for sld_id in root.iterfind('p:sldIdLst/p:sldId', NS):
+            slides.append(rels[sld_id.get('{%s}id' % NS['r'])][1])
+        return slides
+
+    def notes_part(self, slide_part):
+        """
+            returns: the part name of the notes of a slide, or None
+        """
+        for rel_type, target in self.relationships(slide_part).values():
+            if rel_type == RT_NOTES_SLIDE:
+                return target
+        return None
+
+    def iter_runs(self, part_name, placeholder=None, paragraphs=False):
+        """
+            Generator, the text of each run (a:r/a:t) in the part. The part is parsed incrementally
+            and each paragraph is discarded once read.
+
+            input: part_name: name of the slide or notes part
+                   placeholder: optional, only return text of shapes which are this type of placeholder
+                   paragraphs: return the text of each paragraph (the runs joined) rather than each run
+        """
+        shapes = []                                        # placeholder type and text of each (nested) shape
+        paragraph = []
+        in_run = 0
+
+        with self.zip.open(part_name) as xml_file:
+            for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == A_R:
+                        in_run += 1
+                    elif elem.tag == P_SP:
+                        shapes.append([None, []])
+                    elif elem.tag == P_PH and shapes:
+                        shapes[-1][0] = elem.get('type', 'obj')
+                    continue
+
+                text = None
+                if elem.tag == A_T and in_run and not paragraphs:
+                    text = elem.text or ''
+                elif elem.tag == A_T and in_run:
+                    paragraph.append(elem.text or '')
+                elif elem.tag == A_R:
+                    in_run -= 1
+                elif elem.tag == A_P:
+                    if paragraphs:
+                        text = ''.join(paragraph)
+                        paragraph = []
+                    elem.clear()
+                elif elem.tag == P_SP:
+                    (ph_type, texts) = shapes.pop()
+                    if placeholder is not None and ph_type == placeholder:
+                        yield from texts
+                    elem.clear()
+
+                if text is None:
+                    continue
+                if placeholder is None:
+                    yield text
+                elif shapes:
+                    shapes[-1][1].append(text)
+
+    def text_runs(self):
+        """
+            Generator, the text of each run of each slide
+        """
+        for slide_part in self.slide_parts():
+            yield from self.iter_runs(slide_part)
+
+    def slides(self):
+        """
+            returns: a list, for each slide, of the text of each run of the slide (including tables)
+        """
+        return [list(self.iter_runs(slide_part)) for slide_part in self.slide_parts()]
+
+    def notes(self):
+        """
+            returns: a list of the speaker notes, one string for each slide
+        """
+        notes = []
+        for slide_part in self.slide_parts():
+            notes_part = self.notes_part(slide_part)
+            if notes_part:
+                notes.append('\n'.join(self.iter_runs(notes_part, placeholder='body', paragraphs=True)))
+            else:
+                notes.append('')
+        return notes
+
+    def core_properties(self):
+        """
+            returns: dictionary of the core properties using the names and data types of python-pptx
+        """
+        fields = dict.fromkeys(CORE_PROPERTIES, '')
+        fields['revision'] = 0
+        for key in DATETIME_PROPERTIES:
+            fields[key] = None
+
+        part_name = None
+        for rel_type, target in self.relationships('').values():
+            if rel_type == RT_CORE_PROPERTIES:
+                part_name = target
+        if not part_name:
+            return fields
+
+        root = ET.fromstring(self.zip.read(part_name))
+        for key, tag in CORE_PROPERTIES.items():
+            elem = root.find(tag, NS)
+            if elem is None or elem.text is None:
+                continue
+            if key in DATETIME_PROPERTIES:
+                fields[key] = parse_w3cdtf(elem.text)
+            elif key == 'revision':
+                try:
+                    fields[key] = max(int(elem.text), 0)
+                except ValueError:
+                    pass
+            else:
+                fields[key] = elem.text
+
+        return fields
+
+
+def parse_w3cdtf(value):
+    """
+        Convert a W3CDTF string, for example '2003-12-31T10:14:55Z' or '2003-12-31T10:14:55-08:00'
+        to a datetime (UTC). Returns None if the value cannot be parsed.
+    """
+    timestamp = None
+    for template in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d', '%Y-%m', '%Y'):
+        try:
+            timestamp = datetime.datetime.strptime(value[:19], template)
+        except ValueError:
+            continue
+        break                                              # the first template which parses the value
+    if timestamp is None:
+        return None
+
+    offset = value[19:]
+    if len(offset) == 6 and offset[0] in '+-':
+        try:
+            delta = datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+        except ValueError:
+            return timestamp
+        timestamp = timestamp - delta if offset[0] == '+' else timestamp + delta
+    return timestamp
@@ -1,5 +1,158 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# 
-print(f'\n\n\nhttps://www.geeksforgeeks.org/working-with-pdf-files-in-python/\n\n\n')
-exit()
\ No newline at end of file
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: extract the keyword phrases and document information of PDF files
+#
+#     usage:
+#       >>> from pdf import pdfindex
+#       >>> analysis = pdfindex.PdfIndex().analyze('data/handout.pdf', depth=20, page_depth=5)
+#       >>> analysis.phrases                           # [(score, phrase), ...] as PresentationIndex.rake_it()
+#       >>> analysis.core_properties                   # {'title': ..., 'author': ..., 'created': ...}
+#       >>> analysis.slides                            # the keyword phrases of each page
+#
+#     The text is extracted a page at a time, the lines of each page are added to the candidate phrases of
+#     the document (keyphrase.Phrases) and the text discarded, so the text of a document of several hundred
+#     pages is never held in memory at once. The file is read by pypdf as needed, rather than read into memory.
+#
+#     pypdf is optional, without it PDF files are uploaded with their metadata, but no keywords.
+#
+import datetime
+
+try:
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+except ImportError:
+    PdfReader = None
+
+from keyphrase import keyphrase
+from metrics import metrics
+
+CONTENT_TYPE = 'application/pdf'
+MAGIC = b'%PDF-'                                           # the first bytes of a PDF file
+
+
+class PdfIndex(object):
+    """
+        Analyze PDF files for PresentationIndex.upload(), each page of the file is treated as a slide
+    """
+
+    def __init__(self, extractor=None):
+        """
+            input: extractor: optional, a keyphrase.KeyphraseExtractor, default the shared extractor
+        """
+        self.extractor = extractor or keyphrase.extractor()
+
+    @staticmethod
+    def is_pdf(filepath):
+        """
+            returns: True if the content of the file is PDF, regardless of its extension
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                return f.read(1024).lstrip().startswith(MAGIC)
+        except OSError:
+            return False
+
+    def analyze(self, path_to_pdf, depth=10, page_depth=5, trace=None, sketch=None):
+        """
+            Read the file once, returning the keyword phrases of the document and of each page, and the
+            document information
+
+            input: path_to_pdf: filename of the PDF file to analyze
+                   depth: the number of keyword phrases of the document
+                   page_depth: the number of keyword phrases of each page
+                   trace: optional metrics.Trace, the time of the stages 'parse', 'core_properties' and 'rake'
+                   sketch: optional minhash.MinHash, the lines of each page are added, before the text is discarded
+
+            returns: a PdfAnalysis object, if the file cannot be read error_message is set and the
+                     phrases of the pages read (if any) are returned
+        """
+        analysis = PdfAnalysis(path_to_pdf)
+        trace = trace or metrics.Trace('analyze')
+        if PdfReader is None:
+            analysis.error_message = 'PDF: pypdf is not installed, keywords are not extracted'
+            return analysis
+
+        phrases = self.extractor.phrases_of()
+        try:
+            with open(path_to_pdf, 'rb') as f, trace.stage('parse'):
+                reader = PdfReader(f)                      # a file object, pypdf reads the objects as needed
+                if reader.is_encrypted:
+                    reader.decrypt('')                     # the empty user password, documents which only restrict editing
+                with trace.stage('core_properties'):
+                    analysis.core_properties = self.get_properties(reader)
+
+                for lines in self.page_lines(reader):
+                    analysis.page_count += 1
+                    with trace.stage('rake'):
+                        page = self.extractor.phrases_of()
+                        page.add(lines)
+                        analysis.slides.append([text for score, text in page.ranked(page_depth)])
+                        phrases.update(page)
+                    if sketch is not None:
+                        sketch.update(lines)
+        except (PyPdfError, OSError, ValueError, KeyError, TypeError) as err:
+            analysis.error_message = 'PDF: {} {}'.format(path_to_pdf, err)
+
+        with trace.stage('rake'):
+            analysis.phrases = phrases.ranked(depth)
+        return analysis
+
+    def page_lines(self, reader):
+        """
+            Generator returning, for each page, a list of the lines of text on the page
+        """
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            yield [line for line in text.splitlines() if line.strip()]
+
+    def get_properties(self, reader):
+        """
+            input: reader: a PdfReader
+
+            returns: a dictionary of the document information, with the names of the core properties of a
+                     presentation, empty values removed and datetime converted to string
+        """
+        info = reader.metadata
+        if info is None:
+            return dict()
+
+        fields = dict(author=info.author,
+                      title=info.title,
+                      subject=info.subject,
+                      keywords=info.get('/Keywords'),
+                      creator=info.creator,
+                      producer=info.producer)
+        for (name, attribute) in (('created', 'creation_date'), ('modified', 'modification_date')):
+            try:
+                fields[name] = getattr(info, attribute)
+            except ValueError:                             # a date which is not in the PDF format
+                fields[name] = info.get('/CreationDate' if name == 'created' else '/ModDate')
+
+        cleaned = dict()
+        for key, value in fields.items():
+            if isinstance(value, datetime.datetime):
+                cleaned[key] = value.strftime("%d-%b-%Y %H:%M:%S")
+            elif value is not None and str(value).strip():
+                cleaned[key] = str(value).strip()
+        return cleaned
+
+
+class PdfAnalysis(object):
+    """
+        The result of PdfIndex.analyze(), the keyword phrases and document information from a single read of the file
+    """
+
+    def __init__(self, path_to_pdf):
+        self.path_to_pdf = path_to_pdf
+        self.phrases = []                                  # list of (score, phrase) of the document
+        self.core_properties = dict()                      # refer to PdfIndex.get_properties()
+        self.page_count = 0
+        self.slides = []                                   # list of the keyword phrases of each page
+        self.error_message = None
@@ -10,16 +10,19 @@
 #     description: Python class to manage and store (Powerpoint) presentations (and other files)
 #
 import ast
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import timedelta
 import datetime
+import hashlib
 import os
+import certifi
+import urllib3
+from urllib3.exceptions import HTTPError
 from urllib3.exceptions import ProtocolError
 import urllib.parse
+import zipfile
 
-from rake_nltk import Rake
-
-from pptx import Presentation
-from pptx.exc import PackageNotFoundError
+from keyphrase import keyphrase
 
 from minio import Minio
 from minio.commonconfig import Tags
@@ -27,6 +30,10 @@ from minio.error import InvalidResponseError
 from minio.error import S3Error
 from minio.error import ServerError
 
+from manifest import manifest
+from metrics import metrics
+from ooxml import ooxml
+
 
 class PresentationIndex(object):
     """
@@ -37,30 +44,87 @@ class PresentationIndex(object):
                                                            # DEFAULT = 'fra1.digitaloceanspaces.com'
     MAX_KEY_LEN = 128                                      # Max tag key length
     MAX_VALUE_LEN = 256                                    # Max tag value length
-
-    def __init__(self, access_key=None, secret_key=None, bucket=None, cloud=DEFAULT):
+    MAX_TAGS = 10                                          # Max tags of an object
+    ENGINES = ('pptx', 'stream')                           # Text extraction, python-pptx or streaming XML
+    MAX_CONNECTIONS = 10                                   # Connections to the object store kept alive
+    CONNECT_TIMEOUT = 10                                   # Seconds
+    READ_TIMEOUT = 300                                     # Seconds
+    RETRIES = 5                                            # Attempts of a request, refer to urllib3.Retry
+
+    def __init__(self, access_key=None, secret_key=None, bucket=None, cloud=DEFAULT, catalog=None, engine='pptx',
+                 transfer=None, manifest=None, max_connections=MAX_CONNECTIONS, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, retries=RETRIES):
         """
             metadata is prepended with 'x-amz-meta-' plus the variable name specified in the metadata dictionary
 
             any error messages are stored in error_message for reference by the calling program
+
+            catalog: optional instance of catalog.Catalog, a local index updated when files are uploaded
+
+            engine: 'pptx' reads presentations with python-pptx, 'stream' reads the text directly from the
+                    slide XML in the zip archive, which is faster and does not load images or media.
+                    The stream engine also returns the text of grouped shapes and tables.
+
+            transfer: optional instance of transfer.Transfer, large files are uploaded in parts which
+                      are retried and can be resumed, otherwise fput_object is used
+
+            manifest: optional instance of manifest.Manifest, the metadata of each object uploaded is
+                      added to the manifest, the caller writes the manifest with flush()
+
+            max_connections, connect_timeout, read_timeout, retries: the pool of connections (urllib3) shared
+                      by the threads using the Minio client, max_connections is also the number of threads
+                      of get_metadata_many()
         """
         self.access_key = access_key
         self.secret_key = secret_key
         self.bucket = bucket
         self.minioClient = None
         self.cloud = cloud
+        self.catalog = catalog
+        self.engine = engine if engine in PresentationIndex.ENGINES else PresentationIndex.ENGINES[0]
+        self.transfer = transfer
+        self.manifest = manifest
+        self.max_connections = max(max_connections, 1)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
         self.error_message = None
         self.message = None
+        self.url_cache = None                              # optional querycache.URLCache, refer to get_download_url()
         self.KEYWORDS = 'x-amz-meta-{}'.format(PresentationIndex.KW_NAME)
 
         self.init_minio()
 
+    @staticmethod
+    def env_max_connections(log, default=MAX_CONNECTIONS):
+        """
+            input: log: the logger of the program, warned if the value is not an integer
+                   default: the value if PZ_MAX_CONNECTIONS is not specified, or is not an integer
+
+            returns: the value of the environment variable PZ_MAX_CONNECTIONS
+        """
+        try:
+            return int(os.environ.get('PZ_MAX_CONNECTIONS', default))
+        except ValueError:
+            log.warning('ENV: could not convert value of MAX_CONNECTIONS to int, using {}'.format(default))
+            return default
+
     def init_minio(self, secure=True):
         """
-            Create an instance of the Minio client with the appropriate credentatials
+            Create an instance of the Minio client with the appropriate credentatials. The pool of
+            connections is sized so each thread of get_metadata_many() reuses a connection (keep-alive),
+            rather than opening and discarding connections beyond the default size of the pool (10).
         """
+        http_client = urllib3.PoolManager(
+            maxsize=self.max_connections,
+            block=True,                                    # wait for a connection rather than opening another
+            timeout=urllib3.Timeout(connect=self.connect_timeout, read=self.read_timeout),
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+            retries=urllib3.Retry(total=self.retries, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]))
 
-        self.minioClient = Minio(self.cloud, access_key=self.access_key, secret_key=self.secret_key, secure=secure)
+        self.minioClient = Minio(self.cloud, access_key=self.access_key, secret_key=self.secret_key, secure=secure,
+                                 http_client=http_client)
 
     def verify_bucket_exists(self):
         """
@@ -90,17 +154,93 @@ class PresentationIndex(object):
             returns: None indicating an error, or the etag number of the object
 
             Filenames may include spaces, thus, urllib.parse.quote_plus
+            If a catalog is configured, the metadata of the uploaded object is added to the local index,
+            and if a manifest is configured, to the manifest.
+        """
+        (result, error) = self.upload(filepath=filepath, metadata=metadata, tags=tags, content_type=content_type)
+        if error:
+            self.error_message = error
+
+        return result
+
+    def upload(self, filepath=None, metadata=dict(), tags=None, content_type='application/octet-stream', slides=None,
+               trace=None):
         """
+            Thread safe version of upload_file, the error is returned rather than stored in error_message
 
-        remote_name = urllib.parse.quote_plus(os.path.basename(filepath))
+            slides: optional, a list of the keywords of each slide, added to the catalog
+            trace: optional metrics.Trace, the time of the stages 'put' (the upload) and 'index' (catalog and manifest)
+
+            returns: a tuple of the result (None indicating an error) and an error message (or None)
+                     if the file was uploaded, but the catalog could not be updated, both are returned
+        """
+
+        remote_name = self.get_remote_name(filepath)
+        trace = trace or metrics.Trace('upload')
 
         try:
-            etag = self.minioClient.fput_object(self.bucket, remote_name, filepath, metadata=metadata, tags=tags, content_type=content_type)
-        except (InvalidResponseError, S3Error, ServerError, FileNotFoundError) as err:
-            self.error_message = err
-            return None
+            with trace.stage('put'):
+                if self.transfer:
+                    etag = self.transfer.upload_file(self.minioClient, self.bucket, remote_name, filepath, metadata=metadata, tags=tags, content_type=content_type)
+                else:
+                    etag = self.minioClient.fput_object(self.bucket, remote_name, filepath, metadata=metadata, tags=tags, content_type=content_type)
+        except (InvalidResponseError, S3Error, ServerError, FileNotFoundError, HTTPError) as err:
+            return (None, err)
+
+        if self.catalog or self.manifest:
+            with trace.stage('index'):
+                try:
+                    (keywords, stat) = self.get_metadata(remote_name)
+                except (InvalidResponseError, S3Error, ServerError) as err:
+                    return (etag, 'UPLOAD:ERROR updating catalog {} {}'.format(remote_name, err))
+                if self.catalog:
+                    self.catalog.put(keywords, stat, slides=slides, tags=dict(tags or {}))
+                if self.manifest:
+                    self.manifest.add(keywords, stat, tags)
+
+        return (etag, None)
+
+    def get_remote_name(self, filepath):
+        """
+            Filenames may include spaces, thus, urllib.parse.quote_plus
+
+            returns: the name of the object in the bucket for the file
+        """
+        return urllib.parse.quote_plus(os.path.basename(filepath))
+
+    def file_digests(self, filepath, block_size=2**20):
+        """
+            Read the file once, calculating both the MD5 (the etag of an object uploaded in a single part)
+            and SHA256 (the key of the local cache) of the content
+
+            returns: a tuple of the hex digests (md5, sha256)
+        """
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                md5.update(block)
+                sha256.update(block)
+
+        return (md5.hexdigest(), sha256.hexdigest())
+
+    def is_uploaded(self, filepath, md5):
+        """
+            Determine if the object in the bucket has the same content as the local file. The etag of an
+            object uploaded in a single part is the MD5 of the content, files uploaded by upload.py also
+            include the MD5 in the metadata, as the etag of multipart uploads is not the MD5.
+
+            input: filepath: location of the file on the local system
+                   md5: hex digest of the content of the file
+
+            returns: True if the object exists and is unchanged, otherwise False
+        """
+        try:
+            stat = self.minioClient.stat_object(self.bucket, self.get_remote_name(filepath))
+        except (InvalidResponseError, S3Error, ServerError):
+            return False
 
-        return etag
+        return md5 in (stat.etag, stat.metadata.get('x-amz-meta-md5'))
 
     def rake_it(self, input_text, depth=10):
         """
@@ -110,18 +250,12 @@ class PresentationIndex(object):
             returns: None or a tuple of scores and phrases
         """
 
-        r = Rake()
-
-        if isinstance(input_text, list):
-            r.extract_keywords_from_sentences(input_text)            # Extraction given the list of strings where each string is a sentence.
-        elif isinstance(input_text, str):
-            r.extract_keywords_from_text(input_text)                 # Extraction given the text.
-        else:
+        if not isinstance(input_text, (list, str)):
             self.error_message = 'Input must be either of type list or string'
             return None
 
         if isinstance(depth, int):
-            return r.get_ranked_phrases_with_scores()[0:depth]       # To get keyword phrases ranked highest to lowest with scores.
+            return keyphrase.extract(input_text, depth=depth)        # Keyword phrases ranked highest to lowest with scores.
         else:
             self.error_message = 'depth must be an integer'
             return None
@@ -135,14 +269,24 @@ class PresentationIndex(object):
             note: text_runs will be populated with a list of strings, one for each text run in presentation
             reference: https://python-pptx.readthedocs.io/en/latest/user/quickstart.html
         """
-
-        text_runs = []
+        if self.engine == 'stream':
+            return self.analyze(path_to_presentation).text_runs
 
         prs = self.get_presentation_object(path_to_presentation)
 
         if not prs:
             return ['error extracting text with pptx']
 
+        return self.get_text_runs(prs)
+
+    def get_text_runs(self, prs):
+        """
+            input: prs: presentation object
+
+            returns: a list of strings, one for each text run in the presentation
+        """
+        text_runs = []
+
         for slide in prs.slides:
             for shape in slide.shapes:
                 if not shape.has_text_frame:
@@ -153,6 +297,104 @@ class PresentationIndex(object):
 
         return text_runs
 
+    def get_slide_text(self, shapes):
+        """
+            input: shapes: the shapes of a slide (or of a group shape)
+
+            returns: a list of strings, one for each text run of the shapes, including the text of
+                     grouped shapes and the cells of tables, which get_text_runs() does not return
+        """
+        from pptx.enum.shapes import MSO_SHAPE_TYPE             # python-pptx is imported only to read presentations
+
+        text_runs = []
+
+        for shape in shapes:
+            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+                text_runs.extend(self.get_slide_text(shape.shapes))
+                continue
+            if shape.has_text_frame:
+                frames = [shape.text_frame]
+            elif getattr(shape, 'has_table', False):
+                frames = [cell.text_frame for row in shape.table.rows for cell in row.cells]
+            else:
+                continue
+            for frame in frames:
+                for paragraph in frame.paragraphs:
+                    for run in paragraph.runs:
+                        text_runs.append(run.text)
+
+        return text_runs
+
+    def analyze(self, path_to_presentation, trace=None):
+        """
+            Read the presentation once, returning the text, core properties, number of slides and
+            speaker notes, rather than calling extract_text() and get_core_properties() which each
+            read (unzip and parse) the presentation.
+
+            input: path_to_presentation: filename of the presentation to analyze
+                   trace: optional metrics.Trace, the time of the stages 'parse' and 'core_properties'
+
+            returns: a PresentationAnalysis object, if the presentation cannot be read the values
+                     are those returned by extract_text() and get_core_properties() on error.
+                     The text of each slide, including grouped shapes and tables, is in slides.
+        """
+        analysis = PresentationAnalysis(path_to_presentation)
+        trace = trace or metrics.Trace('analyze')
+
+        if self.engine == 'stream':
+            with trace.stage('parse'):
+                return self.analyze_stream(analysis, trace)
+
+        with trace.stage('parse'):
+            prs = self.get_presentation_object(path_to_presentation)
+
+            if not prs:
+                analysis.text_runs = ['error extracting text with pptx']
+                analysis.error_message = self.error_message
+                return analysis
+
+            analysis.text_runs = self.get_text_runs(prs)
+            with trace.stage('core_properties'):
+                analysis.core_properties = self.get_properties(prs)
+            analysis.slide_count = len(prs.slides)
+
+            for slide in prs.slides:
+                analysis.slides.append(self.get_slide_text(slide.shapes))
+                if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+                    analysis.notes.append(slide.notes_slide.notes_text_frame.text)
+                else:
+                    analysis.notes.append('')
+
+        return analysis
+
+    def analyze_stream(self, analysis, trace=None):
+        """
+            Populate the analysis reading the XML parts of the presentation with ooxml.StreamingPresentation
+
+            input: analysis: PresentationAnalysis object
+                   trace: optional metrics.Trace, the time of the stage 'core_properties'
+
+            returns: the PresentationAnalysis object
+        """
+        trace = trace or metrics.Trace('analyze')
+        try:
+            with ooxml.StreamingPresentation(analysis.path_to_presentation) as prs:
+                analysis.slides = prs.slides()
+                analysis.text_runs = [text for slide in analysis.slides for text in slide]
+                with trace.stage('core_properties'):
+                    analysis.core_properties = self.clean_properties(prs.core_properties())
+                analysis.notes = prs.notes()
+                analysis.slide_count = len(analysis.notes)
+        except (KeyError, OSError, zipfile.BadZipFile, ooxml.ET.ParseError) as err:
+            self.error_message = '{} {}'.format(analysis.path_to_presentation, err)
+            analysis.text_runs = ['error extracting text with pptx']
+            analysis.core_properties = dict()
+            analysis.notes = []
+            analysis.slides = []
+            analysis.error_message = self.error_message
+
+        return analysis
+
     def get_presentation_object(self, path_to_presentation):
         """
             Attempt to read the presentation file and return the object
@@ -162,6 +404,9 @@ class PresentationIndex(object):
             returns: None if any errors occur, otherwise the presentation object
 
         """
+        from pptx import Presentation                           # python-pptx is imported only to read presentations
+        from pptx.exc import PackageNotFoundError
+
         try:
             prs = Presentation(path_to_presentation)
         except (KeyError, PackageNotFoundError) as err:
@@ -186,12 +431,22 @@ class PresentationIndex(object):
 
             reference: https://python-pptx.readthedocs.io/en/latest/api/presentation.html#coreproperties-objects
         """
+        if self.engine == 'stream':
+            return self.analyze(path_to_presentation).core_properties
 
         prs = self.get_presentation_object(path_to_presentation)
 
         if not prs:
             return dict()
 
+        return self.get_properties(prs)
+
+    def get_properties(self, prs):
+        """
+            input: prs: presentation object
+
+            returns: a dictionary of the core properties, empty values removed and datetime converted to string
+        """
         fields = dict(author=prs.core_properties.author,
                       comments=prs.core_properties.comments,
                       category=prs.core_properties.category,
@@ -208,6 +463,14 @@ class PresentationIndex(object):
                       modified=prs.core_properties.modified,
                       content_status=prs.core_properties.content_status 
                     )
+        return self.clean_properties(fields)
+
+    def clean_properties(self, fields):
+        """
+            input: fields: dictionary of the core properties
+
+            returns: the dictionary, empty values removed and datetime converted to string
+        """
         # Remove empty fields, convert datetime to string
         for key, value in list(fields.items()):
             if value in ('', ' ') or value == None:                   
@@ -249,6 +512,136 @@ class PresentationIndex(object):
 
         return (keywords, stat)
 
+    def get_tags(self, remote_name, stat=None):
+        """
+            input: remote_name: name of the object within the bucket
+                   stat: optional, the stat object of the object, if its headers report the object has
+                         no tags (x-amz-tagging-count), the tags are not requested
+
+            returns: a dictionary of the tags of the object
+        """
+        if stat is not None and stat.metadata.get('x-amz-tagging-count') == '0':
+            return dict()
+        return dict(self.minioClient.get_object_tags(self.bucket, remote_name) or {})
+
+    def put_tags(self, remote_name, tags=None, remove=(), replace=False):
+        """
+            Change the tags of an object, the data (and the etag and last modified time) of the object is
+            not changed. Thread safe, the error is returned rather than stored in error_message.
+
+            input: remote_name: name of the object within the bucket
+                   tags: optional, a dictionary of the tags to add or change
+                   remove: the keys of tags to remove
+                   replace: if True, the tags of the object are replaced by `tags`, the current tags are not read
+
+            returns: a tuple of the tags of the object (None indicating an error) and an error message (or None)
+                     If a catalog is configured, the tags of the object in the catalog are replaced,
+                     and if a manifest is configured, in the manifest.
+        """
+        try:
+            current = dict() if replace else self.get_tags(remote_name)
+            updated = {key: value for key, value in dict(current, **(tags or {})).items() if key not in remove}
+            for key, value in updated.items():
+                if len(key) > PresentationIndex.MAX_KEY_LEN or len(value) > PresentationIndex.MAX_VALUE_LEN:
+                    return (None, 'PUT_TAGS:ERROR {} tag {} key or value length exceeds max values'.format(remote_name, key))
+            if len(updated) > PresentationIndex.MAX_TAGS:
+                return (None, 'PUT_TAGS:ERROR {} has {} tags, the limit is {}'.format(remote_name, len(updated),
+                                                                                      PresentationIndex.MAX_TAGS))
+            changed = replace or updated != current
+            if changed and updated:
+                result = Tags(for_object=True)
+                result.update(updated)
+                self.minioClient.set_object_tags(self.bucket, remote_name, result)
+            elif changed:
+                self.minioClient.delete_object_tags(self.bucket, remote_name)
+        except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+            return (None, 'PUT_TAGS:ERROR {} {}'.format(remote_name, err))
+
+        if self.catalog and self.catalog.tags(remote_name) != updated:
+            self.catalog.set_tags(remote_name, updated)
+        if self.manifest and changed:
+            self.manifest.set_tags(remote_name, updated)
+        return (updated, None)
+
+    def concurrently(self, function, remote_names, workers=None):
+        """
+            Generator, call the function for many objects concurrently. The requests are issued by a pool of threads
+            sharing the connections of the Minio client, the results are returned as each call completes (not in
+            the order of remote_names). No more than twice the number of threads are pending at a time, so
+            remote_names may be a generator, for example the object names of list_objects().
+
+            input: function: called with the name of an object
+                   remote_names: an iterable of the names of objects within the bucket
+                   workers: number of threads, the default is max_connections
+
+            returns: a tuple (remote_name, future) for each object
+        """
+        workers = min(workers or self.max_connections, self.max_connections)
+        remote_names = iter(remote_names)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = dict()
+            while True:
+                for remote_name in remote_names:
+                    pending[executor.submit(function, remote_name)] = remote_name
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    return
+
+                (done, _) = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), future)
+
+    def get_metadata_many(self, remote_names, workers=None, tags=False):
+        """
+            Generator, stat many objects concurrently, refer to concurrently()
+
+            input: remote_names: an iterable of the names of objects within the bucket
+                   workers: number of threads, the default is max_connections
+                   tags: if True, the tags of each object are also read, refer to get_tags()
+
+            returns: a tuple (remote_name, keywords, stat, tags, error) for each object, refer to get_metadata(),
+                     tags is None unless requested. If the object could not be read, keywords, stat and tags are
+                     None and error is the message
+        """
+        def read(remote_name):
+            (keywords, stat) = self.get_metadata(remote_name)
+            return (keywords, stat, self.get_tags(remote_name, stat) if tags else None)
+
+        for (remote_name, future) in self.concurrently(read, remote_names, workers=workers):
+            try:
+                (keywords, stat, object_tags) = future.result()
+            except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+                yield (remote_name, None, None, None, 'GET_METADATA:ERROR {} {}'.format(remote_name, err))
+                continue
+            yield (remote_name, keywords, stat, object_tags, None)
+
+    def get_tags_many(self, remote_names, workers=None):
+        """
+            Generator, read the tags of many objects concurrently, refer to get_tags() and concurrently()
+
+            returns: a tuple (remote_name, tags, error) for each object, tags is None if the object could not be read
+        """
+        for (remote_name, future) in self.concurrently(self.get_tags, remote_names, workers=workers):
+            try:
+                yield (remote_name, future.result(), None)
+            except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+                yield (remote_name, None, 'GET_TAGS:ERROR {} {}'.format(remote_name, err))
+
+    def put_tags_many(self, remote_names, tags=None, remove=(), replace=False, workers=None):
+        """
+            Generator, change the tags of many objects concurrently, refer to put_tags() and concurrently()
+
+            returns: a tuple (remote_name, tags, error) for each object
+        """
+        def put(remote_name):
+            return self.put_tags(remote_name, tags=tags, remove=remove, replace=replace)
+
+        for (remote_name, future) in self.concurrently(put, remote_names, workers=workers):
+            (updated, error) = future.result()
+            yield (remote_name, updated, error)
+
     def us_ascii(self, text):
         """
             Only US-ASCII is permitted as meta-data, we expect a list and return a list
@@ -266,20 +659,27 @@ class PresentationIndex(object):
 
             input: remote_name: name of the object within the bucket
                    self.bucket: name of the bucket
+                   self.url_cache: optional, a URL signed previously is returned until shortly before it expires
 
             returns: a URL
         """
+        def sign():
+            return self.minioClient.presigned_get_object(self.bucket, remote_name, expires=timedelta(days=expires))
 
-        return self.minioClient.presigned_get_object(self.bucket, remote_name, expires=timedelta(days=expires))
+        if self.url_cache is not None:
+            return self.url_cache.get_url(self.bucket, remote_name, expires, sign)
+        return sign()
 
     def list_objects(self):
         """
             input: self.bucket: name of the bucket
 
-            returns: a list of objects contained in the bucket
+            returns: a generator of the objects contained in the bucket, excluding the manifest
         """
-
-        return self.minioClient.list_objects(self.bucket, recursive=True)
+        prefix = self.manifest.prefix if self.manifest else manifest.Manifest.PREFIX
+        for obj in self.minioClient.list_objects(self.bucket, recursive=True):
+            if not obj.object_name.startswith(prefix):
+                yield obj
 
     def set_tags(self, tags, max_tags=10):
         """
@@ -300,8 +700,37 @@ class PresentationIndex(object):
                 if len(key) > PresentationIndex.MAX_KEY_LEN or len(value) > PresentationIndex.MAX_VALUE_LEN:
                     self.error_message = 'key or value length exceeds max values'
                     continue
-                result[key] = value
                 if count >= max_tags:
-                    continue
+                    self.error_message = 'more than {} tags, the remaining tags are ignored'.format(max_tags)
+                    break
+                result[key] = value
                 count += 1
         return result
+
+
+class PresentationAnalysis(object):
+    """
+        The result of PresentationIndex.analyze(), the content of a presentation from a single read of the file
+    """
+
+    def __init__(self, path_to_presentation):
+        self.path_to_presentation = path_to_presentation
+        self.text_runs = []                                # list of strings, one for each text run
+        self.core_properties = dict()                      # refer to get_core_properties()
+        self.slide_count = 0
+        self.notes = []                                    # speaker notes, one string for each slide
+        self.slides = []                                   # list of the text runs of each slide
+        self.error_message = None
+
+    @property
+    def notes_text(self):
+        """
+            The speaker notes of all slides
+        """
+        return '\n'.join(note for note in self.notes if note)
+
+    def slide_text(self):
+        """
+            returns: a list, for each slide, of the text runs and speaker notes of the slide
+        """
+        return [runs + ([note] if note else []) for runs, note in zip(self.slides, self.notes)]
@@ -15,57 +15,257 @@
 #        export PZ_SECRET_KEY="<secret key>"
 #        export PZ_DEBUG=10
 #
+#        export PZ_CATALOG='data/catalog.db'
+#        export PZ_METRICS_LOG=true                 # the time of each stage of the query as a JSON record
+#        export PZ_METRICS_FILE='data/query.prom'   # in the Prometheus text format
+#        export PZ_STATSD='127.0.0.1:8125'
+#
+#        export PZ_BM25_WEIGHTS='title=3.0,subject=2.0'  # field weights of --rank bm25, refer to credibility.bm25
+#
 #        python library/query.py -u -s 'infrastructure agility'
+#        python library/query.py --rank bm25 -s 'infrastructure agility'
+#        python library/query.py -c -s 'infrastructure agility'     # collapse near duplicates, refer to PZ_LSH
+#        python library/query.py --tag audience=external -s 'infrastructure agility'  # only objects with the tag
+#        python library/query.py --profile-startup -s 'infrastructure agility'
 #
+#     If the catalog (local index) exists, it is searched rather than the bucket, refer to reindex.py
+#     Otherwise, if the bucket has a manifest (PZ_MANIFEST=true, the default), the manifest is searched.
+#
+#     Results are ranked by Credibility (fuzzy matching), or with --rank bm25 by the rarity of the terms matched
+#     (BM25), the index of the catalog for BM25 is built when the catalog has changed and saved beside the catalog.
 #
 import os
 import argparse
-import yaml
+import heapq
+import logging
+import sys
 
-import pptxindex
-from credibility.credibility import Credibility
+from catalog import catalog
 from formatter import formatter
 from logger import logger
+from metrics import metrics
+from startup import startup
+#
+#  pptxindex (minio) and manifest are imported by main() only when the bucket is accessed, a query of the
+#  catalog without download URLs starts faster. Likewise credibility.bm25 (scipy) only for --rank bm25,
+#  and minhash only for -c. The scoring modules (credibility.engine, numpy and rapidfuzz, or fuzzywuzzy) are
+#  imported when the documents are scored and yaml when the results are written. Specify --profile-startup
+#  to report the time of each import.
+#
 level = int(os.environ.get('PZ_DEBUG', 20))
 log = logger.Logger(logger_name='query', level=level).setup()
 log.debug('Executing with log level {}'.format(level))
 
 DEPTH = 10                                                 # Default number of results to return
+COLLAPSE = 3                                               # Results scored for each result returned, collapsing near duplicates
+SLIDES = 3                                                 # Best matching slides returned for each result
+MANIFEST = os.environ.get('PZ_MANIFEST', 'true').lower() in ('1', 'true', 'yes')  # Search the manifest of the bucket
+try:
+    THRESHOLD = float(os.environ.get('PZ_NGRAM_THRESHOLD', 0.5))  # Fraction of the trigrams of the search string a candidate must share
+except ValueError:
+    THRESHOLD = 0.5
+    log.warning('ENV: could not convert value of NGRAM_THRESHOLD to float, using {}'.format(THRESHOLD))
+METRICS_LOG = os.environ.get('PZ_METRICS_LOG', 'false').lower() in ('1', 'true', 'yes')  # A JSON record of the query
+METRICS_FILE = os.environ.get('PZ_METRICS_FILE')           # Metrics of the query in the Prometheus text format
+STATSD = os.environ.get('PZ_STATSD')                       # host:port of a StatsD server
+RANKS = ('credibility', 'bm25')
+try:
+    BM25_WEIGHTS = {field.strip(): float(weight) for (field, _, weight) in
+                    (item.partition('=') for item in os.environ.get('PZ_BM25_WEIGHTS', '').split(',') if item.strip())}
+except ValueError:
+    BM25_WEIGHTS = dict()
+    log.warning('ENV: could not convert the values of BM25_WEIGHTS to float, using the default weights')
 
 
-def search_keywords(pi, search_string, depth, download_url=False):
+def search_keywords(pi, search_string, depth, download_url=False, catalog=None, threshold=THRESHOLD, early_exit=True,
+                    manifest=None, trace=None, rank=RANKS[0], clusters=None, tags=None):
     """
         Get all the objects in the bucket and determine if the string is in the meta data.
         input: pi: the class managing the connection to the object store
                search_string: what we are looking for in the meta data
+               depth: the number of results to return
                download_url: a boolean to flag if we want the download URL
+               catalog: optional local index, if specified the bucket is not scanned
+               threshold: only score objects of the catalog which share this fraction of the trigrams
+                          of the search string, 0 scores all objects
+               early_exit: skip objects whose highest possible score cannot place them in the results
+               manifest: optional manifest of the bucket, if specified (and no catalog) the bucket is not scanned
+               trace: optional metrics.Trace, the time of the stages reading (catalog or manifest), or listing
+                      and stat (bucket), the documents, scoring, sorting, the best slides and signing URLs
+               rank: 'credibility' or 'bm25', refer to credibility.bm25, the catalog is not filtered by threshold
+               clusters: optional minhash.LSHIndex, only the highest scoring object of each cluster of near duplicates
+                         is returned, listing the others as its duplicates
+               tags: optional, only objects with these tags are scored, refer to Catalog.parse_tags()
         returns: a dictionary of results
 
     """
     result = dict(imdata=[])
+    trace = trace or metrics.Trace('query')
+    (limit, depth) = (depth, depth * COLLAPSE if clusters else depth)
 
-    for object in pi.list_objects():
-        (metadata, stat) = pi.get_metadata(object.object_name)
-        cob = Credibility(search_string, metadata, object.object_name)
-        if cob.credible():
-            if download_url:
-                url = pi.get_download_url(object.object_name)
+    if catalog:
+        documents = trace.iterate(catalog.candidates(search_string, threshold, tags=tags), 'read')
+    elif manifest:
+        documents = trace.iterate(manifest.documents(tags=tags), 'read')
+    else:
+        documents = scan_bucket(pi, trace=trace, tags=tags)
+
+    with trace.stage('score'):                             # excludes the time reading the documents (and sorting)
+        if rank == 'bm25':
+            from credibility import bm25
+
+            with trace.stage('load'):                      # the index of the catalog, or of the documents read
+                index = bm25.BM25Engine.from_catalog(catalog, weights=BM25_WEIGHTS) if catalog else \
+                        bm25.BM25Engine(documents, weights=BM25_WEIGHTS)
+            docs = None
+            if catalog and tags:                           # the documents of the index with the tags
+                docs = index.positions(object_name for (object_name, _, _) in
+                                       trace.iterate(catalog.documents(tags=tags), 'read'))
+            result['imdata'] = index.search(search_string, depth=depth, docs=docs)
+        else:
+            from credibility import engine
+
+            if (catalog or manifest) and engine.AVAILABLE:
+                # score all candidates of the catalog (or manifest) in one call
+                result['imdata'] = engine.CredibilityEngine(documents).search(search_string, depth=depth)
             else:
-                url = '... specify the -u argument for a download URL'
+                # the catalog is read quickly, score the objects with the highest possible score first
+                result['imdata'] = top_results(search_string, documents, depth, early_exit=early_exit,
+                                               sort_by_bound=bool(catalog or manifest), trace=trace)
 
-            result['imdata'].append(dict(object_name=object.object_name,
-                                    last_modified=object.last_modified.isoformat(),
-                                    credibility=cob.credibility_score,
-                                    metadata=cob.metadata,
-                                    url=url))
+    if clusters:
+        with trace.stage('collapse'):
+            result['imdata'] = collapse(result['imdata'], clusters, limit)
 
-    # sort the results in decending order by the credibility score
-    ordered_results = sorted(result['imdata'], key=lambda i: i['credibility'], reverse=True)
+    # only sign URLs (and score the slides) for the results returned
+    for item in result['imdata']:
+        if catalog:
+            with trace.stage('slides'):
+                item['slides'] = best_slides(search_string, catalog.slides(item['object_name']))
+        if download_url:
+            with trace.stage('sign'):
+                item['url'] = pi.get_download_url(item['object_name'])
+        else:
+            item['url'] = '... specify the -u argument for a download URL'
 
-    result['imdata'] = ordered_results[0:depth]
+    trace.count('results', len(result['imdata']))
     return result
 
 
+def top_results(search_string, documents, depth, early_exit=True, sort_by_bound=False, trace=None):
+    """
+        Score the documents, keeping the highest `depth` credible results in a heap (a min-heap, the
+        lowest score of the results is at the top). Ties are broken by the order of the documents.
+
+        When the heap is full, a document is not scored if its upper bound is less than the lowest
+        score of the results. If the documents are first sorted by their upper bound (which requires
+        reading all the documents) the search stops at the first such document. The time sorting is
+        the stage 'sort' of the trace.
+
+        returns: a list of dictionaries in decending order by the credibility score
+    """
+    from credibility.credibility import Credibility
+
+    heap = []                                              # (credibility, -sequence, result)
+    trace = trace or metrics.Trace('query')
+    candidates = ((None, sequence, document) for sequence, document in enumerate(documents))
+
+    if early_exit and sort_by_bound:
+        candidates = [(Credibility.upper_bound(search_string, document[2], document[0]), sequence, document)
+                      for (_, sequence, document) in candidates]
+        with trace.stage('sort'):
+            candidates.sort(key=lambda c: c[0], reverse=True)
+
+    for (bound, sequence, (object_name, last_modified, metadata)) in candidates:
+        if early_exit and 0 < depth == len(heap):
+            if bound is None:
+                bound = Credibility.upper_bound(search_string, metadata, object_name)
+            if round(bound, 1) < heap[0][0]:
+                if sort_by_bound:
+                    log.debug('SEARCH: stopped after {} documents, lowest score {}'.format(sequence, heap[0][0]))
+                    break
+                continue
+
+        cob = Credibility(search_string, metadata, object_name)
+        if not cob.credible():
+            continue
+
+        item = (cob.credibility_score, -sequence, dict(object_name=object_name,
+                                                       last_modified=last_modified,
+                                                       credibility=cob.credibility_score,
+                                                       metadata=cob.metadata))
+        if len(heap) < depth:
+            heapq.heappush(heap, item)
+        elif depth > 0 and item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    with trace.stage('sort'):
+        return [result for (_, _, result) in sorted(heap, key=lambda i: i[:2], reverse=True)]
+
+
+def collapse(results, clusters, depth):
+    """
+        Keep the first (highest scoring) result of each cluster of near duplicates, the object names of the
+        other results of the cluster are listed as its duplicates
+
+        input: results: a list of dictionaries in decending order by score
+               clusters: a minhash.LSHIndex
+        returns: no more than `depth` of the results
+    """
+    cluster_of = clusters.clusters(item['object_name'] for item in results)
+    kept = dict()                                          # cluster: result
+    collapsed = []
+    for item in results:
+        cluster = cluster_of.get(item['object_name'])
+        if cluster is None:
+            collapsed.append(item)
+        elif cluster in kept:
+            kept[cluster].setdefault('duplicates', []).append(item['object_name'])
+        else:
+            kept[cluster] = item
+            collapsed.append(item)
+    return collapsed[:depth]
+
+
+def best_slides(search_string, slides, count=SLIDES):
+    """
+        Score the keywords of each slide of a result, so the user can go directly to the slides which match
+
+        input: slides: a list of tuples (slide number, keywords), refer to Catalog.slides()
+               count: the number of slides to return
+        returns: a list of dictionaries of the slide number and credibility score, in decending order by score
+    """
+    from credibility.credibility import Credibility
+
+    scored = []
+    for (number, keywords) in slides:
+        cob = Credibility(search_string, keywords, '')
+        if cob.credible():
+            scored.append(dict(slide=number, credibility=cob.credibility_score))
+
+    return heapq.nlargest(count, scored, key=lambda i: i['credibility'])
+
+
+def scan_bucket(pi, trace=None, tags=None):
+    """
+        Generator returning the object name, last modified time and metadata for each object in the bucket.
+        Each object requires a `stat_object` call (issued concurrently), use a catalog to avoid this overhead.
+        The time waiting for the listing and the stat requests are the stages 'list' and 'stat' of the trace.
+
+        tags: optional, only the objects with these tags, the tags of each object are also requested
+    """
+    trace = trace or metrics.Trace('query')
+    names = trace.iterate((obj.object_name for obj in pi.list_objects()), 'list')
+    for (object_name, metadata, stat, object_tags, error) in trace.iterate(pi.get_metadata_many(names, tags=bool(tags)),
+                                                                           'stat'):
+        if error:
+            log.error('SCAN: {}'.format(error))
+            continue
+        if tags and not catalog.Catalog.match_tags(object_tags, tags):
+            continue
+        yield (object_name, stat.last_modified.isoformat(), metadata)
+
+
 def main():
     """
         Search for the specified search string and return matching objects, optionally include a download URL
@@ -77,23 +277,99 @@ def main():
     parser.add_argument('-u', action='store_true', default=False, dest='download_url', help='display download URL')
     parser.add_argument('-s', action='store', dest='search_string', help='search string (case sensitive)')
     parser.add_argument('-d', action='store', dest='depth', type=int, default=DEPTH, help='number of results to return')
+    parser.add_argument('-t', action='store', dest='threshold', type=float, default=THRESHOLD,
+                        help='fraction (0.0 to 1.0) of the trigrams of the search string an object must share to be scored, 0 scores all objects')
+    parser.add_argument('-a', action='store_false', default=True, dest='early_exit',
+                        help='score all objects, rather than stopping when no object can score higher than the results')
+    parser.add_argument('-r', '--rank', action='store', dest='rank', choices=RANKS, default=RANKS[0],
+                        help='rank the results by credibility (fuzzy matching) or bm25 (the rarity of the terms matched)')
+    parser.add_argument('-c', action='store_true', default=False, dest='collapse',
+                        help='return only the best match of each set of near duplicates (requires the index PZ_LSH of upload.py)')
+    parser.add_argument('--tag', action='append', dest='tags', default=[], metavar='KEY=VALUE',
+                        help='only objects with this tag, repeat for more tags (values of the same key match either)')
+    parser.add_argument(startup.FLAG, action='store_true', default=False, dest='profile_startup',
+                        help='run the query, then report the time spent importing modules')
     args = parser.parse_args()
 
-    options = dict(
-        bucket=os.environ.get('PZ_BUCKET', 'nobucket'),
-        access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
-        secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'))
+    if args.profile_startup:
+        sys.exit(startup.profile())
+    try:
+        tags = catalog.Catalog.parse_tags(args.tags)
+    except ValueError as err:
+        parser.error(str(err))
+    if args.rank == 'bm25':
+        from credibility import bm25
 
-    pi = pptxindex.PresentationIndex(**options)
+        if not bm25.AVAILABLE:
+            log.error('MAIN: --rank bm25 requires numpy and scipy')
+            exit()
     #
-    #  Verify we can reach the bucket specified and our credentials are configured properly.
+    #  Search the local index if available, the bucket is only accessed to generate download URLs
     #
-    if not pi.verify_bucket_exists():
-        log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(options['bucket']))
+    cat = None
+    catalog_path = os.environ.get('PZ_CATALOG', catalog.Catalog.DEFAULT_PATH)
+    if os.path.isfile(catalog_path):
+        cat = catalog.Catalog(catalog_path)
+        log.debug('MAIN: searching catalog {} of {} objects'.format(catalog_path, cat.count()))
+
+    # the tags of objects indexed by a previous version of the catalog are read before filtering by tags
+    untagged = bool(cat is not None and tags and cat.untagged())
+
+    pi = None
+    bucket = os.environ.get('PZ_BUCKET', 'nobucket')
+    if cat is None or args.download_url or untagged:
+        import pptxindex
+
+        options = dict(
+            bucket=bucket,
+            access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
+            secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'),
+            max_connections=pptxindex.PresentationIndex.env_max_connections(log))
+
+        pi = pptxindex.PresentationIndex(**options)
+    #
+    #  Otherwise, verify we can reach the bucket specified and our credentials are configured properly.
+    #
+    if (cat is None or untagged) and not pi.verify_bucket_exists():
+        log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(bucket))
         exit()
+    #
+    #  Then the manifest of the bucket, the metadata of all objects is read with one GET for each shard
+    #
+    mf = None
+    if (cat is None or untagged) and MANIFEST:
+        from manifest import manifest
+
+        mf = manifest.Manifest(pi)
+        if not mf.exists():
+            log.debug('MAIN: bucket {} has no manifest, reading the metadata of each object'.format(bucket))
+            mf = None
+
+    if untagged:                                           # from the manifest, otherwise the bucket
+        log.info('MAIN: tags of {} objects of the catalog read'.format(cat.fill_tags(pi, mf.entries() if mf else None)))
+        mf = None
+
+    clusters = None
+    lsh_path = os.environ.get('PZ_LSH', 'data/minhash.db')
+    if args.collapse and os.path.isfile(lsh_path):
+        from minhash import minhash
+
+        clusters = minhash.LSHIndex(lsh_path)
+    elif args.collapse:
+        log.warning('MAIN: {} does not exist, near duplicates are not collapsed'.format(lsh_path))
+
+    trace = metrics.Trace('query', search_string=args.search_string, depth=args.depth)
+    result = search_keywords(pi, args.search_string, args.depth, download_url=args.download_url, catalog=cat,
+                             threshold=args.threshold, early_exit=args.early_exit, manifest=mf, trace=trace,
+                             rank=args.rank, clusters=clusters, tags=tags)
+    registry = metrics.Metrics(log=log if METRICS_LOG else None, statsd=metrics.StatsD(STATSD) if STATSD else None)
+    registry.record(trace)
+    if METRICS_FILE:
+        registry.write(METRICS_FILE)
+    if log.isEnabledFor(logging.DEBUG):
+        import yaml
 
-    result = search_keywords(pi, args.search_string, args.depth, download_url=args.download_url)
-    log.debug('RESULTS:\n{}'.format(yaml.dump(result['imdata'], default_flow_style=False)))
+        log.debug('RESULTS:\n{}'.format(yaml.dump(result['imdata'], default_flow_style=False)))
     formatter.format_output(result['imdata'])
 
 
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: in-memory caches of query results and presigned download URLs, LRU eviction and TTL
+#
+#     usage:
+#       >>> from querycache import querycache
+#       >>> results = querycache.QueryCache(maxsize=256, ttl=3600)
+#       >>> key = results.key('infrastructure agility', depth=10, version=cat.generation())
+#       >>> imdata = results.get(key)              # None if not cached, expired, or the index has changed
+#       >>> results.put(key, imdata)
+#       >>> pi.url_cache = querycache.URLCache()   # PresentationIndex.get_download_url() reuses URLs
+#       >>> results.stats()
+#       {'size': 1, 'maxsize': 256, 'hits': 0, 'misses': 1, 'evictions': 0, 'expired': 0, 'invalidated': 0}
+#
+#     The version of the index (for example Catalog.generation()) is part of the key of a query, when the
+#     index changes every entry of an older version is removed (invalidated), so a stale result is never returned.
+#
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """
+        Thread safe, a dictionary of at most maxsize entries, the least recently used entry is evicted
+        to add another. An entry older than ttl seconds is not returned.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        """
+            input: maxsize: the number of entries, 0 disables the cache
+                   ttl: optional, seconds an entry is returned after it is added
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()          # key: (expires, value), the least recently used first
+        self.version = None
+        self.counts = collections.Counter(hits=0, misses=0, evictions=0, expired=0, invalidated=0)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def validate(self, version):
+        """
+            Remove every entry if the version of the index has changed since the last call
+        """
+        with self.lock:
+            if version != self.version:
+                self.counts['invalidated'] += len(self.entries)
+                self.entries.clear()
+                self.version = version
+
+    def get(self, key, now=None):
+        """
+            returns: the value, or None if the key is not cached or the entry has expired
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counts['misses'] += 1
+                return None
+            if entry[0] is not None and entry[0] <= now:
+                del self.entries[key]
+                self.counts['expired'] += 1
+                self.counts['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counts['hits'] += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None, now=None):
+        """
+            Add or replace an entry
+
+            input: ttl: optional, seconds the entry is returned, default the ttl of the cache
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time() if now is None else now
+        with self.lock:
+            self.entries[key] = (now + ttl if ttl else None, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.counts['evictions'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+            returns: a dictionary of the number of entries, and the hits, misses, evictions, expired and invalidated
+        """
+        with self.lock:
+            return dict(size=len(self.entries), maxsize=self.maxsize, **self.counts)
+
+
+class QueryCache(LRUCache):
+    """
+        The results of queries, by the search string (normalized), the number of results, the options of
+        the query and the version of the index searched
+    """
+
+    @staticmethod
+    def key(search_string, depth, version=None, **options):
+        """
+            returns: the key of a query, the search string with leading, trailing and repeated spaces removed
+                     (the search string is case sensitive), the options (threshold, rank ...) in order of name
+        """
+        return (' '.join((search_string or '').split()), depth, version, tuple(sorted(options.items())))
+
+    def get(self, key, now=None):
+        """
+            returns: the results, or None, refer to LRUCache.get(). The version of the key is validated, when
+                     it differs from the version of the cached results all results are removed.
+        """
+        self.validate(key[2])
+        results = super().get(key, now=now)
+        return None if results is None else [dict(item) for item in results]   # the caller adds to each result
+
+    def put(self, key, results, ttl=None, now=None):
+        """
+            Add the results, a list of dictionaries, a copy of each result is cached
+        """
+        self.validate(key[2])
+        super().put(key, [dict(item) for item in results], ttl=ttl, now=now)
+
+
+class URLCache(LRUCache):
+    """
+        Presigned download URLs, a URL is valid for `expires` days and is reused until MARGIN seconds
+        (or half its validity, if shorter) before it expires, so a URL returned is valid for at least that long.
+    """
+    MARGIN = 3600
+
+    def __init__(self, maxsize=4096, margin=MARGIN):
+        super().__init__(maxsize=maxsize)
+        self.margin = margin
+
+    def get_url(self, bucket, remote_name, expires, sign):
+        """
+            input: expires: days the URL is valid
+                   sign: a function returning a new URL, called if there is no URL to reuse
+            returns: a URL
+        """
+        key = (bucket, remote_name, expires)
+        url = self.get(key)
+        if url is None:
+            url = sign()
+            validity = expires * 86400
+            self.put(key, url, ttl=validity - min(self.margin, validity / 2))
+        return url
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: build (or rebuild) the local catalog of object metadata used by query.py
+#
+#     usage:
+#        export PZ_BUCKET="name of bucket"
+#        export PZ_ACCESS_KEY="<access key>"
+#        export PZ_SECRET_KEY="<secret key>"
+#        export PZ_CATALOG='data/catalog.db'
+#        export PZ_DEBUG=10
+#
+#        python3 library/reindex.py           # incremental, only new or changed objects are read
+#        python3 library/reindex.py --full    # rebuild, the metadata of every object is read
+#        python3 library/reindex.py --manifest  # also rewrite the manifest in the bucket from the catalog
+#        python3 library/reindex.py --index   # also write the index mapped by service.py, PZ_INDEX or catalog + '.idx'
+#
+import argparse
+import os
+import time
+
+from minio.error import InvalidResponseError
+from minio.error import S3Error
+from minio.error import ServerError
+from urllib3.exceptions import HTTPError
+
+import pptxindex
+from catalog import catalog
+from logger import logger
+from manifest import manifest
+from mmapindex import mmapindex
+
+opts = dict(
+        level=int(os.environ.get('PZ_DEBUG', 20)),
+        file_name=(os.environ.get('PZ_LOG_FILE')),
+        logger_name='reindex')
+
+log = logger.Logger(**opts).setup()
+
+MANIFEST = os.environ.get('PZ_MANIFEST', 'true').lower() in ('1', 'true', 'yes')  # Update the manifest in the bucket
+
+
+def main():
+    """
+        Read the metadata of new or changed objects in the bucket (or every object with --full)
+        and store it in the local catalog.
+    """
+    parser = argparse.ArgumentParser(description='Build the local catalog of object metadata', add_help=True)
+    parser.add_argument('--full', action='store_true', default=False, dest='full', help='rebuild the entire catalog')
+    parser.add_argument('--manifest', action='store_true', default=False, dest='manifest',
+                        help='rewrite the manifest in the bucket from the catalog')
+    parser.add_argument('--index', action='store_true', default=False, dest='index',
+                        help='write the index file of the catalog, if the catalog changed, refer to mmapindex')
+    args = parser.parse_args()
+
+    options = dict(
+        bucket=os.environ.get('PZ_BUCKET', 'nobucket'),
+        access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
+        secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'),
+        max_connections=pptxindex.PresentationIndex.env_max_connections(log))
+
+    pi = pptxindex.PresentationIndex(**options)
+
+    if not pi.verify_bucket_exists():
+        log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(options['bucket']))
+        exit()
+
+    catalog_path = os.environ.get('PZ_CATALOG', catalog.Catalog.DEFAULT_PATH)
+    cat = catalog.Catalog(catalog_path)
+
+    if MANIFEST and not args.manifest:                     # the changes found are recorded in an existing manifest
+        pi.manifest = manifest.Manifest(pi)
+        if not pi.manifest.exists():
+            pi.manifest = None
+
+    start = time.time()
+    if args.full:
+        counts = cat.refresh(pi)
+    else:
+        counts = cat.sync(pi)
+    log.info('MAIN: {} in {} seconds, catalog: {}'.format(counts, round(time.time() - start, 2), catalog_path))
+
+    if pi.manifest:
+        try:
+            log.info('MAIN: {} shards of the manifest updated'.format(pi.manifest.flush()))
+        except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+            log.error('MAIN: updating the manifest {}, run reindex.py --manifest'.format(err))
+
+    if args.manifest:
+        start = time.time()
+        count = manifest.Manifest(pi).rebuild(cat.entries())
+        log.info('MAIN: manifest of {} objects written in {} seconds'.format(count, round(time.time() - start, 2)))
+
+    if args.index:
+        index_path = os.environ.get('PZ_INDEX', catalog_path + mmapindex.SUFFIX)
+        generation = cat.generation()
+        if mmapindex.generation_of(index_path) == generation:
+            log.info('MAIN: index {} is current, generation {}'.format(index_path, generation))
+        else:
+            start = time.time()
+            try:
+                count = mmapindex.build(index_path, cat.documents(), generation=generation)
+            except ValueError as err:
+                log.error('MAIN: index {} not written, {}'.format(index_path, err))
+            else:
+                log.info('MAIN: index of {} objects written in {} seconds, {} bytes: {}'.format(
+                         count, round(time.time() - start, 2), os.path.getsize(index_path), index_path))
+    cat.close()
+
+
+if __name__ == '__main__':
+    main()
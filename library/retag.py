@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: change the tags of objects in the bucket, without uploading the objects again
+#
+#     usage:
+#        export PZ_BUCKET="name of bucket"
+#        export PZ_ACCESS_KEY="<access key>"
+#        export PZ_SECRET_KEY="<secret key>"
+#        export PZ_CATALOG='data/catalog.db'
+#        export PZ_MAX_CONNECTIONS=32               # objects tagged concurrently
+#
+#        python3 library/retag.py --tag audience=internal --set audience=external   # objects selected by their tags
+#        python3 library/retag.py --prefix 2019/ --set topic='DevNet Create' --remove type
+#        python3 library/retag.py -f names.txt --set type=demo                       # object names, one per line
+#        python3 library/retag.py --all --set owner=marketing -n                     # list the objects, no changes
+#
+#     The tags of each object are read, changed and written with `set_object_tags`, the data, etag and
+#     last modified time of the objects are not changed. The tags in the catalog (and the manifest, unless
+#     PZ_MANIFEST=false) are updated. Objects are selected from the catalog if it exists, otherwise from
+#     the manifest, otherwise by listing the bucket.
+#
+import argparse
+import os
+import sys
+import time
+
+from minio.error import InvalidResponseError
+from minio.error import S3Error
+from minio.error import ServerError
+from urllib3.exceptions import HTTPError
+
+import pptxindex
+from catalog import catalog
+from logger import logger
+from manifest import manifest
+
+opts = dict(
+        level=int(os.environ.get('PZ_DEBUG', 20)),
+        file_name=(os.environ.get('PZ_LOG_FILE')),
+        logger_name='retag')
+
+log = logger.Logger(**opts).setup()
+
+MANIFEST = os.environ.get('PZ_MANIFEST', 'true').lower() in ('1', 'true', 'yes')  # Update the manifest in the bucket
+
+
+def read_names(path):
+    """
+        Generator returning the object names of a file, one per line, '-' reads standard input
+    """
+    f = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def select_objects(pi, tags=None, prefix=None):
+    """
+        Generator returning the names of the objects with the tags and prefix, from the catalog of pi,
+        otherwise its manifest, otherwise the bucket (reading the tags of each object if tags are specified)
+    """
+    if pi.catalog:
+        if tags:                                           # tags not known by a previous version of the catalog
+            pi.catalog.fill_tags(pi, pi.manifest.entries() if pi.manifest else None)
+        names = (object_name for (object_name, _, _) in pi.catalog.documents(tags=tags))
+    elif pi.manifest:
+        names = (object_name for (object_name, _, _) in pi.manifest.documents(tags=tags))
+    elif tags:
+        names = (object_name for (object_name, _, _, object_tags, error) in
+                 pi.get_metadata_many((obj.object_name for obj in pi.list_objects()), tags=True)
+                 if not error and catalog.Catalog.match_tags(object_tags, tags))
+    else:
+        names = (obj.object_name for obj in pi.list_objects())
+
+    for object_name in names:
+        if not prefix or object_name.startswith(prefix):
+            yield object_name
+
+
+def main():
+    """
+        Change the tags of the objects selected, concurrently
+    """
+    parser = argparse.ArgumentParser(description='Change the tags of objects in the bucket', add_help=True)
+    parser.add_argument('objects', nargs='*', help='names of objects')
+    parser.add_argument('-f', action='store', dest='file', default=None, help="file of object names, one per line, '-' for stdin")
+    parser.add_argument('--tag', action='append', dest='tags', default=[], metavar='KEY=VALUE',
+                        help='select the objects with this tag, repeat for more tags')
+    parser.add_argument('--prefix', action='store', dest='prefix', default=None, help='select the objects with this prefix')
+    parser.add_argument('--all', action='store_true', default=False, dest='all', help='select all objects')
+    parser.add_argument('--set', action='append', dest='set', default=[], metavar='KEY=VALUE', help='add or change a tag')
+    parser.add_argument('--remove', action='append', dest='remove', default=[], metavar='KEY', help='remove a tag')
+    parser.add_argument('--replace', action='store_true', default=False, dest='replace',
+                        help='replace all tags of the objects with the tags of --set')
+    parser.add_argument('-n', action='store_true', default=False, dest='dry_run', help='list the objects selected, no changes')
+    args = parser.parse_args()
+
+    try:
+        selection = catalog.Catalog.parse_tags(args.tags)
+    except ValueError as err:
+        parser.error(str(err))
+    changes = dict()
+    for item in args.set:
+        (key, equals, value) = item.partition('=')
+        if not equals or not key.strip():
+            parser.error('--set {} is not key=value'.format(item))
+        changes[key.strip()] = value.strip()
+    if not (changes or args.remove or args.replace):
+        parser.error('specify the tags to --set, --remove or --replace')
+    if not (args.objects or args.file or selection or args.prefix or args.all):
+        parser.error('specify the objects, -f, --tag, --prefix or --all')
+
+    options = dict(
+        bucket=os.environ.get('PZ_BUCKET', 'nobucket'),
+        access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
+        secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'),
+        max_connections=pptxindex.PresentationIndex.env_max_connections(log))
+
+    catalog_path = os.environ.get('PZ_CATALOG', catalog.Catalog.DEFAULT_PATH)
+    if os.path.isfile(catalog_path):
+        options['catalog'] = catalog.Catalog(catalog_path)
+
+    pi = pptxindex.PresentationIndex(**options)
+
+    if not pi.verify_bucket_exists():
+        log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(options['bucket']))
+        exit()
+
+    if MANIFEST:                                           # only the entries of an existing manifest are updated
+        pi.manifest = manifest.Manifest(pi)
+        if not pi.manifest.exists():
+            pi.manifest = None
+
+    if args.objects or args.file:
+        names = list(args.objects) + (list(read_names(args.file)) if args.file else [])
+        names = [name for name in names if not args.prefix or name.startswith(args.prefix)]
+    else:                                                  # read before the tags (and the catalog) are changed
+        names = list(select_objects(pi, tags=selection, prefix=args.prefix))
+
+    if args.dry_run:
+        for object_name in names:
+            print(object_name)
+        return
+
+    log.info('MAIN: {} objects selected'.format(len(names)))
+    start = time.time()
+    counts = dict(tagged=0, errors=0)
+    for (object_name, tags, error) in pi.put_tags_many(names, tags=changes, remove=set(args.remove),
+                                                       replace=args.replace):
+        if error:
+            log.error('MAIN: {}'.format(error))
+            counts['errors'] += 1
+            continue
+        log.debug('MAIN: {} {}'.format(object_name, tags))
+        counts['tagged'] += 1
+    log.info('MAIN: {} in {} seconds'.format(counts, round(time.time() - start, 2)))
+
+    if pi.manifest:
+        try:
+            log.info('MAIN: {} shards of the manifest updated'.format(pi.manifest.flush()))
+        except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+            log.error('MAIN: updating the manifest {}, run reindex.py --manifest'.format(err))
+    if pi.catalog:
+        pi.catalog.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: search service, query the metadata of the object store over HTTP (JSON)
+#
+#     usage:
+#        export PZ_BUCKET="name of bucket"
+#        export PZ_ACCESS_KEY="<access key>"
+#        export PZ_SECRET_KEY="<secret key>"
+#        export PZ_CATALOG='data/catalog.db'
+#        export PZ_SERVICE_PORT=8080
+#        export PZ_REFRESH=300
+#        export PZ_QUERY_CACHE=256                  # results of queries cached, 0 disables the cache
+#        export PZ_QUERY_CACHE_TTL=3600             # seconds the results of a query are cached
+#        export PZ_URL_CACHE=4096                   # presigned download URLs reused, 0 disables the cache
+#        export PZ_INDEX='data/catalog.db.idx'      # optional, the index written by reindex.py --index
+#
+#        python3 library/service.py
+#        python3 library/service.py --workers 4    # processes sharing the port and the pages of PZ_INDEX
+#
+#        curl 'http://127.0.0.1:8080/search?s=infrastructure+agility&d=10&u=1&t=0.5'
+#        curl -d '{"search_string": "infrastructure agility", "depth": 10, "threshold": 0.5}' http://127.0.0.1:8080/search
+#        curl http://127.0.0.1:8080/status         # includes the hits and misses of the caches
+#        curl http://127.0.0.1:8080/metrics      # the time of each stage of the queries, Prometheus text format
+#
+#     The metadata of all objects is held in memory (read from the catalog if it exists, otherwise from
+#     the manifest or the bucket) and refreshed in the background, each query only scores the metadata in memory.
+#     The results of a query are cached by the search string, depth, threshold and the version of the index,
+#     and a download URL is reused until shortly before it expires, both caches are cleared when the index changes.
+#
+#     If PZ_INDEX is set, the metadata is not loaded: the index file is mapped (refer to mmapindex) and reopened
+#     when reindex.py --index replaces it, so worker processes (--workers) share one copy of the index.
+#
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import time
+from urllib.parse import urlsplit, parse_qs
+
+import pptxindex
+import query
+from catalog import catalog
+from credibility import engine
+from logger import logger
+from manifest import manifest
+from metrics import metrics
+from mmapindex import mmapindex
+from querycache import querycache
+
+opts = dict(
+        level=int(os.environ.get('PZ_DEBUG', 20)),
+        file_name=(os.environ.get('PZ_LOG_FILE')),
+        logger_name='service')
+
+log = logger.Logger(**opts).setup()
+
+try:
+    PORT = int(os.environ.get('PZ_SERVICE_PORT', 8080))
+except ValueError:
+    PORT = 8080
+    log.warning('ENV: could not convert value of SERVICE_PORT to int, using {}'.format(PORT))
+
+try:
+    REFRESH = float(os.environ.get('PZ_REFRESH', 300))      # Seconds between refreshes of the index
+except ValueError:
+    REFRESH = 300.0
+    log.warning('ENV: could not convert value of REFRESH to float, using {}'.format(REFRESH))
+
+try:
+    QUERY_CACHE = int(os.environ.get('PZ_QUERY_CACHE', 256))  # Results of queries cached, 0 disables the cache
+except ValueError:
+    QUERY_CACHE = 256
+    log.warning('ENV: could not convert value of QUERY_CACHE to int, using {}'.format(QUERY_CACHE))
+
+try:
+    QUERY_CACHE_TTL = float(os.environ.get('PZ_QUERY_CACHE_TTL', 3600))  # Seconds the results of a query are cached
+except ValueError:
+    QUERY_CACHE_TTL = 3600.0
+    log.warning('ENV: could not convert value of QUERY_CACHE_TTL to float, using {}'.format(QUERY_CACHE_TTL))
+
+try:
+    URL_CACHE = int(os.environ.get('PZ_URL_CACHE', 4096))  # Presigned download URLs reused, 0 disables the cache
+except ValueError:
+    URL_CACHE = 4096
+    log.warning('ENV: could not convert value of URL_CACHE to int, using {}'.format(URL_CACHE))
+
+HOST = os.environ.get('PZ_SERVICE_HOST', '127.0.0.1')
+INDEX = os.environ.get('PZ_INDEX')                         # The index written by reindex.py --index, refer to mmapindex
+METRICS_LOG = os.environ.get('PZ_METRICS_LOG', 'false').lower() in ('1', 'true', 'yes')  # A JSON record of each query
+STATSD = os.environ.get('PZ_STATSD')                       # host:port of a StatsD server
+MAX_DEPTH = 100                                            # Upper limit of the number of results of a query
+MAX_REQUEST = 2**16                                        # Upper limit of the size of a request body
+
+
+class SearchIndex(object):
+    """
+        A snapshot of the metadata of all objects. When NumPy and rapidfuzz are available, the metadata
+        is tokenized once (CredibilityEngine) when the snapshot is loaded, rather than for each query,
+        and the trigrams of the metadata are indexed in memory, only the candidates of the trigram
+        index are scored, refer to Catalog.candidates(). A snapshot is never modified, a refresh replaces it.
+    """
+
+    def __init__(self, documents, version=None):
+        """
+            input: documents: an iterable of tuples (object_name, last_modified, metadata)
+                   version: identifies the snapshot, the results of queries cached are of this version
+        """
+        self.documents = [(object_name, last_modified, [item for item in metadata if item])
+                          for (object_name, last_modified, metadata) in documents]
+        self.engine = None
+        self.postings = dict()                             # trigram: array of the indexes of the documents
+
+        if engine.AVAILABLE:
+            self.engine = engine.CredibilityEngine(self.documents)
+            postings = dict()
+            for doc, (_, _, metadata) in enumerate(self.documents):
+                for gram in catalog.Catalog.keyword_trigrams(metadata):
+                    postings.setdefault(gram, []).append(doc)
+            self.postings = {gram: engine.np.array(docs, dtype=engine.np.int64) for gram, docs in postings.items()}
+
+        self.version = version
+        self.loaded = time.time()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def candidates(self, search_string, threshold):
+        """
+            returns: an array of the indexes of the documents sharing at least the threshold (a fraction)
+                     of the trigrams of the search string, or None for all documents
+        """
+        grams = catalog.Catalog.trigrams(search_string)
+        if not grams or threshold <= 0:
+            return None
+
+        minimum = max(1, math.ceil(min(threshold, 1.0) * len(grams)))
+        postings = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not postings:
+            return engine.np.zeros(0, dtype=engine.np.int64)
+        counts = engine.np.bincount(engine.np.concatenate(postings), minlength=len(self.documents))
+        return engine.np.flatnonzero(counts >= minimum)
+
+    def search(self, search_string, depth, threshold=query.THRESHOLD, trace=None):
+        """
+            returns: a list of dictionaries of the highest `depth` results, refer to query.search_keywords()
+        """
+        if self.engine:
+            return self.engine.search(search_string, depth=depth, docs=self.candidates(search_string, threshold))
+        return query.top_results(search_string, self.documents, depth, sort_by_bound=True, trace=trace)
+
+
+class SearchService(object):
+    """
+        Serve queries over HTTP with asyncio. Scoring is CPU bound and generating download URLs
+        may access the object store, both run in the default executor (a thread pool) so the
+        event loop continues to accept requests.
+    """
+
+    def __init__(self, pi, cat=None, refresh=REFRESH, mf=None, registry=None, query_cache=QUERY_CACHE,
+                 query_cache_ttl=QUERY_CACHE_TTL, url_cache=URL_CACHE, index_path=None):
+        """
+            input: pi: the class managing the connection to the object store
+                   cat: optional catalog, the index is loaded from the catalog rather than the bucket
+                   mf: optional manifest, the index is loaded from the manifest if there is no catalog
+                   refresh: seconds between refreshes of the index, 0 disables refreshing
+                   registry: optional metrics.Metrics, the time of each stage of loading and of the queries
+                   query_cache, query_cache_ttl: the number of queries whose results are cached and for how
+                                                 many seconds, refer to querycache.QueryCache
+                   url_cache: the number of presigned download URLs reused, refer to querycache.URLCache
+                   index_path: optional, the index is mapped from this file (refer to mmapindex) rather than
+                               loaded, the catalog is only read for the slides of the results
+        """
+        self.pi = pi
+        self.catalog = cat
+        self.manifest = mf
+        self.refresh = refresh
+        self.index_path = index_path
+        self.index = SearchIndex([], version=0)
+        self.cache = querycache.QueryCache(maxsize=query_cache, ttl=query_cache_ttl)
+        self.url_cache = querycache.URLCache(maxsize=url_cache)
+        if url_cache > 0:
+            self.pi.url_cache = self.url_cache
+        self.queries = 0
+        self.started = time.time()
+        self.metrics = registry or metrics.Metrics()
+
+    def load(self):
+        """
+            Executed in a thread, synchronize the catalog with the bucket (or read the manifest,
+            or scan the bucket) and replace the index with a new snapshot.
+        """
+        start = time.time()
+        trace = metrics.Trace('load')
+        if self.index_path:
+            self.open_index(trace)
+            self.metrics.record(trace)
+            return
+
+        if self.catalog:
+            with trace.stage('sync'):
+                counts = self.catalog.sync(self.pi)
+            if len(self.index) and not (counts['added'] or counts['changed'] or counts['deleted']):
+                log.debug('LOAD: catalog unchanged {}'.format(counts))
+                self.metrics.record(trace)
+                return
+            documents = trace.iterate(self.catalog.documents(), 'read')
+        elif self.manifest:
+            documents = trace.iterate(self.manifest.documents(), 'read')
+        else:
+            documents = query.scan_bucket(self.pi, trace=trace)
+
+        with trace.stage('index'):
+            # the version of the catalog, otherwise each snapshot is a new version
+            version = self.catalog.generation() if self.catalog else self.index.version + 1
+            self.index = SearchIndex(documents, version=version)
+        trace.count('objects', len(self.index))
+        self.metrics.record(trace)
+        log.info('LOAD: {} objects in {} seconds'.format(len(self.index), round(time.time() - start, 2)))
+
+    def open_index(self, trace):
+        """
+            Map the index file, unless the file mapped has not been replaced since it was opened. The
+            previous index is not closed, queries in progress continue to read it.
+        """
+        if isinstance(self.index, mmapindex.MappedIndex) and not self.index.changed():
+            log.debug('LOAD: index {} unchanged'.format(self.index_path))
+            return
+        with trace.stage('open'):
+            index = mmapindex.MappedIndex(self.index_path)
+        if index.version is None:                          # built without a catalog, each file is a new version
+            index.version = self.index.version + 1
+        self.index = index
+        trace.count('objects', len(index))
+        log.info('LOAD: {} objects mapped from {} version {}'.format(len(index), self.index_path, index.version))
+
+    async def refresh_index(self):
+        """
+            Refresh the index in the background, queries use the previous snapshot until it is replaced
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await loop.run_in_executor(None, self.load)
+            except Exception as err:                       # keep serving the previous snapshot
+                log.error('REFRESH: {}'.format(err))
+
+    def search(self, search_string, depth, download_url=False, threshold=query.THRESHOLD):
+        """
+            Executed in a thread, returns the results of the query as a dictionary, refer to query.search_keywords()
+        """
+        index = self.index
+        start = time.perf_counter()
+        trace = metrics.Trace('query', search_string=search_string, depth=depth)
+        self.url_cache.validate(index.version)
+        key = self.cache.key(search_string, depth, version=index.version, threshold=threshold)
+        imdata = self.cache.get(key)
+        if imdata is not None:
+            trace.count('cached')
+        else:
+            with trace.stage('score'):
+                imdata = index.search(search_string, depth, threshold, trace=trace)
+            if self.catalog:
+                for item in imdata:
+                    with trace.stage('slides'):
+                        item['slides'] = query.best_slides(search_string, self.catalog.slides(item['object_name']))
+            self.cache.put(key, imdata)
+
+        for item in imdata:
+            if download_url:
+                with trace.stage('sign'):
+                    item['url'] = self.pi.get_download_url(item['object_name'])
+            else:
+                item['url'] = None
+
+        self.queries += 1
+        trace.count('results', len(imdata))
+        self.metrics.record(trace)
+        return dict(imdata=imdata, totalCount=len(imdata), objects=len(index),
+                    milliseconds=round(1000 * (time.perf_counter() - start), 3))
+
+    def status(self):
+        """
+            returns: a dictionary describing the index and the service
+        """
+        return dict(objects=len(self.index), engine=self.index.engine is not None, queries=self.queries, pid=os.getpid(),
+                    mapped=isinstance(self.index, mmapindex.MappedIndex),
+                    loaded=round(self.index.loaded, 3), uptime=round(time.time() - self.started, 3),
+                    version=self.index.version, query_cache=self.cache.stats(), url_cache=self.url_cache.stats())
+
+    async def handle(self, reader, writer):
+        """
+            Handle the requests of a connection (HTTP/1.1 with keep-alive)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                (method, target, headers, body) = request
+                url = urlsplit(target)
+
+                if url.path == '/status' and method == 'GET':
+                    (code, payload) = (200, self.status())
+                elif url.path == '/metrics' and method == 'GET':
+                    (code, payload) = (200, self.metrics.prometheus())
+                elif url.path == '/search' and method in ('GET', 'POST'):
+                    try:
+                        args = search_arguments(method, url.query, body)
+                    except ValueError as err:
+                        (code, payload) = (400, dict(error=str(err)))
+                    else:
+                        try:
+                            (code, payload) = (200, await loop.run_in_executor(None, lambda: self.search(*args)))
+                        except Exception as err:           # the search failed, the connection is kept
+                            log.error('HANDLE: search {}: {!r}'.format(args[0], err))
+                            (code, payload) = (500, dict(error='internal error'))
+                else:
+                    (code, payload) = (404, dict(error='not found: {} {}'.format(method, url.path)))
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, code, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ValueError as err:                          # malformed request
+            log.debug('HANDLE: {}'.format(err))
+            write_response(writer, 400, dict(error=str(err)), False)
+        except Exception as err:                           # a response is written, rather than closing the connection
+            log.error('HANDLE: {!r}'.format(err))
+            write_response(writer, 500, dict(error='internal error'), False)
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT, sock=None):
+        """
+            Load the index, then accept connections until cancelled
+
+            input: sock: optional, a listening socket (shared by worker processes) rather than host and port
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.load)
+
+        if sock:
+            server = await asyncio.start_server(self.handle, sock=sock)
+            log.info('SERVE: worker {} listening on {}:{}'.format(os.getpid(), *sock.getsockname()[:2]))
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            log.info('SERVE: listening on {}:{}'.format(host, port))
+
+        tasks = [asyncio.create_task(server.serve_forever())]
+        if self.refresh > 0:
+            tasks.append(asyncio.create_task(self.refresh_index()))
+        await asyncio.gather(*tasks)
+
+
+async def read_request(reader):
+    """
+        returns: a tuple (method, target, headers, body) or None if the connection is closed
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+
+    try:
+        (method, target, version) = line.decode('latin-1').split()
+    except ValueError:
+        raise ValueError('malformed request line')
+
+    headers = dict()
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        (name, _, value) = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if version == 'HTTP/1.0' and headers.get('connection', '').lower() != 'keep-alive':
+        headers['connection'] = 'close'
+
+    length = int(headers.get('content-length', 0))
+    if length > MAX_REQUEST:
+        raise ValueError('request body too large')
+    body = await reader.readexactly(length) if length else b''
+
+    return (method, target, headers, body)
+
+
+def search_arguments(method, query_string, body):
+    """
+        The arguments of a search, from the query string (GET) or a JSON body (POST)
+
+        returns: a tuple (search_string, depth, download_url, threshold)
+    """
+    if method == 'POST':
+        try:
+            args = json.loads(body or b'{}')
+        except ValueError:
+            raise ValueError('body is not valid JSON')
+        if not isinstance(args, dict):
+            raise ValueError('body must be a JSON object')
+    else:
+        fields = parse_qs(query_string)
+        args = dict(search_string=fields.get('s', [''])[0], depth=fields.get('d', [query.DEPTH])[0],
+                    download_url=fields.get('u', ['0'])[0].lower() in ('1', 'true', 'yes'),
+                    threshold=fields.get('t', [query.THRESHOLD])[0])
+
+    search_string = args.get('search_string') or ''
+    if not isinstance(search_string, str) or not search_string.strip():
+        raise ValueError('a search string is required')
+    try:
+        depth = min(max(int(args.get('depth', query.DEPTH)), 0), MAX_DEPTH)
+    except (TypeError, ValueError):
+        raise ValueError('depth must be an integer')
+    try:
+        threshold = float(args.get('threshold', query.THRESHOLD))
+    except (TypeError, ValueError):
+        raise ValueError('threshold must be a number')
+
+    return (search_string, depth, bool(args.get('download_url', False)), threshold)
+
+
+def write_response(writer, code, payload, keep_alive=True):
+    """
+        Write the payload as a JSON response, or if the payload is a string, as text (Prometheus metrics)
+    """
+    reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+    if isinstance(payload, str):
+        (content_type, body) = ('text/plain; version=0.0.4', payload.encode())
+    else:
+        (content_type, body) = ('application/json', json.dumps(payload).encode())
+    head = ('HTTP/1.1 {} {}\r\n'
+            'Content-Type: {}\r\n'
+            'Content-Length: {}\r\n'
+            'Connection: {}\r\n\r\n').format(code, reasons.get(code, ''), content_type, len(body),
+                                             'keep-alive' if keep_alive else 'close')
+    writer.write(head.encode('latin-1') + body)
+
+
+def fork_workers(workers):
+    """
+        Fork the worker processes, the parent waits until every worker exits
+
+        returns: True in a worker, False in the parent
+    """
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            return True
+        children.append(pid)
+
+    log.info('MAIN: {} workers {}'.format(workers, children))
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    return False
+
+
+def main():
+    """
+        Load the index and serve queries until interrupted
+    """
+    parser = argparse.ArgumentParser(description='Search service for the metadata of the object store', add_help=True)
+    parser.add_argument('--host', action='store', dest='host', default=HOST, help='address to listen on')
+    parser.add_argument('--port', action='store', dest='port', type=int, default=PORT, help='port to listen on')
+    parser.add_argument('--refresh', action='store', dest='refresh', type=float, default=REFRESH,
+                        help='seconds between refreshes of the index, 0 disables refreshing')
+    parser.add_argument('--workers', action='store', dest='workers', type=int, default=1,
+                        help='processes serving queries, more than 1 requires PZ_INDEX')
+    args = parser.parse_args()
+
+    sock = None
+    if args.workers > 1:
+        if not INDEX:
+            parser.error('--workers requires PZ_INDEX, refer to reindex.py --index')
+        # the socket is shared, each worker connects to the object store and opens the catalog after the fork
+        sock = socket.create_server((args.host, args.port))
+        if not fork_workers(args.workers):
+            sock.close()
+            return
+
+    options = dict(
+        bucket=os.environ.get('PZ_BUCKET', 'nobucket'),
+        access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
+        secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'),
+        max_connections=pptxindex.PresentationIndex.env_max_connections(log))
+
+    pi = pptxindex.PresentationIndex(**options)
+
+    if not pi.verify_bucket_exists():
+        log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(options['bucket']))
+        exit()
+
+    cat = None
+    catalog_path = os.environ.get('PZ_CATALOG', catalog.Catalog.DEFAULT_PATH)
+    if os.path.isfile(catalog_path):
+        cat = catalog.Catalog(catalog_path)
+
+    mf = None
+    if cat is None and not INDEX and query.MANIFEST:
+        mf = manifest.Manifest(pi)
+        if not mf.exists():
+            mf = None
+
+    registry = metrics.Metrics(log=log if METRICS_LOG else None, statsd=metrics.StatsD(STATSD) if STATSD else None)
+    service = SearchService(pi, cat, refresh=args.refresh, mf=mf, registry=registry, index_path=INDEX)
+    try:
+        asyncio.run(service.serve(args.host, args.port, sock=sock))
+    except KeyboardInterrupt:
+        log.info('MAIN: {} queries served'.format(service.queries))
+    finally:
+        if cat:
+            cat.close()
+
+
+if __name__ == '__main__':
+    main()
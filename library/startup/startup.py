@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: report the time a program spends importing modules
+#
+#     usage:
+#        python library/query.py --profile-startup -s 'infrastructure agility'
+#
+#     The program is run again with `python -X importtime`, its output is not changed. The modules which
+#     took the longest to import, including the modules they import (cumulative), are reported to stderr.
+#
+import sys
+import time
+
+FLAG = '--profile-startup'
+TOP = 15                                                   # Modules listed in each section of the report
+
+
+def parse(lines):
+    """
+        input: lines: the stderr of a program run with `-X importtime`
+
+        returns: a tuple of a list of (self us, cumulative us, depth, module) and the other lines of stderr
+    """
+    imports = []
+    other = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            other.append(line)
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            (own, cumulative) = (int(fields[0]), int(fields[1]))
+        except (IndexError, ValueError):
+            continue                                       # the heading, self [us] | cumulative | imported package
+        name = fields[2].rstrip('\n')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((own, cumulative, depth, name.strip()))
+    return (imports, other)
+
+
+def report(imports, elapsed, top=TOP, out=sys.stderr):
+    """
+        Write the total import time, the slowest modules imported directly by the program (and
+        by its functions, when imported lazily), and the slowest modules excluding the modules they import
+    """
+    total = sum(own for (own, _, _, _) in imports)
+    out.write('STARTUP: {:.3f} s elapsed, {:.3f} s importing {} modules\n'.format(elapsed, total / 1e6, len(imports)))
+
+    sections = (('imported by the program', sorted((i for i in imports if i[2] == 0), key=lambda i: i[1], reverse=True)),
+                ('slowest modules', sorted(imports, key=lambda i: i[0], reverse=True)))
+    for (title, modules) in sections:
+        out.write('\n{:>15} {:>10}  {}\n'.format('cumulative ms', 'self ms', title))
+        for (own, cumulative, _, name) in modules[:top]:
+            out.write('{:15.1f} {:10.1f}  {}\n'.format(cumulative / 1e3, own / 1e3, name))
+
+
+def profile(argv=None, top=TOP):
+    """
+        Run the program again, without FLAG, reporting the time spent importing modules
+
+        input: argv: the program and its arguments, default sys.argv
+        returns: the exit status of the program
+    """
+    import subprocess                                      # only when profiling, the module is imported by every program
+
+    argv = sys.argv if argv is None else argv
+    command = [sys.executable, '-X', 'importtime'] + [arg for arg in argv if arg != FLAG]
+
+    start = time.perf_counter()
+    completed = subprocess.run(command, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+
+    (imports, other) = parse(completed.stderr.splitlines(keepends=True))
+    sys.stderr.writelines(other)                           # the log messages of the program
+    report(imports, elapsed, top=top)
+    return completed.returncode
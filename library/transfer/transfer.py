@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) 2019-2021 World Wide Technology
+#     All rights reserved.
+#
+#     author: joel.king@wwt.com (@joelwking)
+#     written:  18 October 2026
+#
+#     description: multipart uploads with parallel parts, retry with backoff and resume from a local journal
+#
+#     usage:
+#       >>> from transfer import transfer
+#       >>> xfer = transfer.Transfer(part_size=64 * 2**20, concurrency=4, journal_dir='data/journal')
+#       >>> pi = pptxindex.PresentationIndex(transfer=xfer, **options)
+#
+#     A file larger than the part size is uploaded as a multipart upload. As each part completes, its etag
+#     is recorded in a journal file. If the upload is interrupted, the next upload of the same (unchanged)
+#     file continues the multipart upload, only the missing parts are uploaded.
+#
+#     reference: https://docs.aws.amazon.com/AmazonS3/latest/userguide/mpuoverview.html
+#
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from urllib3.exceptions import HTTPError
+
+from minio.datatypes import Part
+from minio.error import InvalidResponseError
+from minio.error import S3Error
+from minio.error import ServerError
+from minio.helpers import MIN_PART_SIZE, MAX_PART_SIZE, genheaders
+
+
+class Transfer(object):
+    """
+        Upload files to the object store, the Minio SDK does not expose resuming a multipart
+        upload, the (private) methods of the client which implement the S3 API are used, minio is
+        pinned to the minor version providing them, refer to requirements.txt.
+    """
+    PART_SIZE = 64 * 2**20                                 # 64 MiB
+    CONCURRENCY = 4                                        # parts uploaded in parallel
+    RETRIES = 5                                            # attempts for each part
+    BACKOFF = 1.0                                          # seconds, doubled after each attempt
+    JOURNAL_DIR = 'data/journal'
+    RETRY_CODES = ('RequestTimeout', 'InternalError', 'SlowDown', 'ServiceUnavailable', 'RequestTimeTooSkewed')
+
+    def __init__(self, part_size=PART_SIZE, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF,
+                 journal_dir=JOURNAL_DIR):
+        """
+            input: part_size: size in bytes of each part, also the size above which files use multipart upload
+                   concurrency: number of parts of a file uploaded in parallel
+                   retries: number of attempts to upload each part (or a file smaller than the part size)
+                   backoff: seconds to wait after the first failed attempt, doubled for each attempt
+                   journal_dir: directory of the journal files, created if it does not exist
+        """
+        self.part_size = min(max(part_size, MIN_PART_SIZE), MAX_PART_SIZE)
+        self.concurrency = max(concurrency, 1)
+        self.retries = max(retries, 1)
+        self.backoff = backoff
+        self.journal_dir = journal_dir
+        self.lock = threading.Lock()
+
+        os.makedirs(journal_dir, exist_ok=True)
+
+    def retry(self, function, *args, **kwargs):
+        """
+            Call the function, retrying errors which may be transient (network errors, server errors
+            and S3 errors with a retryable code) with exponential backoff and jitter.
+        """
+        for attempt in range(self.retries):
+            try:
+                return function(*args, **kwargs)
+            except S3Error as err:
+                if err.code not in Transfer.RETRY_CODES or attempt + 1 == self.retries:
+                    raise
+            except (HTTPError, InvalidResponseError, ServerError):
+                if attempt + 1 == self.retries:
+                    raise
+            time.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.0))
+
+    def upload_file(self, client, bucket, object_name, filepath, metadata=None, tags=None,
+                    content_type='application/octet-stream'):
+        """
+            Upload a file, as a single PUT if smaller than the part size, otherwise as a resumable multipart upload
+
+            input: client: Minio client
+                   bucket: name of the bucket
+                   object_name: name of the object within the bucket
+                   filepath: location of the file on the local system
+                   metadata, tags, content_type: refer to PresentationIndex.upload_file()
+
+            returns: the result of the upload, an object with the etag of the object
+        """
+        size = os.path.getsize(filepath)
+        if size <= self.part_size:
+            return self.retry(client.fput_object, bucket, object_name, filepath, metadata=metadata, tags=tags,
+                              content_type=content_type)
+
+        headers = genheaders(metadata, None, tags, None, False)
+        headers['Content-Type'] = content_type or 'application/octet-stream'
+
+        journal_name = self.journal_name(bucket, object_name, filepath)
+        journal = self.read_journal(client, bucket, object_name, journal_name)
+        if journal is None:
+            upload_id = self.retry(client._create_multipart_upload, bucket, object_name, headers)
+            journal = dict(bucket=bucket, object_name=object_name, filepath=filepath, upload_id=upload_id,
+                           part_size=self.part_size, parts=dict())
+            self.write_journal(journal_name, journal)
+
+        part_count = (size + self.part_size - 1) // self.part_size
+        pending = [number for number in range(1, part_count + 1) if str(number) not in journal['parts']]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for _ in executor.map(lambda number: self.upload_part(client, filepath, journal, journal_name, number), pending):
+                pass
+
+        parts = [Part(int(number), etag) for number, etag in sorted(journal['parts'].items(), key=lambda i: int(i[0]))]
+        result = self.retry(client._complete_multipart_upload, bucket, object_name, journal['upload_id'], parts)
+        os.remove(journal_name)
+
+        return result
+
+    def upload_part(self, client, filepath, journal, journal_name, number):
+        """
+            Executed in a thread, upload a part of the file and record its etag in the journal
+        """
+        with open(filepath, 'rb') as f:
+            f.seek((number - 1) * journal['part_size'])
+            data = f.read(journal['part_size'])
+
+        etag = self.retry(client._upload_part, journal['bucket'], journal['object_name'], data, None,
+                          journal['upload_id'], number)
+
+        with self.lock:
+            journal['parts'][str(number)] = etag
+            self.write_journal(journal_name, journal)
+
+    def journal_name(self, bucket, object_name, filepath):
+        """
+            The journal is identified by the object and the size and modification time of the file,
+            a modified file starts a new multipart upload.
+        """
+        stat = os.stat(filepath)
+        identity = '{}/{}:{}:{}:{}'.format(bucket, object_name, stat.st_size, stat.st_mtime_ns, self.part_size)
+        return os.path.join(self.journal_dir, hashlib.sha256(identity.encode()).hexdigest() + '.json')
+
+    def read_journal(self, client, bucket, object_name, journal_name):
+        """
+            returns: the journal of an interrupted upload, or None. The parts recorded in the journal
+                     are verified with the parts the object store has received.
+        """
+        try:
+            with open(journal_name, 'r') as f:
+                journal = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        uploaded = dict()
+        marker = None
+        while True:
+            try:
+                listing = self.retry(client._list_parts, bucket, object_name, journal['upload_id'],
+                                     part_number_marker=marker)
+            except S3Error as err:
+                if err.code != 'NoSuchUpload':             # the journal is kept, the upload may be resumed later
+                    raise
+                os.remove(journal_name)                    # the upload was aborted or expired
+                return None
+            uploaded.update({str(part.part_number): part.etag for part in listing.parts})
+            if not listing.is_truncated:
+                break
+            marker = listing.next_part_number_marker
+
+        journal['parts'] = {number: etag for number, etag in journal['parts'].items() if uploaded.get(number) == etag}
+        return journal
+
+    def write_journal(self, journal_name, journal):
+        """
+            Write the journal to a temporary file and rename it, the journal is never partially written
+        """
+        temporary = journal_name + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(journal, f)
+        os.replace(temporary, journal_name)
@@ -7,23 +7,92 @@
 #     author: joel.king@wwt.com (@joelwking)
 #     written:  8 October 2019, revised 27 May 2021
 #
-#     description: Program to analyze and upload PowerPoint presentations to object store.
+#     description: Program to analyze and upload PowerPoint presentations (and PDF files) to object store.
 #
 #     usage:
 #        export PZ_BUCKET="name of bucket"
 #        export PZ_ACCESS_KEY="<access key>"
 #        export PZ_SECRET_KEY="<secret key>"
 #        export PZ_PPTX_FILES='data/upload.files'
+#        export PZ_EXTENSIONS='.pptx,.pdf'
+#        export PZ_INCLUDE='*'
+#        export PZ_EXCLUDE='archive/*,*~*'
+#        export PZ_RECURSIVE=true
+#        export PZ_DEDUPE=inode
 #        export PZ_TAGS='data/tags.json'
 #        export PZ_CUT_LINE=9.0
 #        export PZ_DEBUG=10
 #        export PZ_DEPTH=20
+#        export PZ_SLIDE_DEPTH=5
+#        export PZ_WORKERS=4
+#        export PZ_UPLOAD_CONCURRENCY=4
+#        export PZ_ENGINE=stream
+#        export PZ_CATALOG='data/catalog.db'
+#        export PZ_CACHE='data/extract.db'
+#        export PZ_FORCE=false
+#        export PZ_PART_SIZE=64
+#        export PZ_PART_CONCURRENCY=4
+#        export PZ_JOURNAL='data/journal'
+#        export PZ_MANIFEST=true
+#        export PZ_LSH='data/minhash.db'
+#        export PZ_NEAR_DUPLICATES=tag
+#        export PZ_SIMILARITY=0.8
+#        export PZ_METRICS_LOG=false
+#        export PZ_METRICS_FILE='data/upload.prom'
+#        export PZ_STATSD='127.0.0.1:8125'
 #        python3 library/upload.py
+#        python3 library/upload.py --profile-startup     # report the time spent importing modules
 #
+#     PDF files, identified by their content, are analyzed by pdf.pdfindex (pypdf), each page as a slide.
+#     Only .pptx and .pdf files are analyzed, other extensions of PZ_EXTENSIONS are skipped with a warning.
+#
+#     If the catalog (local index) exists, it is updated with the metadata of each file uploaded.
+#
+#     Files are analyzed (text extraction, RAKE and core properties) by a pool of PZ_WORKERS processes
+#     and uploaded by a pool of PZ_UPLOAD_CONCURRENCY threads. The processes are started by a fork server
+#     (spawned where it is not supported) rather than forked from this process, which is running threads.
+#
+#     The results of the analysis are cached by the hash of the file content (PZ_CACHE, an empty
+#     value disables the cache). Files which are unchanged in the bucket are not uploaded, unless PZ_FORCE=true.
+#
+#     Files larger than PZ_PART_SIZE (MiB) are uploaded in parts, PZ_PART_CONCURRENCY parts in parallel.
+#     Failed parts are retried and interrupted uploads resume from the journal in PZ_JOURNAL.
+#
+#     Unless PZ_MANIFEST=false, the metadata of each file uploaded is added to the manifest in the bucket,
+#     the shard of the file is written as each upload completes.
+#
+#     Near duplicates, files whose text is at least PZ_SIMILARITY similar to a file uploaded (the estimated
+#     Jaccard similarity of their MinHash signatures), are found in the LSH index PZ_LSH (an empty value disables
+#     the index). PZ_NEAR_DUPLICATES=tag (the default) tags each near duplicate with the id of its cluster,
+#     unless the object has the maximum number of tags, skip does not upload near duplicates, off only adds
+#     the files to the index.
+#
+#     The time of each stage of each file (parse, rake, upload ...) is logged as a JSON record if PZ_METRICS_LOG=true,
+#     sent to StatsD if PZ_STATSD is specified, and the totals written to PZ_METRICS_FILE in the Prometheus format.
+#
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import mimetypes
+import multiprocessing
 import os
 import json
+import sys
+from urllib3.exceptions import HTTPError
+from minio.error import InvalidResponseError
+from minio.error import S3Error
+from minio.error import ServerError
+
 import pptxindex
+from catalog import catalog
+from contentcache import contentcache
+from crawler import crawler
+from keyphrase import keyphrase
 from logger import logger
+from manifest import manifest
+from metrics import metrics
+from minhash import minhash
+from pdf import pdfindex
+from startup import startup
+from transfer import transfer
 
 opts = dict(
         level=int(os.environ.get('PZ_DEBUG', 20)),
@@ -44,18 +113,197 @@ except ValueError:
     DEPTH = 20
     log.warning('ENV: could not convert value of DEPTH to int, using {}'.format(DEPTH))
 
+try:
+    WORKERS = int(os.environ.get('PZ_WORKERS', os.cpu_count() or 1))
+except ValueError:
+    WORKERS = os.cpu_count() or 1
+    log.warning('ENV: could not convert value of WORKERS to int, using {}'.format(WORKERS))
+
+try:
+    UPLOAD_CONCURRENCY = int(os.environ.get('PZ_UPLOAD_CONCURRENCY', 4))
+except ValueError:
+    UPLOAD_CONCURRENCY = 4
+    log.warning('ENV: could not convert value of UPLOAD_CONCURRENCY to int, using {}'.format(UPLOAD_CONCURRENCY))
+
+ENGINE = os.environ.get('PZ_ENGINE', 'pptx')               # Text extraction engine, 'pptx' or 'stream'
+if ENGINE not in pptxindex.PresentationIndex.ENGINES:
+    log.warning('ENV: unknown ENGINE {}, using pptx'.format(ENGINE))
+    ENGINE = 'pptx'
+
+try:
+    PART_SIZE = int(os.environ.get('PZ_PART_SIZE', transfer.Transfer.PART_SIZE // 2**20)) * 2**20
+except ValueError:
+    PART_SIZE = transfer.Transfer.PART_SIZE
+    log.warning('ENV: could not convert value of PART_SIZE to int, using {}'.format(PART_SIZE))
+
+try:
+    PART_CONCURRENCY = int(os.environ.get('PZ_PART_CONCURRENCY', transfer.Transfer.CONCURRENCY))
+except ValueError:
+    PART_CONCURRENCY = transfer.Transfer.CONCURRENCY
+    log.warning('ENV: could not convert value of PART_CONCURRENCY to int, using {}'.format(PART_CONCURRENCY))
+
+try:
+    SLIDE_DEPTH = int(os.environ.get('PZ_SLIDE_DEPTH', 5))  # Keyword phrases of each slide stored in the catalog
+except ValueError:
+    SLIDE_DEPTH = 5
+    log.warning('ENV: could not convert value of SLIDE_DEPTH to int, using {}'.format(SLIDE_DEPTH))
+
+JOURNAL = os.environ.get('PZ_JOURNAL', transfer.Transfer.JOURNAL_DIR)
+
+LSH = os.environ.get('PZ_LSH', minhash.LSHIndex.DEFAULT_PATH)
+NEAR_DUPLICATES = os.environ.get('PZ_NEAR_DUPLICATES', 'tag').lower()  # 'tag', 'skip' or 'off'
+if NEAR_DUPLICATES not in ('tag', 'skip', 'off'):
+    log.warning('ENV: unknown NEAR_DUPLICATES {}, using tag'.format(NEAR_DUPLICATES))
+    NEAR_DUPLICATES = 'tag'
+try:
+    SIMILARITY = float(os.environ.get('PZ_SIMILARITY', minhash.THRESHOLD))
+except ValueError:
+    SIMILARITY = minhash.THRESHOLD
+    log.warning('ENV: could not convert value of SIMILARITY to float, using {}'.format(SIMILARITY))
+CLUSTER_TAG = 'cluster'                                    # the tag of the id of the cluster of near duplicates
+
+CACHE = os.environ.get('PZ_CACHE', contentcache.ContentCache.DEFAULT_PATH)
+FORCE = os.environ.get('PZ_FORCE', 'false').lower() in ('1', 'true', 'yes')
+MANIFEST = os.environ.get('PZ_MANIFEST', 'true').lower() in ('1', 'true', 'yes')  # Update the manifest in the bucket
+METRICS_LOG = os.environ.get('PZ_METRICS_LOG', 'false').lower() in ('1', 'true', 'yes')  # A JSON record for each file
+METRICS_FILE = os.environ.get('PZ_METRICS_FILE')           # Totals in the Prometheus text format
+STATSD = os.environ.get('PZ_STATSD')                       # host:port of a StatsD server
+#
+#  Files to upload, refer to crawler.Crawler, the patterns and extensions are separated by commas
+#
+EXTENSIONS = [extension.strip() for extension in os.environ.get('PZ_EXTENSIONS', '.pptx,.pdf').split(',') if extension.strip()]
+ANALYZED = ('.pptx', '.pdf')                               # the extensions of the files analyzed, refer to get_analysis()
+if any('.' + extension.lower().lstrip('.') not in ANALYZED for extension in EXTENSIONS):
+    log.warning('ENV: no analyzer for EXTENSIONS {}, skipped'.format(
+                ','.join(extension for extension in EXTENSIONS if '.' + extension.lower().lstrip('.') not in ANALYZED)))
+    EXTENSIONS = [extension for extension in EXTENSIONS if '.' + extension.lower().lstrip('.') in ANALYZED]
+INCLUDE = [pattern.strip() for pattern in os.environ.get('PZ_INCLUDE', '').split(',') if pattern.strip()]
+EXCLUDE = [pattern.strip() for pattern in os.environ.get('PZ_EXCLUDE', '').split(',') if pattern.strip()]
+RECURSIVE = os.environ.get('PZ_RECURSIVE', 'true').lower() in ('1', 'true', 'yes')  # Walk the subdirectories
+DEDUPE = os.environ.get('PZ_DEDUPE', 'inode').lower()      # 'inode', 'hash' or 'none'
+if DEDUPE not in crawler.Crawler.DEDUPE:
+    log.warning('ENV: unknown DEDUPE {}, using inode'.format(DEDUPE))
+    DEDUPE = 'inode'
+
+analyzer = None                                            # PresentationIndex of a worker process
+cache = None                                               # ContentCache of a worker process
+near_duplicates = None                                     # LSHIndex of the main process
+
+
+def init_worker():
+    """
+        Initialize each worker process of the process pool. Text extraction does not
+        access the object store, credentials are not required.
+    """
+    global analyzer, cache
+    analyzer = pptxindex.PresentationIndex(engine=ENGINE)
+    if CACHE:
+        cache = contentcache.ContentCache(CACHE)
+
+
+def analyze_file(filepath):
+    """
+        Executed in a worker process, returns a tuple of the filepath, the metadata, MD5 of the file,
+        the keywords of each slide, the trace (metrics) of the analysis, the content type of the file
+        and the MinHash signature of its text (or None)
+    """
+    trace = metrics.Trace('ingest', filepath=filepath)
+    content_type = get_content_type(filepath)
+    (analysis, md5) = get_analysis(analyzer, filepath, cache=cache, trace=trace, content_type=content_type)
+    metadata = build_metadata(analyzer, filepath, analysis, md5, trace=trace)
+    return (filepath, metadata, md5, analysis['slides'], trace, content_type, analysis.get('minhash'))
+
+
+def get_content_type(filepath):
+    """
+        returns: the content type of the file, a PDF file is identified by its content, other files by the extension
+    """
+    if pdfindex.PdfIndex.is_pdf(filepath):
+        return pdfindex.CONTENT_TYPE
+    return mimetypes.guess_type(filepath)[0] or 'application/octet-stream'
+
+
+def get_analysis(pi, filepath, cache=None, trace=None, content_type=None):
+    """
+        Read the file, extract the text and core_properties and rank the keyword phrases with Rake.
+        If the content of the file is in the cache, the cached results are used.
+        The time of each stage is added to the trace.
+
+        returns: a tuple of a dictionary of the analysis and the MD5 of the file
+    """
+    trace = trace or metrics.Trace('ingest', filepath=filepath)
+    is_pdf = (content_type or get_content_type(filepath)) == pdfindex.CONTENT_TYPE
+    with trace.stage('digest'):
+        (md5, sha256) = pi.file_digests(filepath)
+    key = contentcache.ContentCache.key(sha256, engine='pdf' if is_pdf else pi.engine, depth=DEPTH)
+
+    with trace.stage('cache'):
+        entry = cache.get(key) if cache else None
+    if entry is None or entry.get('slide_depth') != SLIDE_DEPTH or 'minhash' not in entry:  # cached by a previous version
+        if is_pdf:
+            return (get_pdf_analysis(filepath, key, cache=cache, trace=trace), md5)
+        analysis = pi.analyze(filepath, trace=trace)       # Read the file once for text and core_properties
+        with trace.stage('rake'):
+            entry = dict(text_runs=analysis.text_runs,
+                         phrases=pi.rake_it(analysis.text_runs, depth=DEPTH),
+                         core_properties=analysis.core_properties,
+                         slides=[[text for score, text in phrases]     # each analyzer is a process, extract in this one
+                                 for phrases in keyphrase.extractor().extract_many(analysis.slide_text(), depth=SLIDE_DEPTH)],
+                         slide_depth=SLIDE_DEPTH)
+        with trace.stage('minhash'):
+            entry['minhash'] = None if analysis.error_message else minhash.signature(analysis.text_runs)
+        if cache and not analysis.error_message:
+            with trace.stage('cache'):
+                cache.put(key, entry)
+    else:
+        trace.count('cached')
+
+    return (entry, md5)
+
 
-def upload_file(pi, filepath, tags):
+def get_pdf_analysis(filepath, key, cache=None, trace=None):
     """
-        Extract the text from the presentation. Use Rake to return the score and text. If the text
-        is deemed sufficiently relevant, append it to the list of keywords.
+        Extract the keyword phrases and document information of a PDF file a page at a time, the keyword
+        phrases of each page are stored as those of a slide. The text is not cached.
 
-        Retrieve the core_properties from the presentation, and use this along with the keywords as metadata.
-        Validate the metatdata. Upload the file as an object in the target bucket.
+        returns: a dictionary of the analysis, refer to get_analysis()
+    """
+    sketch = minhash.MinHash() if minhash.AVAILABLE else None
+    analysis = pdfindex.PdfIndex().analyze(filepath, depth=DEPTH, page_depth=SLIDE_DEPTH, trace=trace, sketch=sketch)
+    if analysis.error_message:
+        log.warning('GET_PDF_ANALYSIS: {}'.format(analysis.error_message))
+    entry = dict(phrases=analysis.phrases,
+                 core_properties=analysis.core_properties,
+                 slides=analysis.slides,
+                 slide_depth=SLIDE_DEPTH,
+                 minhash=sketch.hexdigest() if sketch and not analysis.error_message else None)
+    if cache and not analysis.error_message:
+        with trace.stage('cache'):
+            cache.put(key, entry)
+    return entry
+
+
+def get_file_metadata(pi, filepath, cache=None, slides=False, trace=None, content_type=None):
+    """
+        Create the metadata dictionary combining keywords from rake and core_properties of the presentation
+
+        returns: a tuple of the metadata and the MD5 of the file, and if slides is True, the keywords of
+                 each slide (which are stored in the catalog, not the metadata of the object)
+    """
+    (analysis, md5) = get_analysis(pi, filepath, cache=cache, trace=trace, content_type=content_type)
+    metadata = build_metadata(pi, filepath, analysis, md5, trace=trace)
+
+    if slides:
+        return (metadata, md5, analysis['slides'])
+    return (metadata, md5)
+
+
+def build_metadata(pi, filepath, analysis, md5, trace=None):
+    """
+        returns: the metadata of the object, from the analysis of the file, refer to get_file_metadata()
     """
     keyword_list = []
-    pptx_text = pi.extract_text(filepath)                  # Extract the text from the file
-    for score, text in pi.rake_it(pptx_text, depth=DEPTH):
+    for score, text in analysis['phrases']:
         if score >= CUT_LINE:                              # Determine if this is relevant based on derived score
             keyword_list.append(text)
 
@@ -66,58 +314,146 @@ def upload_file(pi, filepath, tags):
     #
     # Create the metadata dictionary combining keywords from rake and core_properties of the presentation
     #
-    core_properties = pi.get_core_properties(filepath)
-
     metadata = rake.copy()
     metadata['filepath'] = filepath
-    metadata.update(core_properties)
-
-    for key, value in metadata.items():
-        if isinstance(value, (str, float, int)):
-            try:
-                metadata[key] = pi.us_ascii([value])
-            except TypeError as err:
-                log.debug('UPLOAD_FILE: encountered TypeError {} {} {}'.format(type(value), key, value))
-        elif isinstance(value, list):
-            metadata[key] = pi.us_ascii(value)
-        else:
-            log.debug('UPLOAD_FILE: unrecognized datatype {} {} {}'.format(type(value), key, value))
-    #
-    # Upload file and metadata
-    #
-    result = pi.upload_file(filepath=filepath, metadata=metadata, tags=tags)
+    metadata.update(analysis['core_properties'])
+
+    with (trace or metrics.Trace('ingest')).stage('ascii'):
+        for key, value in metadata.items():
+            if isinstance(value, (str, float, int)):
+                try:
+                    metadata[key] = pi.us_ascii([value])
+                except TypeError as err:
+                    log.debug('UPLOAD_FILE: encountered TypeError {} {} {} {}'.format(err, type(value), key, value))
+            elif isinstance(value, list):
+                metadata[key] = pi.us_ascii(value)
+            else:
+                log.debug('UPLOAD_FILE: unrecognized datatype {} {} {}'.format(type(value), key, value))
 
-    return result
+    metadata['md5'] = md5                                  # the etag of multipart uploads is not the MD5
+    return metadata
 
 
-def get_files_to_upload(ifile='upload.files'):
+def put_file(pi, filepath, metadata, tags, md5=None, slides=None, trace=None, content_type='application/octet-stream',
+             signature=None):
     """
-        Input: ifile: Name of text file with the full path of the file(s) to upload
-                      or the name of a directory
-        Returns: Empty list or List of files
+        Executed in a thread, upload the file and metadata unless the object in the bucket is unchanged.
+        The keywords of each slide (slides) are added to the catalog. The file is added to the index of
+        near duplicates (signature), refer to PZ_NEAR_DUPLICATES.
+
+        returns: a dictionary of the filepath, the result of the upload (or None), error message (or None),
+                 if the upload was skipped and the trace (metrics) of the file
     """
-    if os.path.isfile(ifile):
-        log.debug('GET_FILES_TO_UPLOAD: processing normal file: {}'.format(ifile))
-        try:
-            f = open(ifile, 'r')
-        except:
-            log.error('GET_FILES_TO_UPLOAD: error reading {}'.format(ifile))
-            return []
+    trace = trace or metrics.Trace('ingest', filepath=filepath)
+    cluster = None
+    if near_duplicates is not None and signature:
+        with trace.stage('similar'):
+            cluster = near_duplicates.assign(pi.get_remote_name(filepath), signature, threshold=SIMILARITY,
+                                             add_similar=NEAR_DUPLICATES != 'skip')
+        if cluster['similar']:
+            trace.count('near_duplicates')
+            if not cluster['added']:
+                trace.count('skipped')
+                return dict(filepath=filepath, result=None, skipped=True, trace=trace,
+                            error='near duplicate of {similar} ({similarity:.0%} similar)'.format(**cluster))
+        if cluster['similar'] and NEAR_DUPLICATES == 'tag':   # the tags of the file first, up to MAX_TAGS
+            tags = pi.set_tags(dict(tags or {}, **{CLUSTER_TAG: cluster['cluster']}), max_tags=pi.MAX_TAGS)
 
-        files = f.read().splitlines()
-        f.close()
+    if md5 and not FORCE:
+        with trace.stage('check'):
+            uploaded = pi.is_uploaded(filepath, md5)
+        if uploaded:
+            trace.count('skipped')
+            return dict(filepath=filepath, result=None, error=None, skipped=True, trace=trace)
+
+    (result, error) = pi.upload(filepath=filepath, metadata=metadata, tags=tags, slides=slides, trace=trace,
+                                content_type=content_type)
+    if result:
+        trace.count('uploaded')
+        trace.count('bytes', os.path.getsize(filepath))
     else:
-        log.debug('GET_FILES_TO_UPLOAD: processing directory: {}'.format(ifile))
-        files = []
-        ifile = os.path.normpath(ifile)          # remove trailing slash(s), if present
-        try:
-            for file in os.listdir(ifile):       # TODO move to a function and ignore '._' files
-                if file.endswith('.pptx'):
-                    files.append('{}/{}'.format(ifile, file))
-        except FileNotFoundError as e:
-            log.error('GET_FILES_TO_UPLOAD: {}'.format(e))
+        trace.count('errors')
+        if cluster and cluster['added'] and not cluster['existed']:
+            near_duplicates.remove(pi.get_remote_name(filepath))   # not in the bucket, not a near duplicate of later files
+    return dict(filepath=filepath, result=result, error=error, skipped=False, trace=trace)
+
+
+def upload_files(pi, input_files, tags):
+    """
+        Generator, analyze the files in a pool of processes and upload the files in a pool of threads,
+        yielding a dictionary of the filepath, result, error and trace as each upload completes.
+
+        The number of files queued for each pool is bounded, input_files may be a generator.
+    """
+    files = iter(input_files)
+    analyzing = dict()                                     # future: filepath
+    uploading = set()
+
+    with ProcessPoolExecutor(max_workers=WORKERS, initializer=init_worker, mp_context=analyzer_context()) as analyzers, \
+            ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as uploaders:
+        while True:
+            while len(analyzing) < WORKERS * 2:
+                filepath = next(files, None)
+                if filepath is None:
+                    break
+                analyzing[analyzers.submit(analyze_file, filepath)] = filepath
 
-    return files
+            if not analyzing and not uploading:
+                break
+            #
+            # Only wait on analysis when there is room in the upload queue
+            #
+            pending = set(uploading)
+            if len(uploading) < UPLOAD_CONCURRENCY * 2:
+                pending.update(analyzing)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future in uploading:
+                    uploading.remove(future)
+                    yield future.result()
+                    continue
+
+                filepath = analyzing.pop(future)
+                try:
+                    (filepath, metadata, md5, slides, trace, content_type, signature) = future.result()
+                except Exception as err:
+                    trace = metrics.Trace('ingest', filepath=filepath)
+                    trace.count('errors')
+                    yield dict(filepath=filepath, result=None, error='analysis failed: {}'.format(err), skipped=False,
+                               trace=trace)
+                    continue
+                uploading.add(uploaders.submit(put_file, pi, filepath, metadata, tags, md5=md5, slides=slides,
+                                               trace=trace, content_type=content_type, signature=signature))
+
+
+def analyzer_context():
+    """
+        The process pool starts its processes as files are submitted, after the upload threads are running.
+        A process forked while another thread holds a lock (logging, the connection pool) may deadlock, so the
+        processes are started by a fork server, which imports the analyzers once, or spawned.
+
+        returns: the multiprocessing context of the process pool
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['pptxindex', 'keyphrase.keyphrase', 'pdf.pdfindex'])
+    return context
+
+
+def get_files_to_upload(ifile='upload.files', finder=None):
+    """
+        Input: ifile: Name of text file with the full path of the file(s) to upload
+                      or the name of a directory
+               finder: optional crawler.Crawler, by default the files are selected as configured by the environment
+        Returns: a generator of the files, the directories are walked as the files are uploaded
+    """
+    finder = finder or crawler.Crawler(extensions=EXTENSIONS, include=INCLUDE, exclude=EXCLUDE, recursive=RECURSIVE,
+                                       dedupe=DEDUPE, log=log)
+    log.debug('GET_FILES_TO_UPLOAD: processing {}'.format(ifile))
+    return finder.files(ifile)
 
 
 def read_tags():
@@ -142,39 +478,87 @@ def read_tags():
     return dict()
 
 
+def flush_manifest(pi):
+    """
+        Write the entries of the files uploaded to the manifest, as each upload completes, so an interrupted
+        upload does not lose the entries of the objects already in the bucket
+    """
+    try:
+        log.debug("MAIN: {} shards of the manifest updated".format(pi.manifest.flush()))
+    except (InvalidResponseError, S3Error, ServerError, HTTPError) as err:
+        log.error("MAIN: updating the manifest {}, run reindex.py --manifest".format(err))
+
+
 def main():
     """
         Instanciate a connection object with the keys and name of the bucket. Verify the bucket exists,
         ensuring that we can reach the bucket specified with the credentials provided.
-        Get a list of files to upload, and call method `upload file` to create the metadata and upload
-        the file to the object store.
+        Get a list of files to upload, create the metadata and upload each file to the object store.
     """
+    if startup.FLAG in sys.argv[1:]:
+        sys.exit(startup.profile())
 
     options = dict(
         bucket=os.environ.get('PZ_BUCKET', 'nobucket'),
         access_key=os.environ.get('PZ_ACCESS_KEY', 'noaccesskey'),
         secret_key=os.environ.get('PZ_SECRET_KEY', 'nosecret'))
 
+    catalog_path = os.environ.get('PZ_CATALOG', catalog.Catalog.DEFAULT_PATH)
+    if os.path.isfile(catalog_path):
+        options['catalog'] = catalog.Catalog(catalog_path)
+
+    options['transfer'] = transfer.Transfer(part_size=PART_SIZE, concurrency=PART_CONCURRENCY, journal_dir=JOURNAL)
+    # a connection for each part uploaded concurrently
+    options['max_connections'] = pptxindex.PresentationIndex.env_max_connections(
+        log, default=max(pptxindex.PresentationIndex.MAX_CONNECTIONS, UPLOAD_CONCURRENCY * PART_CONCURRENCY))
+
     pi = pptxindex.PresentationIndex(**options)
+    if MANIFEST:
+        pi.manifest = manifest.Manifest(pi)
+
+    global near_duplicates
+    if LSH and minhash.AVAILABLE:
+        near_duplicates = minhash.LSHIndex(LSH)
+    elif LSH:
+        log.warning('MAIN: near duplicates are not detected, numpy is not installed')
 
     if not pi.verify_bucket_exists():
         log.error('MAIN: bucket {} does not exist or you do not have credentials for this bucket.'.format(options['bucket']))
         exit()
 
-    input_files = get_files_to_upload(os.environ.get('PZ_PPTX_FILES'))
+    finder = crawler.Crawler(extensions=EXTENSIONS, include=INCLUDE, exclude=EXCLUDE, recursive=RECURSIVE, dedupe=DEDUPE,
+                             log=log)
+    input_files = get_files_to_upload(os.environ.get('PZ_PPTX_FILES'), finder)
+
+    tags = pi.set_tags(read_tags())
+    if pi.error_message:
+        log.warning('MAIN: tags {}'.format(pi.error_message))
+
+    registry = metrics.Metrics(log=log if METRICS_LOG else None, statsd=metrics.StatsD(STATSD) if STATSD else None)
+
+    for item in upload_files(pi, input_files, tags):
+        registry.record(item['trace'])
+        if item['skipped']:
+            log.info("MAIN: {}, skipped filepath:{}".format(item['error'] or 'unchanged', item['filepath']))
+            continue
+        if not item['result']:
+            log.error("MAIN: {} {}".format(item['error'], item['filepath']))
+            continue
+        if item['error']:
+            log.warning("MAIN: {} {}".format(item['error'], item['filepath']))
+        log.info("MAIN: etag:{} filepath:{}".format(item['result'].etag, item['filepath']))
+        if pi.manifest:
+            flush_manifest(pi)
 
-    if not input_files:
+    if not finder.counts['files']:
         log.error("MAIN: {}".format('No files to upload!'))
+    log.info("MAIN: {}".format(', '.join('{} {}'.format(value, key) for key, value in sorted(finder.counts.items()))))
 
-    tags = pi.set_tags(read_tags())
+    if pi.manifest:
+        flush_manifest(pi)
 
-    for filepath in input_files:
-        result = upload_file(pi, filepath, tags=tags)
-        if not result:
-            result = pi.error_message
-            log.error("MAIN: {} {}".format(result, filepath))
-        else:
-            log.info("MAIN: etag:{} filepath:{}".format(result.etag, filepath))
+    if METRICS_FILE:
+        registry.write(METRICS_FILE)
 
 
 if __name__ == '__main__':